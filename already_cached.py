@@ -1,13 +1,20 @@
 from supabase import create_client
 from pipeline2 import JobPipeline
+from analysis_frame import AnalysisFrame
 from analyzation import AnalyzationPipeline
+from batch_analysis import BatchAnalysis, store_images
+from blob_store import BlobStore, get_blob_store
+from check import SkillsTrendAdapter, trend_since
+from render_pool import get_render_pool
 from skill_analyzation import WilsonNecessityWidget
-from database_insertion import Database
+from database_insertion import get_database, invalidate_cached_rows
+from skill_categories import get_category_model
 import pandas as pd
-import time
+import base64
 from dotenv import load_dotenv
 import os
 
+
 def upload_to_supabase():
     load_dotenv()
     print("Already cached process started")
@@ -16,15 +23,8 @@ def upload_to_supabase():
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
     supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-    analyzer = AnalyzationPipeline()
 
-    db = Database(
-        supabase_url=SUPABASE_URL,
-        supabase_key=SUPABASE_KEY,
-        table_skills="skills",
-        table_jobs="jobs",
-        table_job_skills="job_skills",
-    )
+    db = get_database(SUPABASE_URL, SUPABASE_KEY)
 
     # keywords = [
     #     "data science", "Machine Learning", "Generative AI", "Data Engineering",
@@ -35,19 +35,10 @@ def upload_to_supabase():
     # ]
 
     keywords = ["Full-Stack Engineering", "data science"]  
-    
-    for idx, kw in enumerate(keywords, start=1):
-        print(f"\n🔄 Processing {idx}/{len(keywords)}: '{kw}'")
-
-        existing_check = supabase.table("cached").select("name").eq("name", kw).execute()
-        if existing_check.data:
-            print(f"🗑️  Deleting existing record for '{kw}'")
-            delete_response = supabase.table("cached").delete().eq("name", kw).execute()
-            time.sleep(1)
 
-            print(f"   Deleted {len(delete_response.data)} record(s)")
-        else:
-            print(f"ℹ️  No existing record found for '{kw}' - creating new")
+    # Step 1: fetch and store every keyword's postings
+    for idx, kw in enumerate(keywords, start=1):
+        print(f"\n🔄 Fetching {idx}/{len(keywords)}: '{kw}'")
 
         pipeline = JobPipeline(keyword=kw, supabase_url=SUPABASE_URL, supabase_api=SUPABASE_KEY)
         print(f"📡 Fetching job data for '{kw}'...")
@@ -56,71 +47,31 @@ def upload_to_supabase():
 
         print("💾 Processing database operations...")
         skills_unique, jobs_table, job_skills_name_only = db.fill_tables(df_skills)
-        skills_map_df, jobs_table_final, job_skills_full = db.insert_into_supabase(
-            skills_unique, jobs_table, job_skills_name_only
-        )
-
-        skills_res = supabase.table("skills").select("SkillId, SkillName").execute()
-        skills_df = pd.DataFrame(skills_res.data or [])
-
-        page_size = 1000
-        page = 0
-        all_rows = []
-
-        while True:
-            start = page * page_size
-            end   = start + page_size - 1
-            resp = (
-                supabase
-                .table("job_skill_view")
-                .select("JobId,Title,JobPosted,Keyword,SkillName")
-                .eq("Keyword", kw)
-                .order("JobPosted", desc=True)
-                .range(start, end)
-                .execute()
-            )
-            batch = resp.data or []
-            all_rows.extend(batch)
-            if len(batch) < page_size:
-                break
-            page += 1
-
-        jobs_df = pd.DataFrame(all_rows)
-        print(jobs_df.head())
-
-        # # Step 3: Generate analysis plots
-        print(f"📊 Generating analysis plots...")
-
-        plt1 = analyzer.analyze_top_skills(df_skills, analyze=True)
-        plt2, skills_list = analyzer.skill_trends()
-
-        # Wilson necessity analysis
-        widget = WilsonNecessityWidget(df_skills, nec_wlb_pct=40.0)
-        _ = widget.run()
-        plt3 = widget.plot_base64()
-
-        # Step 4: Prepare new record
-        row = {
-            "name": kw,
-            "plt1": plt1,
-            "plt2": plt2,
-            "plt3": plt3,
-            "skill_list": skills_list,
-        }
-
-        # Step 5: Insert new record
-        print(f"⬆️  Uploading new data for '{kw}'...")
-        response = supabase.table("cached").insert(row).execute()
-        time.sleep(5)
+        db.insert_into_supabase(skills_unique, jobs_table, job_skills_name_only)
+
+    # Step 2: analyze all keywords from one read of the daily cube (sql/skill_daily_counts.sql)
+    rows = BatchAnalysis(db, keywords).run()
+
+    # Step 3: upsert the cached records; they hold blob keys only (sql/cached.sql), so an
+    # unchanged plot keeps its key and its bytes are not written again
+    for kw, row in rows.items():
+        print(f"⬆️  Upserting cached record for '{kw}'...")
+        row["updated_at"] = pd.Timestamp.now(tz="UTC").isoformat()
+        response = supabase.table("cached").upsert(row, on_conflict="name").execute()
 
+        skills_list = row["skill_list"]
         if response.data:
             print(f"✅ Successfully uploaded '{kw}': Record created")
             print(f"   Skills analyzed: {len(skills_list) if skills_list else 0}")
             print(f"   Plots generated: 3")
         else:
             print(f"⚠️  Upload completed but no data returned for '{kw}'")
+        invalidate_cached_rows(kw)
 
 
+    # compact the persisted skill categories once a week
+    get_category_model().maybe_recluster(max_age_days=7)
+
     print(f"\n🎉 Processing complete! Processed {len(keywords)} keywords.")
 
 
@@ -155,22 +106,9 @@ def update_single_keyword(keyword):
     supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
     analyzer = AnalyzationPipeline()
 
-    db = Database(
-        supabase_url=SUPABASE_URL,
-        supabase_key=SUPABASE_KEY,
-        table_skills="skills",
-        table_jobs="jobs", 
-        table_job_skills="job_skills",
-    )
-
-    # try:
-        # Delete existing record
-    existing_check = supabase.table("cached").select("name").eq("name", keyword).execute()
-    if existing_check.data:
-        print(f"🗑️  Deleting existing record for '{keyword}'")
-        supabase.table("cached").delete().eq("name", keyword).execute()
-
-    # Process and upload new data
+    db = get_database(SUPABASE_URL, SUPABASE_KEY)
+
+    # Process and upload new data (the cached row is upserted below, never deleted first)
     pipeline = JobPipeline(keyword=keyword, supabase_url=SUPABASE_URL, supabase_api=SUPABASE_KEY)
     pipeline.fetch_data()
     df_skills = pipeline.extract_skills()
@@ -180,12 +118,18 @@ def update_single_keyword(keyword):
     skills_unique, jobs_table, job_skills_name_only = db.fill_tables(df_skills)
     db.insert_into_supabase(skills_unique, jobs_table, job_skills_name_only)
 
-    plt1 = analyzer.analyze_top_skills(df_skills)
-    plt2, skills_list = analyzer.skill_trends()
+    # one read-only analysis frame shared by all three analyses; the plots are drawn concurrently
+    frame = AnalysisFrame.from_posts(df_skills)
+    trend = SkillsTrendAdapter(frame=frame, since=trend_since()).trend_spec()
+    skills_list = [s["name"] for s in trend["series"]]
 
-    widget = WilsonNecessityWidget(df_skills, nec_wlb_pct=40.0)
+    widget = WilsonNecessityWidget.from_matrix(frame.matrix(), nec_wlb_pct=40.0)
     _ = widget.run()
-    plt3 = widget.plot_base64()
+    plt1, plt2, plt3 = store_images(get_render_pool().render_bytes([
+        analyzer.skill_counts_spec(frame.skill_counts()),
+        trend if skills_list else None,
+        widget.spec(),
+    ]))
 
     row = {
         "name": keyword,
@@ -193,12 +137,49 @@ def update_single_keyword(keyword):
         "plt2": plt2,
         "plt3": plt3,
         "skill_list": skills_list,
+        "updated_at": pd.Timestamp.now(tz="UTC").isoformat(),
     }
     
-    response = supabase.table("cached").upsert(row).execute()
+    response = supabase.table("cached").upsert(row, on_conflict="name").execute()
+    invalidate_cached_rows(keyword)
     print(f"✅ Successfully updated '{keyword}'")
 
 
+
+def migrate_cached_to_blobs():
+    """
+    One-off: moves base64 plots still stored in `cached` rows into the blob store and
+    leaves their keys in place (run after sql/cached.sql). Rows already holding keys are skipped.
+    """
+    load_dotenv()
+    supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    store = get_blob_store()
+
+    for record in supabase.table("cached").select("name").execute().data:
+        name = record["name"]
+        row = supabase.table("cached").select("plt1, plt2, plt3").eq("name", name).execute().data[0]
+        update = {}
+        for col in ("plt1", "plt2", "plt3"):
+            value = row[col]
+            if value and not BlobStore.is_key(value):
+                data = base64.b64decode(value)
+                update[col] = store.put(data, image_ext(data))
+        if update:
+            supabase.table("cached").update(update).eq("name", name).execute()
+            invalidate_cached_rows(name)
+            print(f"📦 Moved {len(update)} plot(s) of '{name}' to the blob store")
+        else:
+            print(f"ℹ️  '{name}' already references blobs")
+
+
+def image_ext(data):
+    """File extension of image bytes (png, webp or svg), sniffed from the header."""
+    if data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        return "webp"
+    if data.lstrip().startswith((b"<?xml", b"<svg")):
+        return "svg"
+    return "png"
+
 # if __name__ == "__main__":
 
     # update_single_keyword("data science")  # Update single keyword
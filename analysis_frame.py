@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+from skill_matrix import SkillMatrix
+from skill_parsing import POST_ID, explode_skills, is_exploded
+
+
+class AnalysisFrame:
+    """
+    Canonical, read-only (post, skill) data for one request, built once and shared by
+    every analyzer (AnalyzationPipeline, SkillsTrendAdapter, WilsonNecessityWidget,
+    SkillCooccurrence) instead of each one copying and re-exploding the raw frame.
+
+    Columns are plain numpy arrays marked read-only:
+        post    int32  post number 0..n_posts-1 (row of the source frame if it was raw)
+        codes   int16/int32  skill code, name = skills[code]  (pandas categorical codes)
+        created datetime64[ns] posting time (UTC, naive) per post; NaT if unknown
+
+    Skill names exist once in `skills` instead of once per row, and descriptions and
+    other text columns are never carried along.
+
+    Usage:
+        from analysis_frame import AnalysisFrame
+        frame = AnalysisFrame.from_posts(df_skills)       # raw or exploded, 'skills' + optional 'created'
+        frame.skill_counts()                              # skill -> posts Series, most frequent first
+        frame.daily_counts(since)                         # DataFrame(JobPosted, SkillName, count)
+        frame.matrix()                                    # SkillMatrix, built once
+    """
+
+    def __init__(self, post: np.ndarray, codes: np.ndarray, skills: np.ndarray, created: np.ndarray, n_posts: int) -> None:
+        for arr in (post, codes, created):
+            arr.flags.writeable = False
+        self.post = post
+        self.codes = codes
+        self.skills = skills
+        self.created = created
+        self.n_posts = int(n_posts)
+        self._matrix: Optional[SkillMatrix] = None
+
+    # ---------- constructors ----------
+    @classmethod
+    def from_posts(
+        cls, df: pd.DataFrame, skills_col: str = "skills", created_col: str = "created", chunk_rows: int = 50_000
+    ) -> "AnalysisFrame":
+        """
+        From a raw posts frame (one row per post) or an exploded one (see skill_parsing).
+        Only skills_col and created_col are read; created must already be datetime
+        (parsed per source at fetch time, see data_generation/posted_dates.py).
+        Raw frames are exploded chunk_rows posts at a time to bound peak memory.
+        """
+        if is_exploded(df):
+            post, uniques = pd.factorize(df[POST_ID])
+            n_posts = len(uniques)
+            skills = pd.Categorical(df[skills_col])
+            codes, names = skills.codes, skills.categories
+        else:
+            post, codes, names = cls._explode_chunked(df[skills_col], skills_col, chunk_rows)
+            n_posts = len(df)
+        post = post.astype(np.int32)
+
+        created = np.full(n_posts, np.datetime64("NaT"), dtype="datetime64[ns]")
+        if created_col in df.columns:
+            dates = df[created_col]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                raise ValueError(
+                    f"'{created_col}' must already be a datetime column; dates are parsed per source "
+                    "at fetch time (data_generation/posted_dates.py)."
+                )
+            if dates.dt.tz is not None:
+                dates = dates.dt.tz_convert("UTC").dt.tz_localize(None)
+            dates = dates.to_numpy(dtype="datetime64[ns]")
+            if is_exploded(df):
+                created[post] = dates       # one row per (post, skill): same date for all rows of a post
+            else:
+                created[:] = dates
+
+        return cls(post, codes, names.to_numpy(dtype=object), created, n_posts)
+
+    @staticmethod
+    def _explode_chunked(skills: pd.Series, skills_col: str, chunk_rows: int):
+        """
+        explode_skills() over chunk_rows posts at a time, keeping only integer codes per
+        chunk, so the per-(post, skill) Python strings of one chunk are alive at once.
+        Returns (post positions, skill codes, skill names Index).
+        """
+        posts, codes, vocabs = [], [], []
+        for start in range(0, len(skills), chunk_rows):
+            pairs = explode_skills(skills.iloc[start:start + chunk_rows].to_frame(skills_col), skills_col)
+            cat = pd.Categorical(pairs[skills_col])
+            posts.append(pairs[POST_ID].to_numpy(dtype=np.int32) + start)
+            codes.append(cat.codes)
+            vocabs.append(cat.categories)
+
+        if not posts:
+            return np.array([], dtype=np.int32), np.array([], dtype=np.int8), pd.Index([], dtype=object)
+        names = vocabs[0].append(vocabs[1:]).unique() if len(vocabs) > 1 else vocabs[0]
+        remapped = [names.get_indexer(v)[c] for v, c in zip(vocabs, codes)]
+        dtype = np.int16 if len(names) < 2 ** 15 else np.int32
+        return np.concatenate(posts), np.concatenate(remapped).astype(dtype), names
+
+    # ---------- views ----------
+    @property
+    def n_pairs(self) -> int:
+        return len(self.codes)
+
+    def skill_counts(self) -> pd.Series:
+        """skill -> number of posts mentioning it, most frequent first (index = skill name)."""
+        counts = np.bincount(self.codes, minlength=len(self.skills))
+        order = np.argsort(-counts, kind="stable")
+        order = order[counts[order] > 0]
+        return pd.Series(counts[order], index=pd.Index(self.skills[order], name="skills"), name="count")
+
+    def daily_counts(self, since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        DataFrame(JobPosted, SkillName, count): posts per (day, skill), the shape of
+        Database.daily_skill_counts(), for SkillsTrendAdapter(daily_counts=...).
+        Undated posts are left out; since drops days before it.
+        """
+        day = self.created[self.post].astype("datetime64[D]")
+        keep = ~np.isnat(day)
+        if since is not None:
+            keep &= day >= np.datetime64(pd.Timestamp(since).date(), "D")
+        day, codes = day[keep], self.codes[keep]
+
+        if len(day) == 0:
+            return pd.DataFrame({
+                "JobPosted": pd.Series([], dtype="datetime64[ns]"),
+                "SkillName": pd.Series([], dtype=object),
+                "count": pd.Series([], dtype=np.int64),
+            })
+        day_codes, days = pd.factorize(day, sort=True)
+        key = day_codes.astype(np.int64) * len(self.skills) + codes
+        uniq, counts = np.unique(key, return_counts=True)
+        return pd.DataFrame({
+            "JobPosted": days[uniq // len(self.skills)].astype("datetime64[ns]"),
+            "SkillName": self.skills[uniq % len(self.skills)],
+            "count": counts,
+        })
+
+    def matrix(self) -> SkillMatrix:
+        """Binary post x skill SkillMatrix over the same codes (built on first use, then shared)."""
+        if self._matrix is None:
+            self._matrix = SkillMatrix.from_codes(self.post, self.codes, self.skills, n_jobs=self.n_posts)
+        return self._matrix
@@ -1,213 +1,166 @@
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
-import io
-import base64
-from collections import Counter
-
-import numpy as np
 import pandas as pd
+from typing import Optional, Union
 
-from sentence_transformers import SentenceTransformer
-from sklearn.cluster import AgglomerativeClustering
-import pandas as pd
-from check import SkillsTrendAdapter
+import plots
+from analysis_frame import AnalysisFrame
+from check import DEFAULT_WINDOW_DAYS, SkillsTrendAdapter, trend_since
+from skill_categories import get_category_model
+from skill_cooccurrence import SkillCooccurrence
 
 
 class AnalyzationPipeline:
-    def __init__(self):
+    def __init__(self, fmt: Optional[str] = None, dpi: Optional[int] = None, max_bytes: Optional[int] = None):
+        """fmt/dpi/max_bytes: output of every plot, as in plots.render (None = PLOT_* defaults)."""
+        self.plot_options = {"fmt": fmt, "dpi": dpi, "max_bytes": max_bytes}
         self.response = None
-        self.df = None  # stored for skill_trends()
+        self.frame = None  # AnalysisFrame, stored for skill_trends() / skill_cooccurrence()
+        self.daily_counts = None  # set by analyze_aggregates() instead of self.frame
 
     # ---------- public API ----------
     def analyze_top_skills(
         self,
-        df: pd.DataFrame,
+        df: Union[pd.DataFrame, AnalysisFrame],
         analyze: bool = True,     # FLAG: True = cluster + analyze; False = just plot counts
         top_k: int = 8,
         min_count: int = 2        # ignore singletons in either mode
     ) -> str:
         """
-        Returns: base64 PNG of the bar chart ('' if nothing to plot)
+        Returns: base64 image of the bar chart ('' if nothing to plot)
 
+        df: raw/exploded posts frame, or an AnalysisFrame already built for this request
+        (then shared as-is, nothing is copied).
         analyze=True  -> semantic clustering into categories, then plot categories
         analyze=False -> plain top skill frequencies (no embeddings/clustering)
         """
-        if not isinstance(df, pd.DataFrame):
+        if isinstance(df, AnalysisFrame):
+            frame = df
+        elif isinstance(df, pd.DataFrame):
+            if "skills" not in df.columns or df["skills"].dropna().empty:
+                print("❌ No 'skills' column or it is empty.")
+                return ""
+            frame = AnalysisFrame.from_posts(df, "skills")
+        else:
             print("❌ Input must be a DataFrame.")
             return ""
 
-        if "skills" not in df.columns or df["skills"].dropna().empty:
-            print("❌ No 'skills' column or it is empty.")
+        # kept for skill_trends() and reusable by WilsonNecessityWidget.from_matrix(pipe.frame.matrix())
+        self.frame = frame
+        self.daily_counts = None
+        if frame.n_pairs == 0:
+            print("❌ No skills after normalization.")
             return ""
 
-        # keep a copy for skill_trends() usage
-        self.df = df.copy()
-        # safely drop large text column if present
-        self.df = self.df.drop(columns=[c for c in ["description", "descripiton"] if c in self.df.columns], errors="ignore")
+        return self.analyze_skill_counts(frame.skill_counts(), analyze=analyze, top_k=top_k, min_count=min_count)
 
-        # normalize to one skill per row
-        skills_series = self._explode_skills(self.df["skills"])
-        if skills_series.empty:
-            print("❌ No skills after normalization.")
-            return ""
+    def skill_cooccurrence(self, min_count: int = 2, min_pair: int = 2) -> Optional[SkillCooccurrence]:
+        """
+        Co-occurrence index (lift / PMI per skill pair) over self.frame from analyze_top_skills().
+        For the aggregates path use skill_cooccurrence.keyword_cooccurrence(db, keyword).
+        """
+        if self.frame is None or self.frame.n_pairs == 0:
+            print("❌ Run analyze_top_skills() first (to set self.frame).")
+            return None
+        return SkillCooccurrence(self.frame.matrix(), min_count=min_count, min_pair=min_pair)
+
+    def analyze_aggregates(
+        self,
+        skill_counts: pd.Series,
+        daily_counts: pd.DataFrame,
+        analyze: bool = True,
+        top_k: int = 8,
+        min_count: int = 2
+    ) -> str:
+        """
+        Same as analyze_top_skills(), but from pre-aggregated counts
+        (Database.skill_counts / Database.daily_skill_counts) instead of job x skill rows.
+        skill_trends() then uses daily_counts.
+        """
+        self.frame = None
+        self.daily_counts = daily_counts
+        return self.analyze_skill_counts(skill_counts, analyze=analyze, top_k=top_k, min_count=min_count)
+
+    def analyze_skill_counts(
+        self,
+        skill_counts: pd.Series,
+        analyze: bool = True,
+        top_k: int = 8,
+        min_count: int = 2
+    ) -> str:
+        """
+        Plots from a skill -> count Series (index = lower-cased skill name).
+        Returns: base64 image of the bar chart ('' if nothing to plot)
+        """
+        spec = self.skill_counts_spec(skill_counts, analyze=analyze, top_k=top_k, min_count=min_count)
+        return plots.render(spec, **self.plot_options) if spec else ""
 
+    def skill_counts_spec(
+        self,
+        skill_counts: pd.Series,
+        analyze: bool = True,
+        top_k: int = 8,
+        min_count: int = 2,
+        assign_new: bool = True
+    ) -> Optional[dict]:
+        """
+        The data behind analyze_skill_counts(): a plots.categories_spec (analyze=True) or
+        plots.bars_spec (analyze=False); None if no skill passes min_count.
+        assign_new=False: skills new to the category model go to "Other" instead of being embedded.
+        """
         # filter tiny noise
-        counts = Counter(skills_series)
-        counts = {s: c for s, c in counts.items() if c >= min_count}
+        counts = {s: int(c) for s, c in skill_counts.items() if c >= min_count}
         if not counts:
             print("❌ No skills pass the min_count filter.")
-            return ""
+            return None
 
         if analyze:
-            # -------- semantic clustering path --------
-            unique_skills = list(counts.keys())
-            model = SentenceTransformer("all-MiniLM-L6-v2")
-            emb = model.encode(unique_skills, show_progress_bar=False, normalize_embeddings=True)
-
-            clustering = AgglomerativeClustering(
-                linkage="average",
-                metric="cosine",
-                distance_threshold=0.35,  # ~0.65 cosine similarity
-                n_clusters=None
-            )
-            labels = clustering.fit_predict(np.array(emb))
-
-            # build clusters
-            cluster_map = {}
-            for label, skill in zip(labels, unique_skills):
-                cluster_map.setdefault(label, []).append((skill, counts[skill]))
-
-            # turn clusters into category entries
-            categories = []
-            for _, skill_list in cluster_map.items():
-                skill_list.sort(key=lambda x: x[1], reverse=True)
-                total = sum(c for _, c in skill_list)
-                main = skill_list[0][0].title()
-                ex = [s.title() for s, _ in skill_list[:4]]
-                categories.append({
-                    "category": main,
-                    "total_jobs": total,
-                    "examples": ex,
-                    "num_skills": len(skill_list)
-                })
-
-            top = sorted(categories, key=lambda x: x["total_jobs"], reverse=True)[:top_k]
-            return self._plot_categories(top)
+            # -------- semantic category path --------
+            # stable, persisted categories: known skills are a lookup, only new ones are embedded
+            categories = get_category_model().categorize(pd.Series(counts), assign_new=assign_new)
+            return self.categories_spec(categories, top_k=top_k)
 
         else:
             # -------- simple frequency path (no embeddings) --------
             series = pd.Series(counts).sort_values(ascending=False).head(top_k)
-            if series.empty:
-                return ""
-            names = [s.title() for s in series.index.tolist()]
-            vals = series.values.tolist()
-            return self._plot_bars(names, vals)
-
-    def skill_trends(self):
-        """Unchanged: uses self.df set in analyze_top_skills()."""
-        if self.df is None:
-            print("❌ Run analyze_top_skills() first (to set self.df).")
-            return "", []
-        adapter = SkillsTrendAdapter(dataframe=self.df)
-        # self.df.to_csv('1000_rows.csv', index=False)
-        img_b64, ranked_skills = adapter.skill_trends()
-        return img_b64, ranked_skills
+            return plots.bars_spec(series.index.tolist(), series.values.tolist())
 
-    # ---------- helpers ----------
-    @staticmethod
-    def _explode_skills(s: pd.Series) -> pd.Series:
+    def analyze_categories(self, categories: list, top_k: int = 8) -> str:
         """
-        Accepts comma-separated strings or python lists and returns
-        a clean, exploded, lower-cased Series of skills.
+        Category plot from already categorized skills (CategoryModel.categorize /
+        categorize_many). Returns: base64 image of the bar chart ('' if nothing to plot)
         """
-        # if any rows are lists, explode directly
-        if s.apply(lambda x: isinstance(x, list)).any():
-            tmp = pd.DataFrame({"skills": s}).explode("skills")["skills"]
-        else:
-            tmp = s.dropna().astype(str).str.split(",").explode()
-
-        tmp = tmp.astype(str).str.strip().str.lower()
-        return tmp[tmp != ""]
+        return plots.render(self.categories_spec(categories, top_k=top_k), **self.plot_options)
 
     @staticmethod
-    def _plot_bars(names, counts) -> str:
-        """Simple barh plot for top skills (no examples)."""
-        fig, ax = plt.subplots(figsize=(12, 8))
-        fig.patch.set_facecolor("#f8f9fa")
-
-        palette = [
-            "#3498db", "#e74c3c", "#2ecc71", "#f39c12",
-            "#9b59b6", "#1abc9c", "#34495e", "#e67e22"
-        ]
-        bars = ax.barh(range(len(names)), counts, color=palette[:len(names)], alpha=0.85)
-
-        for bar, val in zip(bars, counts):
-            ax.text(bar.get_width() + 1, bar.get_y() + bar.get_height() / 2,
-                    f"{val:,}", va="center", fontsize=10, color="#2c3e50")
-
-        ax.set_yticks(range(len(names)))
-        ax.set_yticklabels(names, fontsize=10)
-        ax.invert_yaxis()
-        ax.set_xlabel("Mentions", fontsize=12)
-        ax.set_title("Top Skills (Frequency Only)", fontsize=14, pad=10)
-        ax.grid(axis="x", linestyle="--", alpha=0.3)
-        plt.tight_layout()
-
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", bbox_inches="tight", dpi=150)
-        buf.seek(0)
-        b64 = base64.b64encode(buf.read()).decode("utf-8")
-        #plt.show()
-        plt.close(fig)
-        return b64
+    def categories_spec(categories: list, top_k: int = 8) -> dict:
+        top = sorted(categories, key=lambda x: x["total_jobs"], reverse=True)[:top_k]
+        return plots.categories_spec(top)
 
-    @staticmethod
-    def _plot_categories(top_categories: list) -> str:
-        """Category barh plot with examples (semantic clustering path)."""
-        if not top_categories:
-            return ""
-
-        names = [c["category"] for c in top_categories]
-        counts = [c["total_jobs"] for c in top_categories]
-
-        fig, ax = plt.subplots(figsize=(12, 8))
-        fig.patch.set_facecolor("#f8f9fa")
-
-        palette = [
-            "#3498db", "#e74c3c", "#2ecc71", "#f39c12",
-            "#9b59b6", "#1abc9c", "#34495e", "#e67e22"
-        ]
-        bars = ax.barh(range(len(names)), counts, color=palette[:len(names)], alpha=0.85)
-
-        for bar, val in zip(bars, counts):
-            ax.text(bar.get_width() + 2, bar.get_y() + bar.get_height() / 2,
-                    f"{val:,} jobs", va="center", fontsize=10, color="#2c3e50")
-
-        # label with examples
-        y_labels = []
-        for c in top_categories:
-            ex = ", ".join(c["examples"][:3])
-            if len(c["examples"]) > 3:
-                ex += f" +{c['num_skills'] - 3} more"
-            y_labels.append(f"{c['category']}\n({ex})")
-
-        ax.set_yticks(range(len(names)))
-        ax.set_yticklabels(y_labels, fontsize=10)
-        ax.invert_yaxis()
-        ax.set_xlabel("Number of Job Opportunities", fontsize=12)
-        ax.set_title("Top Skill Categories (Semantic Clusters)", fontsize=14, pad=10)
-        ax.grid(axis="x", linestyle="--", alpha=0.3)
-        plt.tight_layout()
-
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", bbox_inches="tight", dpi=150)
-        buf.seek(0)
-        b64 = base64.b64encode(buf.read()).decode("utf-8")
-        #plt.show()
-        plt.close(fig)
-        return b64
+    def skill_trends(
+        self,
+        keyword: Optional[str] = None,
+        window_days: Optional[int] = DEFAULT_WINDOW_DAYS,
+        granularity: str = "day",
+        rolling: Optional[int] = None,
+        top_k: int = 5
+    ):
+        """
+        Uses self.frame set in analyze_top_skills(), or self.daily_counts from analyze_aggregates().
+        window_days: last N days up to today (None/0 = whole history).
+        granularity: "day", "week" or "month"; rolling: rolling mean over that many periods.
+        keyword enables the per-(keyword, window, granularity) result cache.
+        """
+        since = trend_since(window_days)
+        if self.daily_counts is not None:
+            adapter = SkillsTrendAdapter(daily_counts=self.daily_counts, since=since)
+        elif self.frame is not None:
+            adapter = SkillsTrendAdapter(frame=self.frame, since=since)
+        else:
+            print("❌ Run analyze_top_skills() first (to set self.frame).")
+            return "", []
+        img_b64, ranked_skills = adapter.skill_trends(
+            granularity=granularity, rolling=rolling, top_k=top_k, keyword=keyword, **self.plot_options
+        )
+        return img_b64, ranked_skills
 
 
 # quick example usage
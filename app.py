@@ -426,19 +426,31 @@ import matplotlib
 matplotlib.use("Agg")
 # ------------------------------------------------------
 
-from flask import Flask, render_template, request, render_template_string, jsonify, abort
+from flask import Flask, render_template, request, render_template_string, jsonify, abort, url_for, send_file, redirect, make_response
 from flask_apscheduler import APScheduler
 from supabase import create_client
 from dotenv import load_dotenv
 import pandas as pd
+import gzip
 import time
 import logging
 
+from cache_utils import TTLCache
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_API = os.getenv("SUPABASE_KEY")
 ADMIN_UPLOAD_TOKEN = os.getenv("ADMIN_UPLOAD_TOKEN", "change_me")
+CLIENT_CHARTS = os.getenv("CLIENT_CHARTS", "1") == "1"      # live search: draw charts in the browser from /api/*
+API_MAX_AGE = int(os.getenv("API_MAX_AGE", "300"))
+API_CACHE_TTL = float(os.getenv("API_CACHE_TTL", "900"))     # server-side /api/* payloads, per worker
+PLOT_MAX_AGE = 365 * 24 * 3600     # /plots/<name> and /blobs/<key> never change
+
+# /api/* payloads per worker, keyed by (keyword, endpoint, options..., stamp). The stamp is the
+# keyword's stored job count (api_stamp), which every worker reads alike, so a search that
+# stores new postings retires old entries everywhere; chart_urls puts it in the URL as ?v=
+_api_cache = TTLCache(maxsize=256, ttl=API_CACHE_TTL)
 
 # ✅ Create Flask App
 app = Flask(__name__)
@@ -447,24 +459,144 @@ logging.basicConfig(level=logging.INFO)
 # ✅ Create Supabase Client (this is lightweight)
 supabase = create_client(SUPABASE_URL, SUPABASE_API)
 
+# ✅ Optional: load embedding weights once in the gunicorn --preload master (PRELOAD_MODELS=1)
+from model_registry import preload_from_env
+preload_from_env()
+
 # --------------------------------------------------------------------
 # ✅ LAZY INITIALIZATION HELPERS (Fixes startup crash)
 # --------------------------------------------------------------------
 def get_services():
     from analyzation import AnalyzationPipeline
-    from database_insertion import Database
+    from database_insertion import get_database
 
     analyzation_pipeline = AnalyzationPipeline()
-    db = Database(
-        supabase_url=SUPABASE_URL,
-        supabase_key=SUPABASE_API,
-        table_skills="skills",
-        table_jobs="jobs",
-        table_job_skills="job_skills",
-    )
+    db = get_database(SUPABASE_URL, SUPABASE_API)   # one per worker process; LocalDatabase when LOCAL_DB_PATH is set
     return analyzation_pipeline, db
 
 
+def trend_options(form):
+    """(window_days, granularity, rolling) from optional form fields, falling back to defaults."""
+    from check import DEFAULT_WINDOW_DAYS, GRANULARITIES
+
+    def as_int(name, default):
+        try:
+            return max(0, int(form.get(name, default)))
+        except (TypeError, ValueError):
+            return default
+
+    granularity = form.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        granularity = 'day'
+    return as_int('window', DEFAULT_WINDOW_DAYS), granularity, as_int('rolling', 0) or None
+
+
+def related_skills(db, keyword, skills, per_skill=5):
+    """skill -> skills that often go with it in keyword's postings ({} if unavailable)."""
+    from skill_cooccurrence import keyword_cooccurrence, related_summary
+    try:
+        co = keyword_cooccurrence(db, keyword)
+    except Exception as e:
+        logging.warning(f"co-occurrence unavailable for {keyword!r}: {e}")
+        return {}
+    return related_summary(co, skills, per_skill=per_skill)
+
+
+def chart_urls(keyword, window_days, granularity, rolling, stamp):
+    """
+    /api/* data URLs drawn client-side by check.html, keyed by plot kind. v=stamp changes
+    with the stored data, so browsers never reuse a payload cached before it changed.
+    """
+    trend_args = {"window": window_days, "granularity": granularity}
+    if rolling:
+        trend_args["rolling"] = rolling
+    return {
+        "categories": url_for('api_categories', q=keyword, v=stamp),
+        "trends": url_for('api_trends', q=keyword, v=stamp, **trend_args),
+        "wilson": url_for('api_wilson', q=keyword, v=stamp),
+    }
+
+
+def api_response(payload):
+    """JSON with a weak ETag, public cache headers, and gzip when the client accepts it."""
+    resp = jsonify(payload)
+    resp.headers["Cache-Control"] = f"public, max-age={API_MAX_AGE}"
+    resp.add_etag(weak=True)
+    resp.make_conditional(request)
+    resp.vary.add("Accept-Encoding")
+    if resp.status_code == 200 and "gzip" in request.headers.get("Accept-Encoding", "") and len(resp.get_data()) > 1024:
+        resp.set_data(gzip.compress(resp.get_data(), compresslevel=6))
+        resp.headers["Content-Encoding"] = "gzip"
+    return resp
+
+
+def plot_urls(specs, dpi=None):
+    """/plots/<name> per plots.py spec ('' if empty); cache misses are drawn concurrently."""
+    from render_pool import get_render_pool
+    return [url_for('plot_image', name=n) if n else "" for n in get_render_pool().render_cached(specs, dpi=dpi)]
+
+
+def plot_dpi(form):
+    """dpi for the browser's devicePixelRatio (form field 'dpr'): 75 per CSS pixel ratio, 60..200."""
+    try:
+        dpr = float(form.get('dpr', 2))
+    except (TypeError, ValueError):
+        dpr = 2.0
+    return int(min(200, max(60, round(75 * dpr))))
+
+
+@app.template_filter('img_src')
+def img_src(value):
+    """<img src> for a plot: /plots/ URLs as they are, blob keys via blob_url(), anything else is an inline base64 image."""
+    from blob_store import BlobStore
+    import plots
+    if value.startswith('/'):
+        return value
+    if BlobStore.is_key(value):
+        return blob_url(value)
+    return f"data:{plots.mime_type(value)};base64,{value}"
+
+
+def blob_url(key):
+    """Public blob store URL if there is one, otherwise /blobs/<key>."""
+    from blob_store import get_blob_store
+    return get_blob_store().url(key) or url_for('blob_image', key=key)
+
+
+def api_stamp(keyword):
+    """Data version of keyword shared by all workers: its stored job count."""
+    from database_insertion import get_database
+    return get_database(SUPABASE_URL, SUPABASE_API).job_count(keyword)
+
+
+def api_cached(key, build, stamp=None):
+    """
+    Cached /api/* payload for key (keyword, endpoint, options...) at the keyword's current
+    stamp (looked up if not given); a build() that aborts is not cached.
+    """
+    if stamp is None:
+        stamp = api_stamp(key[0])
+    return _api_cache.get_or_set((*key, stamp), build)
+
+
+def categories_payload(analyzation_pipeline, keyword, skill_counts, n_jobs, assign_new=True):
+    spec = analyzation_pipeline.skill_counts_spec(skill_counts, assign_new=assign_new) or analyzation_pipeline.categories_spec([])
+    return {"keyword": keyword, "n_jobs": n_jobs, **spec}
+
+
+def ml_jobs(db, keyword):
+    """Jobs of keyword listing any ML term, for WilsonNecessityWidget.from_counts."""
+    from skill_analyzation import ML_TERMS
+    return db.any_skill_jobs([keyword], ML_TERMS)[keyword]
+
+
+def api_keyword():
+    keyword = (request.args.get('q') or '').strip()
+    if not keyword:
+        abort(400, description="Query parameter 'q' is required.")
+    return keyword
+
+
 # --------------------------------------------------------------------
 # ✅ Scheduled job (will run in a separate worker later, NOT here)
 # --------------------------------------------------------------------
@@ -509,28 +641,26 @@ def manual_upload():
 
 @app.route('/', methods=['GET', 'POST'])
 def func():
-    analyzation_pipeline, db = get_services()
-
     if request.method == 'POST':
         if request.form.get('r'):
+            from database_insertion import cached_row
             selected_role = request.form.get('role')
-            response = supabase.table('cached').select("*").eq('name', selected_role).execute()
-            row = response.data[0]
-
-            payload = {
-                "frequent_skills_plot": row['plt1'],
-                "skill_trend_plot": row['plt2'],
-                "necessary_vs_better_plot": row['plt3'],
-            }
-            skill_list = [item.strip() for item in row['skill_list'].strip("[]").split(",")]
+            cached = cached_row(supabase, selected_role)
+            if cached is None:
+                return render_template('check.html', keyword=None, skills_list=[], error="No cached results for this role yet.")
+            payload, skill_list = cached
             return render_template('check.html', keyword=payload, skills_list=skill_list)
 
         keyword = (request.form.get('q') or '').strip()
         if not keyword:
             return render_template('check.html', keyword=None, skills_list=[], error="Enter keyword or select role.")
 
+        analyzation_pipeline, db = get_services()
+
         from pipeline2 import JobPipeline
         from skill_analyzation import WilsonNecessityWidget
+        from check import trend_since
+        from skill_cooccurrence import invalidate_cooccurrence
 
         pipeline = JobPipeline(keyword=keyword, supabase_url=SUPABASE_URL, supabase_api=SUPABASE_API)
         pipeline.fetch_data()
@@ -538,25 +668,41 @@ def func():
         df_skills = df_skills[df_skills.skills != "There are no technical tools, programming languages, or software relevant to jobs in the provided list."]
         skills_unique, jobs_table, job_skills_name_only = db.fill_tables(df_skills)
         db.insert_into_supabase(skills_unique, jobs_table, job_skills_name_only)
+        invalidate_cooccurrence(keyword)      # related_skills below reads the new postings
 
         time.sleep(5)
 
-        all_data = []
-        for offset in range(0, 4000, 1000):
-            batch = supabase.table("job_skill_view").select("*").eq("Keyword", keyword).order("JobId").range(offset, offset + 999).execute()
-            all_data.extend(batch.data)
-            if len(batch.data) < 1000:
-                break
-
-        df_skills = pd.DataFrame(all_data).rename(columns={
-            'JobId': 'job_id', 'Title': 'title', 'SkillName': 'skills', 'Keyword': 'keyword', 'JobPosted': 'created'
-        })
-
-        frequent_skills_plot = analyzation_pipeline.analyze_top_skills(df_skills)
-        skill_trend_plot, skill_list = analyzation_pipeline.skill_trends()
-        widget = WilsonNecessityWidget(df_skills, nec_wlb_pct=40.0)
+        # Aggregated server-side (sql/analytics_rpc.sql); no job x skill rows are transferred
+        window_days, granularity, rolling = trend_options(request.form)
+        skill_counts, n_jobs = db.skill_counts(keyword)
+        daily_counts = db.daily_skill_counts(keyword, since=trend_since(window_days))
+
+        related = related_skills(db, keyword, skill_counts.index[:5])
+
+        if CLIENT_CHARTS:
+            # only the roadmap skill list is computed here; check.html draws the charts from /api/*
+            from check import SkillsTrendAdapter
+            adapter = SkillsTrendAdapter(daily_counts=daily_counts, since=trend_since(window_days))
+            skill_list = adapter.trend_series(granularity, rolling).columns.to_list()
+            # new skills are embedded into the category model here, so /api/categories stays a lookup
+            _api_cache.set((keyword, "categories", n_jobs), categories_payload(analyzation_pipeline, keyword, skill_counts, n_jobs))
+            return render_template(
+                'check.html', keyword={}, skills_list=skill_list, related=related, query=keyword,
+                charts=chart_urls(keyword, window_days, granularity, rolling, stamp=n_jobs),
+            )
+
+        # server-rendered PNGs, linked as /plots/<digest>.png so browsers can cache them
+        from check import SkillsTrendAdapter
+        trend_spec = SkillsTrendAdapter(daily_counts=daily_counts, since=trend_since(window_days)).trend_spec(granularity, rolling)
+        skill_list = [s["name"] for s in trend_spec["series"]]
+        widget = WilsonNecessityWidget.from_counts(skill_counts, n_jobs, ml_jobs=ml_jobs(db, keyword), nec_wlb_pct=40.0)
         widget.run()
-        necessary_vs_better_plot = widget.plot_base64()
+
+        frequent_skills_plot, skill_trend_plot, necessary_vs_better_plot = plot_urls([
+            analyzation_pipeline.skill_counts_spec(skill_counts),
+            trend_spec if skill_list else None,
+            widget.spec(),
+        ], dpi=plot_dpi(request.form))
 
         payload = {
             "frequent_skills_plot": frequent_skills_plot,
@@ -564,15 +710,116 @@ def func():
             "necessary_vs_better_plot": necessary_vs_better_plot,
         }
 
-        return render_template('check.html', keyword=payload, skills_list=skill_list)
+        return render_template('check.html', keyword=payload, skills_list=skill_list, related=related, query=keyword)
 
     return render_template('check.html', keyword=None, skills_list=[])
 
 
+@app.route('/plots/<name>')
+def plot_image(name):
+    import plots
+    from plot_cache import get_plot_cache
+    cache = get_plot_cache()
+    if not cache.touch(name):
+        abort(404)
+    mimetype = dict(plots.FORMATS.values()).get(name.rsplit('.', 1)[-1], 'application/octet-stream')
+    resp = send_file(cache.path(name), mimetype=mimetype, etag=name, max_age=PLOT_MAX_AGE, conditional=True)
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
+
+@app.route('/blobs/<key>')
+def blob_image(key):
+    from blob_store import BlobStore, LocalBlobStore, get_blob_store
+    store = get_blob_store()
+    if not BlobStore.is_key(key):
+        abort(404)
+    if store.url(key):
+        return redirect(store.url(key))
+    if isinstance(store, LocalBlobStore):
+        path = store.path(key)
+        if not os.path.exists(path):
+            abort(404)
+        resp = send_file(path, mimetype=store.content_type(key), etag=key, max_age=PLOT_MAX_AGE, conditional=True)
+    else:
+        data = store.get(key)
+        if data is None:
+            abort(404)
+        resp = make_response(data)
+        resp.mimetype = store.content_type(key)
+        resp.set_etag(key)
+        resp.cache_control.max_age = PLOT_MAX_AGE
+        resp.make_conditional(request)
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
+
+# JSON plot data (plots.py specs) for the charts in check.html; ?q=<keyword>
+@app.route('/api/categories')
+def api_categories():
+    keyword = api_keyword()
+
+    def build():
+        analyzation_pipeline, db = get_services()
+        skill_counts, n_jobs = db.skill_counts(keyword)
+        if n_jobs == 0:
+            abort(404, description=f"No jobs stored for {keyword!r}.")
+        # lookup only: skills the category model hasn't seen are shown as "Other", not embedded here
+        return categories_payload(analyzation_pipeline, keyword, skill_counts, n_jobs, assign_new=False)
+
+    return api_response(api_cached((keyword, "categories"), build))
+
+
+@app.route('/api/trends')
+def api_trends():
+    from check import SkillsTrendAdapter, trend_since
+    keyword = api_keyword()
+    window_days, granularity, rolling = trend_options(request.args)
+    since = trend_since(window_days)
+
+    def build():
+        _, db = get_services()
+        adapter = SkillsTrendAdapter(daily_counts=db.daily_skill_counts(keyword, since=since), since=since)
+        return {"keyword": keyword, "window_days": window_days, **adapter.trend_spec(granularity, rolling)}
+
+    return api_response(api_cached((keyword, "trends", since, granularity, rolling), build))
+
+
+@app.route('/api/wilson')
+def api_wilson():
+    from skill_analyzation import WilsonNecessityWidget
+    keyword = api_keyword()
+
+    def build():
+        _, db = get_services()
+        skill_counts, n_jobs = db.skill_counts(keyword)
+        if n_jobs == 0:
+            abort(404, description=f"No jobs stored for {keyword!r}.")
+        widget = WilsonNecessityWidget.from_counts(skill_counts, n_jobs, ml_jobs=ml_jobs(db, keyword), nec_wlb_pct=40.0)
+        widget.run()
+        return {"keyword": keyword, "n_jobs": n_jobs, **widget.spec()}
+
+    return api_response(api_cached((keyword, "wilson"), build))
+
+
 @app.route('/roadmap', methods=['POST'])
 def roadmap():
     from roadmap import GPTToolExtractor
-    extractor = GPTToolExtractor(str(request.form.get("duration")), request.form.getlist('skills'))
+    selected = request.form.getlist('skills')
+    keyword = (request.form.get('q') or '').strip()
+    companions = []
+    if keyword and selected:
+        # skills that postings for this keyword often list alongside the selection
+        from skill_cooccurrence import keyword_cooccurrence
+        _, db = get_services()
+        try:
+            co = keyword_cooccurrence(db, keyword)
+            companions = co.recommend(selected, k=8)["skill"].tolist()
+        except Exception as e:
+            logging.warning(f"co-occurrence unavailable for {keyword!r}: {e}")
+    extractor = GPTToolExtractor(str(request.form.get("duration")), selected, related=companions)
     return render_template_string(extractor.result)
 
 
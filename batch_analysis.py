@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+import plots
+from analyzation import AnalyzationPipeline
+from blob_store import get_blob_store
+from render_pool import get_render_pool
+from check import DEFAULT_WINDOW_DAYS, SkillsTrendAdapter, trend_since
+from skill_analyzation import ML_TERMS, STAT_COLUMNS, WilsonNecessityWidget
+from skill_categories import get_category_model
+
+
+class BatchAnalysis:
+    """
+    Nightly precompute for many keywords from one read of the daily cube
+    (sql/skill_daily_counts.sql) instead of one round of queries per keyword.
+
+    Skill totals, trend windows and Wilson statistics are computed for all keywords
+    with grouped (Keyword, ...) operations; skills new to the category model are
+    embedded and assigned once over the union of all keywords. The plots of all
+    keywords are drawn together in the render pool (render_pool.py) and written to
+    the blob store (blob_store.py); rows reference them by key.
+
+    Usage:
+        from batch_analysis import BatchAnalysis
+        rows = BatchAnalysis(db, ["data science", "Data Engineering"]).run()
+        rows["data science"]     # {"name", "plt1", "plt2", "plt3" (blob keys), "skill_list"} for the cached table
+    """
+
+    def __init__(
+        self,
+        db,
+        keywords: List[str],
+        window_days: Optional[int] = DEFAULT_WINDOW_DAYS,
+        granularity: str = "day",
+        top_k: int = 8,
+        min_count: int = 2,
+        nec_wlb_pct: float = 40.0,
+        collapse_ml: bool = True,
+        ml_name: str = "ml (domain)",
+        fmt: Optional[str] = None,
+        dpi: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        """fmt/dpi/max_bytes: output of the stored plots, as in plots.render (None = PLOT_* defaults)."""
+        self.db = db
+        self.keywords = list(dict.fromkeys(keywords))
+        self.window_days = window_days
+        self.granularity = granularity
+        self.top_k = top_k
+        self.min_count = min_count
+        self.nec_wlb_pct = nec_wlb_pct
+        self.collapse_ml = collapse_ml
+        self.ml_name = ml_name
+        self.plot_options = {"fmt": fmt, "dpi": dpi, "max_bytes": max_bytes}
+
+        self.daily = None          # DataFrame(Keyword, JobPosted, SkillName, count), whole history; undated rows NaT
+        self.skill_counts = None   # Series indexed by (Keyword, SkillName)
+        self.n_jobs = None         # Series indexed by Keyword
+        self.ml_jobs = None        # Series indexed by Keyword: jobs listing any ML term
+
+    # ---------- public API ----------
+    def load(self) -> "BatchAnalysis":
+        """Reads every keyword's cube rows and job totals in one pass each."""
+        self.daily = self.db.daily_skill_counts_many(self.keywords)
+        jobs = self.db.daily_job_counts_many(self.keywords)
+        self.n_jobs = jobs.groupby("Keyword")["Jobs"].sum().reindex(self.keywords, fill_value=0).astype(int)
+        self.skill_counts = self.daily.groupby(["Keyword", "SkillName"], sort=False)["count"].sum().astype(int)
+        if self.collapse_ml:
+            self.ml_jobs = self.db.any_skill_jobs(self.keywords, ML_TERMS)
+        print(f"📥 Loaded {len(self.daily)} cube rows for {len(self.keywords)} keywords")
+        return self
+
+    def categories(self) -> Dict[str, List[dict]]:
+        """keyword -> categories (CategoryModel.categorize format), skills below min_count dropped."""
+        counts = self.skill_counts[self.skill_counts >= self.min_count]
+        if counts.empty:
+            return {}
+        return get_category_model().categorize_many(counts)
+
+    def wilson_stats(self) -> pd.DataFrame:
+        """
+        Keyword + STAT_COLUMNS for every (keyword, skill) in one vectorized pass, with the
+        ML terms merged into ml_name per keyword: the jobs listing any of them, counted in
+        the database (as WilsonNecessityWidget.from_counts with ml_jobs and from_matrix do).
+        """
+        counts = self.skill_counts.reset_index()
+        counts.columns = ["Keyword", "name", "counts"]
+        counts = counts.loc[counts["Keyword"].map(self.n_jobs) > 0]
+
+        if self.collapse_ml:
+            ml = counts["name"].str.lower().isin(ML_TERMS)
+            ml_rows = self.ml_jobs.loc[counts.loc[ml, "Keyword"].unique()].rename("counts").rename_axis("Keyword").reset_index()
+            ml_rows["name"] = self.ml_name
+            counts = pd.concat([counts.loc[~ml], ml_rows.loc[ml_rows["counts"] > 0]], ignore_index=True)
+
+        n = counts["Keyword"].map(self.n_jobs).to_numpy(dtype=np.float64)
+        k = counts["counts"].to_numpy(dtype=np.int64)
+        share = k / n
+        wilson = WilsonNecessityWidget.wilson_lower_vectorized(k, n)
+        stats = counts.assign(share=share, percentage=share * 100, wilson_lower=wilson, wilson_lower_pct=wilson * 100)
+        return stats.sort_values(["Keyword", "counts"], ascending=[True, False], kind="stable")[["Keyword", *STAT_COLUMNS]]
+
+    def run(self) -> Dict[str, dict]:
+        """keyword -> cached-table row; keywords without stored jobs are left out."""
+        if self.daily is None:
+            self.load()
+
+        categories = self.categories()
+        stats = dict(tuple(self.wilson_stats().groupby("Keyword", sort=False)))
+        since = trend_since(self.window_days)
+        dated = self.daily.loc[self.daily["JobPosted"].notna()]      # undated jobs count in totals only
+        window = dated if since is None else dated.loc[dated["JobPosted"] >= since]
+        daily = dict(tuple(window.groupby("Keyword", sort=False)))
+
+        specs, skill_lists = {}, {}
+        for kw in self.keywords:
+            if self.n_jobs[kw] == 0:
+                print(f"❌ No stored jobs for '{kw}', skipping.")
+                continue
+            if kw not in stats:
+                print(f"❌ No stored skills for '{kw}', skipping.")
+                continue
+            print(f"📊 Building analysis plots for '{kw}'...")
+            adapter = SkillsTrendAdapter(daily_counts=daily.get(kw, window.iloc[:0]), since=since)
+            trend = adapter.trend_spec(granularity=self.granularity)
+            skill_lists[kw] = [s["name"] for s in trend["series"]]
+
+            widget = WilsonNecessityWidget.from_stats(stats[kw], self.n_jobs[kw], nec_wlb_pct=self.nec_wlb_pct)
+            widget.run()
+            specs[kw] = [
+                AnalyzationPipeline.categories_spec(categories.get(kw, []), top_k=self.top_k),
+                trend,
+                widget.spec(),
+            ]
+
+        # every keyword's plots in one concurrent pass; unchanged images are already in the store
+        fmt, dpi, max_bytes = plots.plot_options(**self.plot_options)
+        images = get_render_pool().render_bytes([spec for kw_specs in specs.values() for spec in kw_specs], fmt, dpi, max_bytes)
+        keys = store_images(images, fmt)
+        rows = {}
+        for i, kw in enumerate(specs):
+            plt1, plt2, plt3 = keys[3 * i:3 * i + 3]
+            rows[kw] = {"name": kw, "plt1": plt1, "plt2": plt2, "plt3": plt3, "skill_list": skill_lists[kw]}
+        return rows
+
+
+def store_images(images: List[bytes], fmt: Optional[str] = None) -> List[str]:
+    """Blob key per image ('' for an empty one) in the configured blob store."""
+    store = get_blob_store()
+    ext = plots.FORMATS[plots.plot_options(fmt)[0]][0]
+    return [store.put(data, ext) if data else "" for data in images]
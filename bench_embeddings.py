@@ -0,0 +1,137 @@
+"""
+Compares the torch (sentence-transformers) and int8 ONNX embedding backends:
+load time, throughput, peak RSS and deviation of the ONNX vectors from torch.
+
+Each backend runs in its own subprocess so RSS numbers don't include the other one.
+Exits with status 1 when the ONNX vectors deviate from torch by more than --tolerance
+(max absolute difference per component), or when the onnx run actually fell back to torch.
+
+Usage:
+    python onnx_embedder.py all-MiniLM-L6-v2                 # export once
+    python bench_embeddings.py [--skills skills.txt] [--repeat 3]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+import numpy as np
+
+from model_registry import DEFAULT_MODEL
+
+
+def load_texts(path=None, n=2000):
+    """One skill per line from path, else seed skills expanded with common job-post phrasings."""
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+
+    from skill_canonical import SkillCanonicalizer
+
+    base = sorted(set(SkillCanonicalizer.SEED_ALIASES) | set(SkillCanonicalizer.SEED_ALIASES.values()))
+    templates = ["{}", "{} experience", "senior {} engineer", "knowledge of {} and sql", "{} (3+ years)"]
+    texts = [t.format(s) for t in templates for s in base]
+    return (texts * (n // len(texts) + 1))[:n]
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_worker(backend, model_name, texts_path, out_path, repeat, batch_size):
+    """Runs inside the subprocess: loads one backend, encodes, reports stats as JSON."""
+    from model_registry import ModelRegistry
+
+    with open(texts_path, encoding="utf-8") as f:
+        texts = json.load(f)
+    rss_before = peak_rss_mb()
+
+    start = time.perf_counter()
+    registry = ModelRegistry(backend=backend)
+    model = registry.get(model_name)
+    load_s = time.perf_counter() - start
+
+    model.encode(texts[:batch_size], batch_size=batch_size, normalize_embeddings=True)   # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        emb = model.encode(texts, batch_size=batch_size, show_progress_bar=False, normalize_embeddings=True)
+        timings.append(time.perf_counter() - start)
+
+    np.save(out_path, np.asarray(emb, dtype=np.float32))
+    print(json.dumps({
+        "backend": type(model).__name__,
+        "load_s": load_s,
+        "encode_s": min(timings),
+        "texts_per_s": len(texts) / min(timings),
+        "rss_mb": peak_rss_mb(),
+        "rss_base_mb": rss_before,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark torch vs ONNX embedding backends")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--skills", help="text file with one skill per line")
+    parser.add_argument("-n", type=int, default=2000, help="number of synthetic texts without --skills")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--backends", default="torch,onnx")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="max |diff| allowed between onnx and torch")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--texts", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.model, args.texts, args.out, args.repeat, args.batch_size)
+        return
+
+    texts = load_texts(args.skills, args.n)
+    results, vectors = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        texts_path = os.path.join(tmp, "texts.json")
+        with open(texts_path, "w", encoding="utf-8") as f:
+            json.dump(texts, f)
+
+        for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+            out_path = os.path.join(tmp, f"{backend}.npy")
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", backend, "--model", args.model,
+                 "--texts", texts_path, "--out", out_path,
+                 "--repeat", str(args.repeat), "--batch-size", str(args.batch_size)],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"[warn] {backend} benchmark failed:\n{proc.stderr.strip()}")
+                continue
+            results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+            vectors[backend] = np.load(out_path)
+
+    print(f"\n{len(texts)} texts, model {args.model}, batch {args.batch_size}, best of {args.repeat}\n")
+    print(f"{'backend':<10}{'impl':<22}{'load s':>8}{'encode s':>10}{'texts/s':>10}{'peak RSS MB':>13}")
+    for backend, r in results.items():
+        print(f"{backend:<10}{r['backend']:<22}{r['load_s']:>8.2f}{r['encode_s']:>10.2f}"
+              f"{r['texts_per_s']:>10.0f}{r['rss_mb']:>13.0f}")
+
+    if "torch" in vectors and "onnx" in vectors:
+        a, b = vectors["torch"], vectors["onnx"]
+        cos = (a * b).sum(axis=1)
+        max_diff = float(np.abs(a - b).max())
+        print(f"\nonnx vs torch: max |diff| {max_diff:.4f}, "
+              f"cosine min {cos.min():.4f} / mean {cos.mean():.4f}")
+        if max_diff > args.tolerance:
+            print(f"❌ max |diff| {max_diff:.4f} exceeds tolerance {args.tolerance}")
+            sys.exit(1)
+
+    if "onnx" in results and results["onnx"]["backend"] != "OnnxEmbedder":
+        print(f"❌ onnx run used {results['onnx']['backend']} (fallback to torch); no export or onnxruntime?")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
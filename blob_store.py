@@ -0,0 +1,163 @@
+import os
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from plot_cache import NAME_RE
+
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "webp": "image/webp",
+    "svg": "image/svg+xml",
+}
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class BlobStore(ABC):
+    """
+    Content-addressed store for plot images: a blob's key is '<sha256 of its bytes>.<ext>',
+    so writing the same image twice stores it once and a key never changes meaning.
+    The `cached` table keeps only these keys; the bytes live here.
+
+    Usage:
+        from blob_store import get_blob_store
+        store = get_blob_store()                 # LocalBlobStore, or S3BlobStore with BLOB_STORE=s3
+        key = store.put(png_bytes, "png")        # '3f5a….png'; a no-op if already stored
+        store.get(key)
+
+    Subclasses implement put() and get(). LocalBlobStore needs a directory that outlives
+    deploys (a persistent disk, see render.yaml); otherwise use S3BlobStore.
+    """
+
+    @staticmethod
+    def key_for(data: bytes, ext: str) -> str:
+        return f"{hashlib.sha256(data).hexdigest()}.{ext}"
+
+    @staticmethod
+    def is_key(value) -> bool:
+        return isinstance(value, str) and NAME_RE.fullmatch(value) is not None
+
+    @staticmethod
+    def content_type(key: str) -> str:
+        return CONTENT_TYPES.get(key.rsplit(".", 1)[-1], "application/octet-stream")
+
+    @abstractmethod
+    def put(self, data: bytes, ext: str) -> str:
+        """Stores data (unless already stored) and returns its key."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Bytes stored under key, or None."""
+
+    def url(self, key: str) -> Optional[str]:
+        """Public URL to redirect to, or None if the app serves the blob itself (/blobs/<key>)."""
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Blobs as files <directory>/<first two hex chars>/<key>, written atomically.
+    Also the stand-in for S3 in development and tests.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        """directory defaults to $BLOB_STORE_DIR, then data/blobs."""
+        self.directory = directory or os.getenv("BLOB_STORE_DIR", os.path.join("data", "blobs"))
+
+    def path(self, key: str) -> str:
+        if not self.is_key(key):
+            raise ValueError(f"not a blob key: {key!r}")
+        return os.path.join(self.directory, key[:2], key)
+
+    def put(self, data: bytes, ext: str) -> str:
+        key = self.key_for(data, ext)
+        path = self.path(key)
+        if os.path.exists(path):
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return key
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+
+class S3BlobStore(BlobStore):
+    """
+    Blobs as objects <prefix><key> in an S3-compatible bucket (AWS S3, R2, MinIO, ...).
+    Needs boto3. Objects are written with their content type and immutable cache
+    headers; with public_url set, pages link to the bucket instead of /blobs/<key>.
+    """
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        prefix: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        public_url: Optional[str] = None,
+        client=None,
+    ) -> None:
+        """Defaults: $BLOB_S3_BUCKET, $BLOB_S3_PREFIX (plots/), $BLOB_S3_ENDPOINT, $BLOB_PUBLIC_URL."""
+        self.bucket = bucket or os.getenv("BLOB_S3_BUCKET")
+        if not self.bucket:
+            raise ValueError("S3BlobStore needs a bucket (BLOB_S3_BUCKET).")
+        self.prefix = os.getenv("BLOB_S3_PREFIX", "plots/") if prefix is None else prefix
+        self.public_url = (public_url or os.getenv("BLOB_PUBLIC_URL") or "").rstrip("/") or None
+        if client is None:
+            import boto3
+            client = boto3.client("s3", endpoint_url=endpoint_url or os.getenv("BLOB_S3_ENDPOINT") or None)
+        self.client = client
+
+    def put(self, data: bytes, ext: str) -> str:
+        key = self.key_for(data, ext)
+        if self._exists(key):
+            return key
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            Body=data,
+            ContentType=self.content_type(key),
+            CacheControl=IMMUTABLE,
+        )
+        return key
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not self.is_key(key):
+            return None
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def url(self, key: str) -> Optional[str]:
+        return f"{self.public_url}/{self.prefix}{key}" if self.public_url else None
+
+    def _exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+
+_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide store: S3BlobStore when BLOB_STORE=s3, otherwise LocalBlobStore."""
+    global _store
+    if _store is None:
+        _store = S3BlobStore() if os.getenv("BLOB_STORE", "local").lower() == "s3" else LocalBlobStore()
+    return _store
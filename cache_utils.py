@@ -0,0 +1,78 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache: least-recently-used eviction beyond
+    `maxsize` entries, and entries expire `ttl` seconds after they were stored.
+    Each process (gunicorn worker) has its own copy; nothing is shared.
+
+    Usage:
+        from cache_utils import TTLCache
+        cache = TTLCache(maxsize=128, ttl=600)
+        value = cache.get_or_set(("data science", 90, "week"), lambda: expensive())
+        cache.invalidate(lambda key: key[0] == "data science")
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = 600.0) -> None:
+        """ttl=None keeps entries until evicted or invalidated."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                expires, value = item
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value or stores compute(). compute runs outside the lock,
+        so two threads missing the same key at once may both compute it.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, match: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drops entries whose key satisfies match (all entries if None); returns how many."""
+        with self._lock:
+            if match is None:
+                n = len(self._data)
+                self._data.clear()
+                return n
+            stale = [k for k in self._data if match(k)]
+            for k in stale:
+                del self._data[k]
+            return len(stale)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -1,168 +1,142 @@
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
-import io
-import base64
+import os
 import pandas as pd
-import matplotlib.dates as mdates
-import numpy as np
-
+from typing import Optional
 
+import plots
+from analysis_frame import AnalysisFrame
+from cache_utils import TTLCache
 
 
-class SkillsTrendAdapter:
-    def __init__(self, csv_path: str = None, dataframe: pd.DataFrame = None):
-        """Initialize adapter, clean data, and normalize fields."""
-        if dataframe is not None:
-            df = dataframe.copy()
-        # elif csv_path:
-        #     df = pd.read_csv(csv_path)
-        # else:
-        #     df = pd.read_csv('1000_rows.csv')
-
-        required = {"created", "skills"}
-        missing = required - set(df.columns)
-        if missing:
-            raise ValueError(
-                f"DataFrame must contain columns: {sorted(required)}. Missing: {sorted(missing)}"
-            )
-
-        df["created"] = self._parse_mixed_dates(df["created"]).dt.floor("D")
-
-        df["skills"] = df["skills"].apply(self._to_list)
-        df = df.explode("skills", ignore_index=True)
-
-        df["skills"] = (
-            df["skills"]
-            .astype(str)
-            .str.strip()
-            .str.lower()
-        )
-
-        df = df[df["skills"].notna() & (df["skills"] != "")]
-        df = df[df["created"].notna()]
-
-        df = df.rename(columns={"created": "JobPosted", "skills": "SkillName"})
-        self.df = df
-
-    @staticmethod
-    def _to_list(x):
-        """Ensure values are lists for explosion."""
-        if pd.isna(x):
-            return []
-        if isinstance(x, list):
-            return x
-        if isinstance(x, str):
-            parts = [p.strip() for p in x.replace(";", ",").split(",") if p.strip()]
-            return parts
-        return [x]
-
-    @staticmethod
-    def _parse_mixed_dates(s: pd.Series) -> pd.Series:
-        """Parse multiple date formats robustly."""
-        s = (
-            s.astype(str)
-            .str.strip()
-            .replace({"": pd.NA, "nan": pd.NA, "NaT": pd.NA})
-        )
-        out = pd.Series(pd.NaT, index=s.index, dtype="datetime64[ns]")
-
-        iso = s.str.match(r"^\d{4}-\d{2}-\d{2}T").fillna(False)
-        rfc = s.str.match(r"^[A-Za-z]{3},\s+\d{1,2}\s+[A-Za-z]{3}\s+\d{4}").fillna(False)
-        ymd = s.str.match(r"^\d{4}-\d{2}-\d{2}$").fillna(False)
-        slash = s.str.match(
-            r"^\d{1,2}/\d{1,2}/\d{4}(?:\s+\d{1,2}:\d{2})?$"
-        ).fillna(False)
-
-        def to_naive_utc(x):
-            dt = pd.to_datetime(x, errors="coerce", utc=True)
-            return dt.dt.tz_localize(None)
-
-        out.loc[iso] = to_naive_utc(s.loc[iso])
-        out.loc[rfc] = to_naive_utc(s.loc[rfc])
-        out.loc[ymd] = to_naive_utc(s.loc[ymd])
-        out.loc[slash] = pd.to_datetime(
-            s.loc[slash], errors="coerce", dayfirst=True
-        )
+GRANULARITIES = {"day": "D", "week": "W", "month": "M"}
+DEFAULT_WINDOW_DAYS = int(os.getenv("TREND_WINDOW_DAYS", "90"))     # 0 = whole history
 
-        rem = out.isna()
-        out.loc[rem] = pd.to_datetime(s.loc[rem], errors="coerce", dayfirst=True)
-        rem = out.isna()
-        out.loc[rem] = pd.to_datetime(s.loc[rem], errors="coerce")
+# rendered trends, per worker; keys start with the keyword and end with a fingerprint of
+# the counts, so changed data never hits an old entry (no invalidation needed)
+_trend_cache = TTLCache(maxsize=128, ttl=float(os.getenv("TREND_CACHE_TTL", "900")))
 
-        return out
 
-    def skill_trends(self):
-        """Return top 5 most frequent skills per day and plot trend."""
-        df = self.df
+def trend_since(window_days: Optional[int] = DEFAULT_WINDOW_DAYS) -> Optional[pd.Timestamp]:
+    """First day (UTC, naive) of a window ending today; None for the whole history."""
+    if not window_days:
+        return None
+    today = pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+    return today - pd.Timedelta(days=window_days - 1)
 
-        top_fields_all_time = df.SkillName.value_counts()[:5].index.to_list()        
-        df = df.loc[df.SkillName.isin(top_fields_all_time )]
 
-        counts = (
-            df.groupby(["JobPosted", "SkillName"])
-            .size()
-            .reset_index(name="count")
-        )
-
-        print(counts.tail(30))
-
-        top5_per_day = (
-            counts.sort_values(["JobPosted", "count"], ascending=[True, False])
-            .groupby("JobPosted", group_keys=False)
-            .head(5)[["JobPosted", "SkillName", "count"]]
-            .reset_index(drop=True)
+class SkillsTrendAdapter:
+    def __init__(
+        self,
+        csv_path: str = None,
+        dataframe: pd.DataFrame = None,
+        daily_counts: pd.DataFrame = None,
+        since: Optional[pd.Timestamp] = None,
+        frame: AnalysisFrame = None,
+    ):
+        """
+        Initialize adapter, clean data, and normalize fields.
+        daily_counts: pre-aggregated (JobPosted, SkillName, count) rows, e.g. from
+        Database.daily_skill_counts(); used as-is instead of exploding a raw frame.
+        frame: an AnalysisFrame shared with the other analyzers; counted without copying.
+        since: drop rows posted before this day (see trend_since); applied before
+        grouping. Pass the same value to daily_skill_counts(since=...) to push it
+        down to the database.
+        """
+        self.since = since
+        if daily_counts is None:
+            if frame is None:
+                df = dataframe
+                # elif csv_path:
+                #     df = pd.read_csv(csv_path)
+                # else:
+                #     df = pd.read_csv('1000_rows.csv')
+
+                required = {"created", "skills"}
+                missing = required - set(df.columns)
+                if missing:
+                    raise ValueError(
+                        f"DataFrame must contain columns: {sorted(required)}. Missing: {sorted(missing)}"
+                    )
+                frame = AnalysisFrame.from_posts(df, "skills", "created")
+            daily_counts = frame.daily_counts(since)
+
+        counts = daily_counts[["JobPosted", "SkillName", "count"]]
+        self.counts = counts if since is None else counts.loc[counts["JobPosted"] >= since]
+
+    def skill_trends(
+        self,
+        granularity: str = "day",
+        rolling: Optional[int] = None,
+        top_k: int = 5,
+        keyword: Optional[str] = None,
+        fmt: Optional[str] = None,
+        dpi: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        """
+        Plots the top_k skills of the window per day/week/month (optionally as a
+        rolling mean over `rolling` periods). Returns (image_b64, ranked_skills);
+        fmt/dpi/max_bytes as in plots.render (None = PLOT_* defaults).
+        With keyword set, results are cached per (keyword, window, granularity, ...)
+        and reused while the underlying counts are unchanged.
+        """
+        options = plots.plot_options(fmt, dpi, max_bytes)
+        if keyword is None:
+            return self._render_trends(granularity, rolling, top_k, options)
+
+        key = (keyword, self.since, granularity, rolling, top_k, options, self._fingerprint())
+        return _trend_cache.get_or_set(key, lambda: self._render_trends(granularity, rolling, top_k, options))
+
+    def trend_series(self, granularity: str = "day", rolling: Optional[int] = None, top_k: int = 5) -> pd.DataFrame:
+        """
+        Wide table: one row per period start (gaps filled with 0), one column per
+        top_k skill ordered by total count in the window.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {sorted(GRANULARITIES)}, got {granularity!r}")
+        counts = self.counts
+        if counts.empty:
+            return pd.DataFrame()
+
+        top = (
+            counts.groupby("SkillName")["count"].sum()
+            .sort_values(ascending=False, kind="stable")[:top_k]
+            .index.to_list()
         )
-
-        fig, ax = plt.subplots(figsize=(12, 7))
-
-        top5_per_day["JobPosted"] = pd.to_datetime(top5_per_day["JobPosted"])
-        top5_per_day = top5_per_day.loc[top5_per_day.JobPosted > '2025-08-8'] 
-
-        for skill in top5_per_day["SkillName"].unique():
-            skill_data = (
-                top5_per_day[top5_per_day["SkillName"] == skill]
-                .sort_values("JobPosted")
-            )
-            ax.plot(
-                skill_data["JobPosted"],
-                skill_data["count"],
-                marker="o",
-                linewidth=2,
-                label=skill,
-                alpha=0.9
-            )
-
-        ax.set_title("Top 5 Skills per Day — Line Trends", fontsize=14, fontweight="bold")
-        ax.set_xlabel("Date", fontsize=12, fontweight="bold")
-        ax.set_ylabel("Count", fontsize=12, fontweight="bold")
-        ax.grid(True, linestyle="--", alpha=0.3)
-        ax.set_facecolor("#fafafa")
-
-        # X-axis date formatting
-        ax.xaxis.set_major_formatter(mdates.DateFormatter("%b %d"))
-        plt.xticks(rotation=45, ha="right")
-
-        # Legend
-        ax.legend(
-            title="Skill",
-            bbox_to_anchor=(1.02, 1),
-            loc="upper left",
-            frameon=True
+        counts = counts.loc[counts["SkillName"].isin(top)]
+
+        freq = GRANULARITIES[granularity]
+        period = counts["JobPosted"].dt.to_period(freq).dt.start_time
+        wide = (
+            counts.groupby([period, counts["SkillName"]])["count"].sum()
+            .unstack(fill_value=0)
+            .reindex(columns=top, fill_value=0)
         )
-
-        plt.tight_layout()
-        buf = io.BytesIO()
-        plt.savefig(buf, format="png", dpi=150, bbox_inches="tight")
-        # plt.show()
-        plt.close(fig)
-        
-        buf.seek(0)
-        png_b64 = base64.b64encode(buf.read()).decode("ascii")
-
-        return png_b64, top_fields_all_time 
-
+        full = pd.period_range(wide.index.min(), wide.index.max(), freq=freq).start_time
+        wide = wide.reindex(full, fill_value=0)
+        wide.index.name = "JobPosted"
+        if rolling and rolling > 1:
+            wide = wide.rolling(rolling, min_periods=1).mean()
+        return wide
+
+    # ---------- helpers ----------
+    def _fingerprint(self) -> tuple:
+        """Cheap summary of self.counts; changes whenever the windowed counts do."""
+        counts = self.counts
+        if counts.empty:
+            return (0,)
+        return len(counts), int(counts["count"].sum()), counts["JobPosted"].min(), counts["JobPosted"].max()
+
+    def trend_spec(self, granularity: str = "day", rolling: Optional[int] = None, top_k: int = 5) -> dict:
+        """trend_series() as a plots.trends_spec (what /api/trends returns)."""
+        return plots.trends_spec(self.trend_series(granularity, rolling, top_k), granularity, rolling)
+
+    def _render_trends(self, granularity: str, rolling: Optional[int], top_k: int, options: tuple):
+        spec = self.trend_spec(granularity, rolling, top_k)
+        if not spec["series"]:
+            print("❌ No dated skill counts in the trend window.")
+            return "", []
+        fmt, dpi, max_bytes = options
+        return plots.render(spec, dpi=dpi, fmt=fmt, max_bytes=max_bytes), [s["name"] for s in spec["series"]]
 
 
 # if __name__ == "__main__":
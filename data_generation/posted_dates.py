@@ -0,0 +1,60 @@
+import pandas as pd
+from email.utils import parsedate_to_datetime
+
+
+# Each fetcher's posting-date field and its usual format.
+SOURCE_DATE_FORMATS = {
+    "adzuna": "ISO8601",                        # created:       2025-08-10T12:34:56Z
+    "jobspresso": "%a, %d %b %Y %H:%M:%S %z",   # pubDate:       Mon, 11 Aug 2025 10:00:00 +0000
+    "linkedin": "ISO8601",                      # created_at:    2025-08-10T12:34:56.000Z
+    "indeed": "ISO8601",                        # datePublished: 2025-08-10T12:34:56.000Z
+}
+
+
+def _rfc822(value) -> pd.Timestamp:
+    """RFC-822 date with any zone spelling (GMT, EST, +0000, ...); NaT if unparseable."""
+    try:
+        return pd.Timestamp(parsedate_to_datetime(value))
+    except (TypeError, ValueError, IndexError):
+        return pd.NaT
+
+
+# Per-row parsers for the values a source's format misses (RSS feeds also write
+# 'Mon, 11 Aug 2025 10:00:00 GMT' or named zones, which %z rejects).
+SOURCE_DATE_FALLBACKS = {
+    "jobspresso": _rfc822,
+}
+
+
+def parse_posted(values, source: str) -> pd.Series:
+    """
+    Parses one source's posting dates with its explicit format in a single vectorized
+    pass; only values that miss it go through the source's fallback parser, if any.
+    Returns datetime64[ns, UTC]; missing/'N/A'/malformed values become NaT.
+    """
+    fmt = SOURCE_DATE_FORMATS[source]
+    s = pd.Series(values, dtype="object")
+    parsed = pd.to_datetime(s, format=fmt, errors="coerce", utc=True)
+
+    bad = parsed.isna() & s.notna() & (s != "N/A")
+    fallback = SOURCE_DATE_FALLBACKS.get(source)
+    if fallback is not None and bad.any():
+        parsed[bad] = pd.to_datetime(s[bad].map(fallback), errors="coerce", utc=True)
+        bad &= parsed.isna()
+    if bad.any():
+        print(f"[warn] {source}: {int(bad.sum())} posting date(s) not in format {fmt!r}, e.g. {s[bad].iloc[0]!r}")
+    return parsed
+
+
+def source_frame(jobs: list, source: str) -> pd.DataFrame:
+    """DataFrame of one fetcher's jobs with `created` parsed to UTC timestamps."""
+    df = pd.DataFrame(jobs)
+    if "created" in df.columns:
+        df["created"] = parse_posted(df["created"], source)
+    return df
+
+
+def to_utc_text(s: pd.Series) -> pd.Series:
+    """Timestamps -> 'YYYY-MM-DDTHH:MM:SSZ' text (naive values are taken as UTC); NaT -> None."""
+    s = pd.to_datetime(s, utc=True)
+    return s.dt.strftime("%Y-%m-%dT%H:%M:%SZ").astype(object).where(s.notna(), None)
@@ -1,10 +1,22 @@
 import os
-import ast
+import re
+import atexit
+import json
+import queue
+import threading
 import pandas as pd
-from typing import Iterable, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, FIRST_EXCEPTION, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional, TYPE_CHECKING
 from supabase import create_client, Client
 from postgrest.exceptions import APIError
 
+from cache_utils import TTLCache
+from skill_parsing import explode_skills
+from data_generation.posted_dates import to_utc_text
+
+if TYPE_CHECKING:
+    from skill_canonical import SkillCanonicalizer
+
 
 class Database:
     """
@@ -25,6 +37,13 @@ class Database:
         )
     """
 
+    VIEW_COLUMNS = "JobId,Title,JobPosted,Keyword,SkillName"
+    TABLE_DAILY_COUNTS = "skill_daily_counts"
+    TABLE_DAILY_JOBS = "keyword_daily_jobs"
+    # cube Day of jobs whose JobPosted is missing or unparseable: still counted in skill
+    # totals and Wilson n/k, never on a timeline (sorts before every real day in both backends)
+    UNDATED_DAY = "-infinity"
+
     SENTINEL = (
         "There are no technical tools, programming languages, or software "
         "relevant to jobs in the provided list."
@@ -38,15 +57,33 @@ class Database:
         table_skills: str = "skills",
         table_jobs: str = "jobs",
         table_job_skills: str = "job_skills",
+        view_job_skills: str = "job_skill_view",
         client: Optional[Client] = None,
+        canonicalizer: Optional["SkillCanonicalizer"] = None,
+        max_workers: int = 4,
+        batch_bytes: int = 256_000,
+        max_batch_rows: int = 5000,
     ) -> None:
         """
         If `client` is provided, it will be used directly (good for testing).
         Otherwise, a new Supabase Client will be created from URL/KEY.
+
+        If `canonicalizer` (skill_canonical.SkillCanonicalizer) is given, fill_tables
+        collapses synonym skills onto canonical names before anything is stored.
+
+        Writes are streamed in batches of roughly `batch_bytes` of JSON payload
+        (capped at `max_batch_rows` rows) over up to `max_workers` concurrent requests.
         """
-        self.table_skills = table_skills
-        self.table_jobs = table_jobs
-        self.table_job_skills = table_job_skills
+        self._init_common(
+            table_skills=table_skills,
+            table_jobs=table_jobs,
+            table_job_skills=table_job_skills,
+            view_job_skills=view_job_skills,
+            canonicalizer=canonicalizer,
+            max_workers=max_workers,
+            batch_bytes=batch_bytes,
+            max_batch_rows=max_batch_rows,
+        )
 
         if client is not None:
             self.sb: Client = client
@@ -62,6 +99,28 @@ class Database:
                 )
             self.sb = create_client(url, key)
 
+    def _init_common(
+        self,
+        *,
+        table_skills: str,
+        table_jobs: str,
+        table_job_skills: str,
+        view_job_skills: str,
+        canonicalizer: Optional["SkillCanonicalizer"],
+        max_workers: int = 4,
+        batch_bytes: int = 256_000,
+        max_batch_rows: int = 5000,
+    ) -> None:
+        """Settings shared by every backend; LocalDatabase / PostgresCopyDatabase call this with their own connection."""
+        self.table_skills = table_skills
+        self.table_jobs = table_jobs
+        self.table_job_skills = table_job_skills
+        self.view_job_skills = view_job_skills
+        self.canonicalizer = canonicalizer
+        self.max_workers = max(1, int(max_workers))
+        self.batch_bytes = int(batch_bytes)
+        self.max_batch_rows = int(max_batch_rows)
+
     # ----------------------------
     # Public API
     # ----------------------------
@@ -72,10 +131,10 @@ class Database:
          2) jobs_table (JobId, Title, JobLink, JobPosted, Keyword)
          3) job_skills_name_only (JobId, SkillName)
         """
-        df = df.loc[df["skills"].notna() & (df["skills"] != self.SENTINEL)].copy()
-        df["skills"] = df["skills"].apply(self._to_list)
-
-        exploded = df.explode("skills").dropna(subset=["skills"])
+        df = df.loc[df["skills"].notna() & (df["skills"] != self.SENTINEL)]
+        exploded = explode_skills(df, "skills")
+        if self.canonicalizer is not None:
+            exploded = self.canonicalizer.apply(exploded, "skills")
 
         # 1) Skills
         skills_unique = (
@@ -124,7 +183,6 @@ class Database:
                 table=self.table_skills,
                 df=skills_unique,
                 on_conflict="SkillName",
-                batch_size=500,
             )
         except APIError as e:
             if "42P10" in str(e):
@@ -150,7 +208,6 @@ class Database:
                 table=self.table_jobs,
                 df=jobs_table,
                 on_conflict="JobId",
-                batch_size=500,
             )
         except APIError as e:
             if "42P10" in str(e):
@@ -168,10 +225,12 @@ class Database:
         )
 
         try:
-            for batch in self._chunked(job_skills_full.to_dict(orient="records"), size=1000):
-                self.sb.table(self.table_job_skills).upsert(
+            self._write_batches(
+                lambda batch: self.sb.table(self.table_job_skills).upsert(
                     batch, on_conflict="JobId,SkillId"
-                ).execute()
+                ).execute(),
+                self._iter_batches(job_skills_full),
+            )
         except APIError as e:
             if "42P10" in str(e):
                 print("[warn] job_skills: no UNIQUE(JobId,SkillId); falling back to manual dedupe insert.")
@@ -189,37 +248,353 @@ class Database:
                     ~job_skills_full.apply(lambda r: (r["JobId"], r["SkillId"]) in existing_pairs, axis=1)
                 ]
                 if not fresh.empty:
-                    for batch in self._chunked(fresh.to_dict(orient="records"), size=1000):
-                        self.sb.table(self.table_job_skills).insert(batch).execute()
+                    self._write_batches(
+                        lambda batch: self.sb.table(self.table_job_skills).insert(batch).execute(),
+                        self._iter_batches(fresh),
+                    )
             else:
                 raise
 
         return skills_map_df, jobs_table_final, job_skills_full
 
+    def job_skill_view(self, keyword: str, page_size: int = 1000, workers: int = 1) -> pd.DataFrame:
+        """
+        Returns all job_skill_view rows (JobId, Title, JobPosted, Keyword, SkillName) for keyword.
+        JobPosted is datetime64[ns, UTC].
+        """
+        pages = list(self.iter_job_skill_view(keyword, page_size=page_size, workers=workers))
+        if not pages:
+            return pd.DataFrame(columns=self.VIEW_COLUMNS.split(","))
+        return pd.concat(pages, ignore_index=True)
+
+    def iter_job_skill_view(self, keyword: str, page_size: int = 1000, workers: int = 1) -> Iterator[pd.DataFrame]:
+        """
+        Yields job_skill_view pages for keyword with keyset pagination on
+        (JobPosted, JobId, SkillName): every page continues from the last row seen
+        instead of skipping OFFSET rows, so page cost stays flat as history grows.
+        SkillName is the final tie-breaker because the view has one row per (job, skill).
+        Rows with a NULL JobPosted are read afterwards, keyed on (JobId, SkillName).
+
+        workers > 1 splits the JobPosted range into contiguous partitions that are
+        scanned concurrently; pages then arrive in no particular order.
+        """
+        partitions = self._posted_partitions(keyword, workers) if workers > 1 else [(None, None)]
+        cursors = [self._keyset_pages(keyword, page_size, lo=lo, hi=hi) for lo, hi in partitions]
+        cursors.append(self._keyset_pages(keyword, page_size, null_posted=True))
+
+        if len(cursors) <= 2:
+            for cursor in cursors:
+                yield from cursor
+        else:
+            yield from self._parallel_pages(cursors)
+
+    def skill_counts(self, keyword: str, page_size: int = 1000) -> Tuple[pd.Series, int]:
+        """
+        Server-side aggregate (RPC keyword_skill_counts, see sql/analytics_rpc.sql).
+        Returns (skill -> distinct job count Series, total distinct jobs for keyword).
+        """
+        rows = self._rpc_rows("keyword_skill_counts", {"p_keyword": keyword}, page_size)
+        data = pd.DataFrame(rows, columns=["SkillName", "Jobs", "TotalJobs"])
+        n_jobs = int(data["TotalJobs"].iloc[0]) if not data.empty else 0
+        return data.set_index("SkillName")["Jobs"].astype(int), n_jobs
+
+    def daily_skill_counts(self, keyword: str, since: Optional[pd.Timestamp] = None, page_size: int = 1000) -> pd.DataFrame:
+        """
+        Server-side aggregate (RPC keyword_daily_skill_counts, see sql/analytics_rpc.sql).
+        since: only days on/after it (e.g. check.trend_since()), filtered in the database.
+        Returns DataFrame(JobPosted datetime64, SkillName, count).
+        """
+        params = {"p_keyword": keyword}
+        if since is not None:
+            params["p_since"] = pd.Timestamp(since).strftime("%Y-%m-%d")
+        rows = self._rpc_rows("keyword_daily_skill_counts", params, page_size)
+        data = pd.DataFrame(rows, columns=["JobPosted", "SkillName", "count"])
+        data["JobPosted"] = pd.to_datetime(data["JobPosted"], format="%Y-%m-%d")
+        return data
+
+    def skill_pairs(self, keyword: str, min_pair: int = 2, page_size: int = 1000) -> Tuple[pd.DataFrame, int]:
+        """
+        Server-side pair counts (RPC keyword_skill_pairs, see sql/analytics_rpc.sql) for
+        skill_cooccurrence. Returns (DataFrame(SkillA, SkillB, Jobs), jobs with any skill):
+        pairs with SkillA < SkillB seen in at least min_pair jobs, plus one SkillA == SkillB
+        row per skill holding its job count.
+        """
+        rows = self._rpc_rows("keyword_skill_pairs", {"p_keyword": keyword, "p_min_pair": min_pair}, page_size)
+        data = pd.DataFrame(rows, columns=["SkillA", "SkillB", "Jobs", "TotalJobs"])
+        n_jobs = int(data["TotalJobs"].iloc[0]) if not data.empty else 0
+        return data[["SkillA", "SkillB", "Jobs"]].astype({"Jobs": int}), n_jobs
+
+    def any_skill_jobs(self, keywords: List[str], skills: Iterable[str], page_size: int = 1000) -> pd.Series:
+        """
+        Server-side union (RPC keyword_any_skill_jobs, see sql/analytics_rpc.sql): per keyword,
+        the jobs listing any of skills (case-insensitive), each counted once.
+        Returns Series(Keyword -> jobs), 0 for keywords without any.
+        """
+        keywords = list(keywords)
+        params = {"p_keywords": keywords, "p_skills": sorted({str(s).lower() for s in skills})}
+        data = pd.DataFrame(self._rpc_rows("keyword_any_skill_jobs", params, page_size), columns=["Keyword", "Jobs"])
+        return self._per_keyword(data, keywords)
+
+    @staticmethod
+    def _per_keyword(data: pd.DataFrame, keywords: List[str]) -> pd.Series:
+        """DataFrame(Keyword, Jobs) -> Series(Keyword -> Jobs) over keywords, 0 where missing."""
+        return data.set_index("Keyword")["Jobs"].reindex(keywords, fill_value=0).astype(int)
+
+    def daily_skill_counts_many(
+        self, keywords: List[str], since: Optional[pd.Timestamp] = None, page_size: int = 1000
+    ) -> pd.DataFrame:
+        """
+        The daily cube (sql/skill_daily_counts.sql) for several keywords in one keyset-paged read.
+        Returns DataFrame(Keyword, JobPosted datetime64, SkillName, count).
+        """
+        data = self._cube_rows(self.TABLE_DAILY_COUNTS, ["Keyword", "Day", "SkillName", "Jobs"], keywords, since, page_size)
+        return data.rename(columns={"Day": "JobPosted", "Jobs": "count"})
+
+    def daily_job_counts_many(
+        self, keywords: List[str], since: Optional[pd.Timestamp] = None, page_size: int = 1000
+    ) -> pd.DataFrame:
+        """
+        Jobs posted per (keyword, day) from the cube, for several keywords at once.
+        Returns DataFrame(Keyword, JobPosted datetime64, Jobs).
+        """
+        data = self._cube_rows(self.TABLE_DAILY_JOBS, ["Keyword", "Day", "Jobs"], keywords, since, page_size)
+        return data.rename(columns={"Day": "JobPosted"})
+
+    def job_count(self, keyword: str) -> int:
+        """Jobs stored for keyword (undated included), summed from the cube's daily totals."""
+        return int(self.daily_job_counts_many([keyword])["Jobs"].sum())
+
+    def rebuild_skill_daily_counts(self) -> None:
+        """
+        Recomputes the daily skill-count cube behind the two aggregates above
+        (RPC rebuild_skill_daily_counts, see sql/skill_daily_counts.sql).
+        """
+        self.sb.rpc("rebuild_skill_daily_counts", {}).execute()
+
+    def close(self) -> None:
+        """Releases the backend's connection; the Supabase client holds none that needs closing."""
+
     # ----------------------------
     # Internals (helpers)
     # ----------------------------
+    def _keyset_pages(
+        self,
+        keyword: str,
+        page_size: int,
+        *,
+        lo: Optional[str] = None,
+        hi: Optional[str] = None,
+        null_posted: bool = False,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        One keyset cursor over job_skill_view, optionally limited to lo <= JobPosted < hi.
+        """
+        keys = ["JobId", "SkillName"] if null_posted else ["JobPosted", "JobId", "SkillName"]
+        last = None
+        while True:
+            q = self.sb.table(self.view_job_skills).select(self.VIEW_COLUMNS).eq("Keyword", keyword)
+            q = q.is_("JobPosted", "null") if null_posted else q.not_.is_("JobPosted", "null")
+            if lo is not None:
+                q = q.gte("JobPosted", lo)
+            if hi is not None:
+                q = q.lt("JobPosted", hi)
+            if last is not None:
+                q = q.or_(self._keyset_filter(keys, last))
+            for key in keys:
+                q = q.order(key)
+
+            rows = q.limit(page_size).execute().data or []
+            if rows:
+                page = pd.DataFrame(rows)
+                page["JobPosted"] = pd.to_datetime(page["JobPosted"], format="ISO8601", utc=True)
+                yield page
+            if len(rows) < page_size:
+                return
+            last = [rows[-1][k] for k in keys]
+
+    def _cube_rows(
+        self, table: str, columns: List[str], keywords: List[str], since: Optional[pd.Timestamp], page_size: int
+    ) -> pd.DataFrame:
+        """All rows of a cube table for keywords, keyset-paged on its primary key (Keyword, Day[, SkillName])."""
+        keys = [c for c in ["Keyword", "Day", "SkillName"] if c in columns]
+        pages, last = [], None
+        while True:
+            q = self.sb.table(table).select(",".join(columns)).in_("Keyword", list(keywords))
+            if since is not None:
+                q = q.gte("Day", pd.Timestamp(since).strftime("%Y-%m-%d"))
+            if last is not None:
+                q = q.or_(self._keyset_filter(keys, last))
+            for key in keys:
+                q = q.order(key)
+
+            rows = q.limit(page_size).execute().data or []
+            if rows:
+                pages.append(pd.DataFrame(rows, columns=columns))
+            if len(rows) < page_size:
+                break
+            last = [rows[-1][k] for k in keys]
+
+        data = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame(columns=columns)
+        data["Day"] = self.parse_days(data["Day"])
+        return data
+
+    def _rpc_rows(self, fn: str, params: dict, page_size: int) -> List[dict]:
+        """
+        All rows of a set-returning RPC. PostgREST caps every response at max_rows (1000 on
+        Supabase), RPCs included, so results are read page_size rows at a time with Range;
+        the functions order by a unique key, so pages neither overlap nor skip rows.
+        """
+        rows, start = [], 0
+        while True:
+            page = self.sb.rpc(fn, params).range(start, start + page_size - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            start += page_size
+
+    @classmethod
+    def parse_days(cls, days: pd.Series) -> pd.Series:
+        """Cube Day values ('YYYY-MM-DD') as datetime64; UNDATED_DAY becomes NaT."""
+        return pd.to_datetime(days.where(days != cls.UNDATED_DAY), format="%Y-%m-%d")
+
     @staticmethod
-    def _to_list(x):
-        if isinstance(x, list):
-            return x
-        if pd.isna(x):
-            return []
+    def _keyset_filter(keys: List[str], values: list) -> str:
+        """
+        PostgREST `or` filter for (k1, k2, ...) > (v1, v2, ...), e.g.
+        JobPosted.gt.v1,and(JobPosted.eq.v1,JobId.gt.v2),and(...)
+        """
+        def quote(v) -> str:
+            v = str(v).replace("\\", "\\\\").replace('"', '\\"')
+            return f'"{v}"'
+
+        clauses = []
+        for i, key in enumerate(keys):
+            parts = [f"{k}.eq.{quote(v)}" for k, v in zip(keys[:i], values[:i])]
+            parts.append(f"{key}.gt.{quote(values[i])}")
+            clauses.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+        return ",".join(clauses)
+
+    def _posted_partitions(self, keyword: str, workers: int) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Splits [min(JobPosted), max(JobPosted)] for keyword into `workers` contiguous ranges.
+        Falls back to a single unbounded range if the keyword has no dated rows.
+        """
+        def edge(desc: bool):
+            resp = (
+                self.sb.table(self.view_job_skills).select("JobPosted")
+                .eq("Keyword", keyword).not_.is_("JobPosted", "null")
+                .order("JobPosted", desc=desc).limit(1).execute()
+            )
+            return resp.data[0]["JobPosted"] if resp.data else None
+
         try:
-            val = ast.literal_eval(str(x))
-            if isinstance(val, list):
-                return val
-            return [val]
-        except (ValueError, SyntaxError):
-            if isinstance(x, str):
-                return [s.strip() for s in x.split(",") if s.strip()]
-            return []
+            first, last = pd.Timestamp(edge(desc=False)), pd.Timestamp(edge(desc=True))
+        except (TypeError, ValueError):
+            return [(None, None)]
+        if pd.isna(first) or pd.isna(last) or first >= last:
+            return [(None, None)]
+
+        bounds = [t.isoformat() for t in pd.date_range(first, last, periods=workers + 1)]
+        return [
+            (None if i == 0 else bounds[i], None if i == workers - 1 else bounds[i + 1])
+            for i in range(workers)
+        ]
 
     @staticmethod
-    def _chunked(records: Iterable, size: int = 500):
-        records = list(records)
-        for i in range(0, len(records), size):
-            yield records[i:i + size]
+    def _parallel_pages(cursors: List[Iterator[pd.DataFrame]]) -> Iterator[pd.DataFrame]:
+        """
+        Drains several page cursors on a thread pool and yields pages as they arrive.
+        The hand-off queue is bounded, so producers stay at most a few pages ahead.
+        """
+        pages: queue.Queue = queue.Queue(maxsize=2 * len(cursors))
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def drain(cursor):
+            try:
+                for page in cursor:
+                    if not put(page):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+
+        with ThreadPoolExecutor(max_workers=len(cursors)) as pool:
+            for cursor in cursors:
+                pool.submit(drain, cursor)
+            remaining = len(cursors)
+            try:
+                while remaining:
+                    item = pages.get()
+                    if item is done:
+                        remaining -= 1
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        yield item
+            finally:
+                stop.set()
+
+    def _iter_batches(self, df: pd.DataFrame) -> Iterator[List[dict]]:
+        """
+        Lazily yields lists of records from df, sized so each batch serializes to
+        roughly self.batch_bytes of JSON. Only one batch is materialized at a time;
+        the rows-per-batch estimate is refined from every batch that is produced.
+        """
+        n = len(df)
+        if n == 0:
+            return
+        rows = min(50, n, self.max_batch_rows)
+        seen_rows = 0
+        seen_bytes = 0
+        start = 0
+        while start < n:
+            batch = df.iloc[start:start + rows].to_dict(orient="records")
+            start += len(batch)
+            seen_rows += len(batch)
+            seen_bytes += len(json.dumps(batch, default=str))
+            yield batch
+            per_row = max(1.0, seen_bytes / seen_rows)
+            rows = int(min(self.max_batch_rows, max(1, self.batch_bytes // per_row)))
+
+    def _write_batches(self, send: Callable[[List[dict]], object], batches: Iterable[List[dict]]) -> None:
+        """
+        Sends batches through `send` on a bounded thread pool.
+        At most 2 * max_workers batches are in flight, so the producer never runs
+        far ahead of the network. The first failure cancels pending batches and is re-raised.
+        """
+        if self.max_workers == 1:
+            for batch in batches:
+                send(batch)
+            return
+
+        limit = 2 * self.max_workers
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = set()
+            try:
+                for batch in batches:
+                    pending.add(pool.submit(send, batch))
+                    if len(pending) >= limit:
+                        # free a slot as soon as any batch finishes (FIRST_EXCEPTION would wait for all of them)
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            fut.result()
+                done, pending = wait(pending, return_when=FIRST_EXCEPTION)
+                for fut in done:
+                    fut.result()
+            finally:
+                for fut in pending:
+                    fut.cancel()
 
     def _drop_missing_column_from_payload(self, df: pd.DataFrame, message: str) -> pd.DataFrame:
         """
@@ -227,29 +602,32 @@ class Database:
         "Could not find the 'Keyword' column of 'jobs' in the schema cache"
         Removes that column from the payload if present and returns a new DataFrame.
         """
-        parts = message.split("'")
-        missing = parts[1] if len(parts) >= 2 else None
+        match = re.search(r"Could not find the '([^']+)' column", message)
+        missing = match.group(1) if match else None
         if missing and missing in df.columns:
             print(f"[warn] Dropping missing column from payload: {missing}")
             return df.drop(columns=[missing])
         return df
 
-    def _safe_upsert(self, *, table: str, df: pd.DataFrame, on_conflict: str, batch_size: int = 500) -> pd.DataFrame:
+    def _safe_upsert(self, *, table: str, df: pd.DataFrame, on_conflict: str) -> pd.DataFrame:
         """
-        Upserts df into table with on_conflict.
-        If PGRST204 missing-column error occurs, drops the column and retries.
-        Converts datetime64 -> str to avoid PostgREST type issues.
+        Upserts df into table with on_conflict, streaming batches concurrently.
+        If PGRST204 missing-column error occurs, drops the column and retries
+        (upserts are idempotent, so re-sending already written batches is safe).
+        Sends datetime64 columns as UTC ISO-8601 text (NaT -> null) for timestamptz columns.
         Returns the final (possibly column-reduced) DataFrame that succeeded.
         """
         work = df.copy()
         for col in work.columns:
             if pd.api.types.is_datetime64_any_dtype(work[col]):
-                work[col] = work[col].astype(str)
+                work[col] = to_utc_text(work[col])
 
         while True:
             try:
-                for batch in self._chunked(work.to_dict(orient="records"), size=batch_size):
-                    self.sb.table(table).upsert(batch, on_conflict=on_conflict).execute()
+                self._write_batches(
+                    lambda batch: self.sb.table(table).upsert(batch, on_conflict=on_conflict).execute(),
+                    self._iter_batches(work),
+                )
                 return work
             except APIError as e:
                 msg = str(e)
@@ -274,8 +652,10 @@ class Database:
         to_insert = df[~df[key_col].isin(existing_set)]
         if to_insert.empty:
             return
-        for batch in self._chunked(to_insert.to_dict(orient="records"), size=500):
-            self.sb.table(table).insert(batch).execute()
+        self._write_batches(
+            lambda batch: self.sb.table(table).insert(batch).execute(),
+            self._iter_batches(to_insert),
+        )
 
     def _print_constraint_guidance(self):
         """
@@ -294,3 +674,116 @@ class Database:
             f"    ADD CONSTRAINT {self.table_job_skills}_jobid_skillid_key UNIQUE (\"JobId\",\"SkillId\");\n"
         )
 
+
+# ----------------------------
+# Backend selection and the `cached` table
+# ----------------------------
+CACHED_COLUMNS = "plt1, plt2, plt3, skill_list"
+
+# parsed `cached` rows per worker; the stamp file's mtime is part of the key, so a write
+# in any worker on this host (upload_to_supabase / update_single_keyword) drops them everywhere
+_cached_rows = TTLCache(maxsize=32, ttl=float(os.getenv("ROLE_CACHE_TTL", "3600")))
+CACHED_STAMP_PATH = os.getenv("CACHED_STAMP_PATH", os.path.join("data", "cached.stamp"))
+
+# one backend per process and configuration (see get_database); _databases_pid detects a fork
+_databases: Dict[tuple, Database] = {}
+_databases_lock = threading.Lock()
+_databases_pid = os.getpid()
+
+
+def get_database(supabase_url: Optional[str] = None, supabase_key: Optional[str] = None) -> Database:
+    """
+    Process-wide backend: LocalDatabase when LOCAL_DB_PATH is set, PostgresCopyDatabase
+    (direct COPY ingestion) when DATABASE_URL is set, otherwise the Supabase-backed Database.
+    Skills are canonicalized before storage (set SKILL_ALIAS_EMBEDDINGS=0 to use rules only).
+
+    The backend is built on first use and reused by every later call, so requests share
+    one connection (and LocalDatabase runs its DDL once). A forked child (gunicorn worker)
+    builds its own instead of sharing the parent's connection; close_databases() runs at exit.
+    """
+    global _databases_pid
+    config = (os.getenv("LOCAL_DB_PATH"), os.getenv("DATABASE_URL"), supabase_url, supabase_key)
+    with _databases_lock:
+        if _databases_pid != os.getpid():
+            _databases.clear()      # the parent's connections; never closed from the child
+            _databases_pid = os.getpid()
+        db = _databases.get(config)
+        if db is None:
+            db = _databases[config] = _open_database(supabase_url, supabase_key)
+        return db
+
+
+def close_databases() -> None:
+    """Closes the backends opened by get_database in this process."""
+    with _databases_lock:
+        if _databases_pid != os.getpid():
+            return
+        for db in _databases.values():
+            try:
+                db.close()
+            except Exception as e:
+                print(f"[warn] Could not close {type(db).__name__}: {e}")
+        _databases.clear()
+
+
+atexit.register(close_databases)
+
+
+def _open_database(supabase_url: Optional[str], supabase_key: Optional[str]) -> Database:
+    from skill_canonical import SkillCanonicalizer
+
+    canonicalizer = SkillCanonicalizer(use_embeddings=os.getenv("SKILL_ALIAS_EMBEDDINGS", "1") == "1")
+    if os.getenv("LOCAL_DB_PATH"):
+        from local_database import LocalDatabase
+        return LocalDatabase(os.getenv("LOCAL_DB_PATH"), canonicalizer=canonicalizer)
+    if os.getenv("DATABASE_URL"):
+        from postgres_ingest import PostgresCopyDatabase
+        return PostgresCopyDatabase(os.getenv("DATABASE_URL"), canonicalizer=canonicalizer)
+    return Database(
+        supabase_url=supabase_url,
+        supabase_key=supabase_key,
+        table_skills="skills",
+        table_jobs="jobs",
+        table_job_skills="job_skills",
+        canonicalizer=canonicalizer,
+    )
+
+
+def _cached_stamp() -> int:
+    try:
+        return os.stat(CACHED_STAMP_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def cached_row(supabase: Client, name: str) -> Optional[Tuple[dict, List[str]]]:
+    """
+    (payload for check.html, skill_list) of a role's `cached` row, or None if there is none.
+    Only the plot and skill columns are read; rows are kept per worker until they expire
+    or invalidate_cached_rows() runs.
+    """
+    key = (name, _cached_stamp())
+    hit = _cached_rows.get(key)
+    if hit is not None:
+        return hit
+
+    response = supabase.table("cached").select(CACHED_COLUMNS).eq("name", name).limit(1).execute()
+    if not response.data:
+        return None
+    row = response.data[0]
+    payload = {
+        "frequent_skills_plot": row["plt1"],
+        "skill_trend_plot": row["plt2"],
+        "necessary_vs_better_plot": row["plt3"],
+    }
+    skill_list = [item.strip() for item in str(row["skill_list"]).strip("[]").split(",")]
+    _cached_rows.set(key, (payload, skill_list))
+    return payload, skill_list
+
+
+def invalidate_cached_rows(name: Optional[str] = None) -> int:
+    """Drops parsed rows for name (all if None) here and, through the stamp file, in the other workers."""
+    os.makedirs(os.path.dirname(CACHED_STAMP_PATH) or ".", exist_ok=True)
+    with open(CACHED_STAMP_PATH, "a"):
+        os.utime(CACHED_STAMP_PATH)
+    return _cached_rows.invalidate(None if name is None else (lambda key: key[0] == name))
@@ -0,0 +1,181 @@
+import os
+import re
+import json
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:     # non-POSIX: appends are only serialized within the process
+    fcntl = None
+
+from model_registry import DEFAULT_MODEL, models
+
+
+class EmbeddingStore:
+    """
+    Persistent, memory-mapped cache of normalized skill embeddings for one model and
+    backend (torch and int8 ONNX vectors differ slightly, so they are never mixed).
+
+    Files in `directory` (per model and backend):
+        <model>.<backend>.<dtype>.bin   row-major vectors, append-only
+        <model>.<backend>.keys          one normalized key per line; line i <-> row i
+        <model>.<backend>.meta.json     {"dim": ..., "dtype": ..., "model": ..., "backend": ...}
+
+    The backend is the one the model registry actually serves the model with (torch after
+    an ONNX fallback). A store whose meta names another backend is rejected with a ValueError.
+
+    Only cache misses are encoded; they are appended under an exclusive file lock,
+    vectors first and keys second, so any key a reader sees already has its vector.
+    A writer that died mid-append leaves vectors (or a partial key line) past the last
+    complete key; the next writer truncates both files back to the keys before appending.
+    Readers memory-map the vector file, so all worker processes share the same pages.
+
+    Usage:
+        from embedding_store import get_store
+        emb = get_store().encode(["Python", "aws"])     # float32, L2-normalized
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        model_name: str = DEFAULT_MODEL,
+        dtype: str = "float16",
+        backend: Optional[str] = None,
+    ) -> None:
+        """directory defaults to $EMBEDDING_STORE_DIR, then data/embeddings; backend to the one the registry serves model_name with."""
+        self.directory = directory or os.getenv("EMBEDDING_STORE_DIR", os.path.join("data", "embeddings"))
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.backend = (backend or models.backend_of(model_name)).lower()
+
+        safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        base = os.path.join(self.directory, f"{safe}.{self.backend}")
+        self.vectors_path = f"{base}.{self.dtype.name}.bin"
+        self.keys_path = f"{base}.keys"
+        self.meta_path = f"{base}.meta.json"
+        self.lock_path = f"{base}.lock"
+
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._keys_size = 0
+        self._rows = 0
+        self._vectors = None
+        self.dim = None
+
+    # ---------- public API ----------
+    @staticmethod
+    def normalize_key(text: str) -> str:
+        return " ".join(str(text).lower().split())
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Returns float32 (len(texts), dim) L2-normalized embeddings; encodes cache misses only."""
+        keys = [self.normalize_key(t) for t in texts]
+        if not keys:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+
+        with self._lock:
+            self._refresh()
+            misses = sorted({k for k in keys if k not in self._index})
+            if misses:
+                self._append(misses)
+            rows = np.fromiter((self._index[k] for k in keys), dtype=np.int64, count=len(keys))
+            return np.asarray(self._vectors[rows], dtype=np.float32)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    # ---------- helpers ----------
+    def _refresh(self) -> None:
+        """Picks up rows appended by this or other processes since the last read."""
+        try:
+            size = os.path.getsize(self.keys_path)
+        except FileNotFoundError:
+            return
+        if size == self._keys_size and self._vectors is not None:
+            return
+
+        if self.dim is None:
+            with open(self.meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            self._check_backend(meta.get("backend"))
+            self.dim = int(meta["dim"])
+
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_size)
+            chunk = f.read(size - self._keys_size)
+        # a concurrent writer may be mid-line; only consume complete lines
+        complete = chunk[: chunk.rfind(b"\n") + 1]
+        for line in complete.decode("utf-8").splitlines():
+            self._index.setdefault(line, self._rows)
+            self._rows += 1
+        self._keys_size += len(complete)
+
+        if self._rows:
+            self._vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(self._rows, self.dim))
+
+    def _append(self, misses: List[str]) -> None:
+        self._check_backend(models.backend_of(self.model_name))
+        emb = models.get(self.model_name).encode(misses, show_progress_bar=False, normalize_embeddings=True)
+        emb = np.asarray(emb, dtype=np.float32)
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if self.dim is None and not os.path.exists(self.meta_path):
+                    with open(self.meta_path, "w", encoding="utf-8") as f:
+                        json.dump({
+                            "dim": int(emb.shape[1]), "dtype": self.dtype.name,
+                            "model": self.model_name, "backend": self.backend,
+                        }, f)
+                self.dim = self.dim or int(emb.shape[1])
+                self._refresh()     # another process may have added some of these meanwhile
+
+                fresh = [i for i, k in enumerate(misses) if k not in self._index]
+                if fresh:
+                    self._truncate_orphans()
+                    with open(self.vectors_path, "ab") as f:
+                        f.write(emb[fresh].astype(self.dtype).tobytes())
+                        f.flush()
+                        os.fsync(f.fileno())
+                    with open(self.keys_path, "ab") as f:
+                        f.write("".join(f"{misses[i]}\n" for i in fresh).encode("utf-8"))
+                self._refresh()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _check_backend(self, backend: Optional[str]) -> None:
+        if backend != self.backend:
+            raise ValueError(
+                f"Embedding store {self.vectors_path} holds {self.backend} vectors, "
+                f"but got {backend or 'unknown'} ones for model '{self.model_name}'."
+            )
+
+    def _truncate_orphans(self) -> None:
+        """Cuts off what a crashed writer left past the last complete key (call under the file lock)."""
+        for path, size in ((self.vectors_path, self._rows * self.dim * self.dtype.itemsize), (self.keys_path, self._keys_size)):
+            try:
+                if os.path.getsize(path) > size:
+                    print(f"[warn] Embedding store: dropping {os.path.getsize(path) - size} orphan bytes from {path}")
+                    os.truncate(path, size)
+            except FileNotFoundError:
+                pass
+
+
+_stores: Dict[str, EmbeddingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(model_name: str = DEFAULT_MODEL) -> EmbeddingStore:
+    """Process-wide EmbeddingStore for model_name (on the backend the registry serves it with)."""
+    with _stores_lock:
+        store = _stores.get(model_name)
+        if store is None:
+            store = _stores[model_name] = EmbeddingStore(model_name=model_name)
+        return store
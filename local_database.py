@@ -0,0 +1,419 @@
+import os
+import sqlite3
+import threading
+import pandas as pd
+from typing import Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+from database_insertion import Database
+from data_generation.posted_dates import to_utc_text
+
+if TYPE_CHECKING:
+    from skill_canonical import SkillCanonicalizer
+
+
+class LocalDatabase(Database):
+    """
+    Embedded SQLite backend with the same contract as Database.
+
+    Usage:
+        from local_database import LocalDatabase
+        db = LocalDatabase("jobscope.sqlite3")
+        skills_unique, jobs_table, job_skills_name_only = db.fill_tables(df)
+        skills_map_df, jobs_table_final, job_skills_full = db.insert_into_supabase(
+            skills_unique, jobs_table, job_skills_name_only
+        )
+        rows = db.job_skill_view("data science")
+        counts, n_jobs = db.skill_counts("data science")
+
+    The schema (skills, jobs, job_skills and the job_skill_view join) is created
+    on first use, so the whole pipeline and analytics can run without network.
+    """
+
+    JOB_COLUMNS = ["JobId", "Title", "JobLink", "JobPosted", "Keyword"]
+    CUBE_VERSION = 2        # PRAGMA user_version of the cube; 2 adds the undated cells
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        table_skills: str = "skills",
+        table_jobs: str = "jobs",
+        table_job_skills: str = "job_skills",
+        view_job_skills: str = "job_skill_view",
+        canonicalizer: Optional["SkillCanonicalizer"] = None,
+    ) -> None:
+        """
+        path defaults to $LOCAL_DB_PATH; use ":memory:" for a throwaway database.
+        """
+        self._init_common(
+            table_skills=table_skills,
+            table_jobs=table_jobs,
+            table_job_skills=table_job_skills,
+            view_job_skills=view_job_skills,
+            canonicalizer=canonicalizer,
+            max_workers=1,      # one connection, writes are serialized anyway
+        )
+
+        self.path = path or os.getenv("LOCAL_DB_PATH")
+        if not self.path:
+            raise ValueError("Local DB path not provided. Set LOCAL_DB_PATH or pass it to LocalDatabase(...).")
+
+        # One connection shared by the process; sqlite3 serializes access through the lock.
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    # ----------------------------
+    # Public API
+    # ----------------------------
+    def insert_into_supabase(
+        self,
+        skills_unique: pd.DataFrame,
+        jobs_table: pd.DataFrame,
+        job_skills_name_only: pd.DataFrame,
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Same contract as Database.insert_into_supabase, written in one local transaction.
+        Returns (skills_map_df, jobs_table_final, job_skills_full).
+        """
+        jobs_table_final = jobs_table[[c for c in self.JOB_COLUMNS if c in jobs_table.columns]].copy()
+        for col in jobs_table_final.columns:
+            if pd.api.types.is_datetime64_any_dtype(jobs_table_final[col]):
+                # one fixed-width UTC format, so text order == time order and date() works
+                jobs_table_final[col] = to_utc_text(jobs_table_final[col])
+        jobs_table_final["JobId"] = jobs_table_final["JobId"].astype(str)
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f'INSERT INTO {self.table_skills} ("SkillName") VALUES (?) ON CONFLICT("SkillName") DO NOTHING',
+                ((s,) for s in skills_unique["SkillName"].dropna().astype(str)),
+            )
+            skills_map_df = pd.read_sql_query(
+                f'SELECT "SkillId", "SkillName" FROM {self.table_skills}', self.conn
+            )
+
+            cols = jobs_table_final.columns.tolist()
+            quoted = ", ".join(f'"{c}"' for c in cols)
+            updates = ", ".join(f'"{c}" = excluded."{c}"' for c in cols if c != "JobId")
+            on_conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+            self.conn.executemany(
+                f'INSERT INTO {self.table_jobs} ({quoted}) VALUES ({", ".join("?" * len(cols))}) '
+                f'ON CONFLICT("JobId") {on_conflict}',
+                jobs_table_final.astype(object).where(jobs_table_final.notna(), None).itertuples(index=False, name=None),
+            )
+
+            job_skills_full = (
+                job_skills_name_only.assign(JobId=job_skills_name_only["JobId"].astype(str))
+                .merge(skills_map_df, how="inner", on="SkillName")[["JobId", "SkillId"]]
+                .drop_duplicates()
+            )
+            self.conn.executemany(
+                f'INSERT INTO {self.table_job_skills} ("JobId", "SkillId") VALUES (?, ?) '
+                f'ON CONFLICT("JobId", "SkillId") DO NOTHING',
+                job_skills_full.itertuples(index=False, name=None),
+            )
+
+        if skills_map_df.empty:
+            raise RuntimeError("No skills stored in the local database.")
+        return skills_map_df, jobs_table_final, job_skills_full
+
+    def iter_job_skill_view(self, keyword: str, page_size: int = 1000, workers: int = 1) -> Iterator[pd.DataFrame]:
+        """
+        Yields job_skill_view pages for keyword, ordered by (JobPosted, JobId, SkillName) with
+        NULL JobPosted last, JobPosted as datetime64[ns, UTC]. Every page is its own keyset
+        query (as in Database._keyset_pages), so the lock is only held while a page is read,
+        never while the caller works on it. workers is accepted for compatibility and ignored.
+        """
+        for null_posted in (False, True):
+            keys = ["JobId", "SkillName"] if null_posted else ["JobPosted", "JobId", "SkillName"]
+            key_cols = ", ".join(f'"{k}"' for k in keys)
+            where = f'"Keyword" = ? AND "JobPosted" IS {"" if null_posted else "NOT "}NULL'
+            last: tuple = ()
+            while True:
+                after = f' AND ({key_cols}) > ({", ".join("?" * len(keys))})' if last else ""
+                with self._lock:
+                    page = pd.read_sql_query(
+                        f'SELECT "JobId", "Title", "JobPosted", "Keyword", "SkillName" '
+                        f'FROM {self.view_job_skills} WHERE {where}{after} ORDER BY {key_cols} LIMIT ?',
+                        self.conn,
+                        params=(keyword, *last, page_size),
+                    )
+                if page.empty:
+                    break
+                last = tuple(page.iloc[-1][keys].tolist())
+                page["JobPosted"] = pd.to_datetime(page["JobPosted"], format="ISO8601", utc=True, errors="coerce")
+                yield page
+                if len(page) < page_size:
+                    break
+
+    def skill_counts(self, keyword: str) -> Tuple[pd.Series, int]:
+        """
+        Reads the daily cube (see _create_cube).
+        Returns (skill -> distinct job count Series, total distinct jobs for keyword).
+        """
+        with self._lock:
+            data = pd.read_sql_query(
+                f'SELECT "SkillName", sum("Jobs") AS "Jobs" FROM {self.TABLE_DAILY_COUNTS} '
+                f'WHERE "Keyword" = ? GROUP BY 1 ORDER BY 2 DESC',
+                self.conn,
+                params=(keyword,),
+            )
+            n_jobs = self.conn.execute(
+                f'SELECT coalesce(sum("Jobs"), 0) FROM {self.TABLE_DAILY_JOBS} WHERE "Keyword" = ?',
+                (keyword,),
+            ).fetchone()[0]
+        return data.set_index("SkillName")["Jobs"].astype(int), int(n_jobs)
+
+    def daily_skill_counts(self, keyword: str, since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Reads the daily cube (see _create_cube); since: only days on/after it.
+        Undated jobs have no place on a timeline and are left out.
+        Returns DataFrame(JobPosted datetime64, SkillName, count).
+        """
+        since_day = "0000-00-00" if since is None else pd.Timestamp(since).strftime("%Y-%m-%d")
+        with self._lock:
+            data = pd.read_sql_query(
+                f'SELECT "Day" AS "JobPosted", "SkillName", "Jobs" AS "count" '
+                f'FROM {self.TABLE_DAILY_COUNTS} WHERE "Keyword" = ? AND "Day" >= ? AND "Day" <> ? ORDER BY 1, 3 DESC',
+                self.conn,
+                params=(keyword, since_day, self.UNDATED_DAY),
+            )
+        data["JobPosted"] = pd.to_datetime(data["JobPosted"], format="%Y-%m-%d")
+        return data
+
+    def skill_pairs(self, keyword: str, min_pair: int = 2) -> Tuple[pd.DataFrame, int]:
+        """
+        Same contract as Database.skill_pairs (the keyword_skill_pairs query of
+        sql/analytics_rpc.sql, run on job_skill_view).
+        """
+        with self._lock:
+            data = pd.read_sql_query(
+                f'WITH js AS (SELECT DISTINCT "JobId", "SkillName" FROM {self.view_job_skills} '
+                f'            WHERE "Keyword" = ? AND "SkillName" <> \'\') '
+                f'SELECT a."SkillName" AS "SkillA", b."SkillName" AS "SkillB", count(*) AS "Jobs", '
+                f'       (SELECT count(DISTINCT "JobId") FROM js) AS "TotalJobs" '
+                f'FROM js a JOIN js b ON b."JobId" = a."JobId" AND b."SkillName" >= a."SkillName" '
+                f'GROUP BY 1, 2 HAVING a."SkillName" = b."SkillName" OR count(*) >= ? ORDER BY 1, 2',
+                self.conn,
+                params=(keyword, min_pair),
+            )
+        n_jobs = int(data["TotalJobs"].iloc[0]) if not data.empty else 0
+        return data[["SkillA", "SkillB", "Jobs"]].astype({"Jobs": int}), n_jobs
+
+    def any_skill_jobs(self, keywords: List[str], skills: Iterable[str]) -> pd.Series:
+        """Same contract as Database.any_skill_jobs (keyword_any_skill_jobs run on job_skill_view)."""
+        keywords = list(keywords)
+        skills = sorted({str(s).lower() for s in skills})
+        with self._lock:
+            data = pd.read_sql_query(
+                f'SELECT "Keyword", count(DISTINCT "JobId") AS "Jobs" FROM {self.view_job_skills} '
+                f'WHERE "Keyword" IN ({", ".join("?" * len(keywords))}) '
+                f'AND lower("SkillName") IN ({", ".join("?" * len(skills))}) GROUP BY 1 ORDER BY 1',
+                self.conn,
+                params=(*keywords, *skills),
+            )
+        return self._per_keyword(data, keywords)
+
+    def daily_skill_counts_many(
+        self, keywords: List[str], since: Optional[pd.Timestamp] = None, page_size: int = 1000
+    ) -> pd.DataFrame:
+        """
+        Reads the daily cube for several keywords in one query; page_size is accepted for compatibility.
+        Returns DataFrame(Keyword, JobPosted datetime64, SkillName, count).
+        """
+        return self._cube_rows(
+            f'SELECT "Keyword", "Day" AS "JobPosted", "SkillName", "Jobs" AS "count" FROM {self.TABLE_DAILY_COUNTS}',
+            keywords, since,
+        )
+
+    def daily_job_counts_many(
+        self, keywords: List[str], since: Optional[pd.Timestamp] = None, page_size: int = 1000
+    ) -> pd.DataFrame:
+        """
+        Jobs posted per (keyword, day), for several keywords in one query.
+        Returns DataFrame(Keyword, JobPosted datetime64, Jobs).
+        """
+        return self._cube_rows(
+            f'SELECT "Keyword", "Day" AS "JobPosted", "Jobs" FROM {self.TABLE_DAILY_JOBS}',
+            keywords, since,
+        )
+
+    def rebuild_skill_daily_counts(self) -> None:
+        """Recomputes the daily cube from scratch (backfill, or repair after manual edits)."""
+        with self._lock:
+            self.conn.executescript(
+                f"""
+                BEGIN;
+                DELETE FROM {self.TABLE_DAILY_COUNTS};
+                DELETE FROM {self.TABLE_DAILY_JOBS};
+                INSERT INTO {self.TABLE_DAILY_COUNTS} ("Day", "Keyword", "SkillName", "Jobs")
+                    SELECT coalesce(date("JobPosted"), '{self.UNDATED_DAY}'), "Keyword", "SkillName", count(DISTINCT "JobId")
+                    FROM {self.view_job_skills}
+                    WHERE "Keyword" IS NOT NULL AND "SkillName" <> ''
+                    GROUP BY 1, 2, 3;
+                INSERT INTO {self.TABLE_DAILY_JOBS} ("Day", "Keyword", "Jobs")
+                    SELECT coalesce(date("JobPosted"), '{self.UNDATED_DAY}'), "Keyword", count(*)
+                    FROM {self.table_jobs}
+                    WHERE "Keyword" IS NOT NULL
+                    GROUP BY 1, 2;
+                COMMIT;
+                """
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    # ----------------------------
+    # Internals (helpers)
+    # ----------------------------
+    def _cube_rows(self, select: str, keywords: List[str], since: Optional[pd.Timestamp]) -> pd.DataFrame:
+        """Cube rows for keywords; without since the undated cells are included (JobPosted NaT)."""
+        keywords = list(keywords)
+        marks = ", ".join("?" * len(keywords))
+        day_filter, params = ("", ()) if since is None else (' AND "Day" >= ?', (pd.Timestamp(since).strftime("%Y-%m-%d"),))
+        with self._lock:
+            data = pd.read_sql_query(
+                f'{select} WHERE "Keyword" IN ({marks}){day_filter} ORDER BY "Keyword", "Day"',
+                self.conn,
+                params=(*keywords, *params),
+            )
+        data["JobPosted"] = self.parse_days(data["JobPosted"])
+        return data
+
+    def _create_schema(self):
+        with self._lock, self.conn:
+            self.conn.executescript(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.table_skills} (
+                    "SkillId"   INTEGER PRIMARY KEY AUTOINCREMENT,
+                    "SkillName" TEXT NOT NULL UNIQUE
+                );
+                CREATE TABLE IF NOT EXISTS {self.table_jobs} (
+                    "JobId"     TEXT PRIMARY KEY,
+                    "Title"     TEXT,
+                    "JobLink"   TEXT,
+                    "JobPosted" TEXT,
+                    "Keyword"   TEXT
+                );
+                CREATE TABLE IF NOT EXISTS {self.table_job_skills} (
+                    "JobId"   TEXT NOT NULL REFERENCES {self.table_jobs}("JobId"),
+                    "SkillId" INTEGER NOT NULL REFERENCES {self.table_skills}("SkillId"),
+                    UNIQUE ("JobId", "SkillId")
+                );
+                CREATE INDEX IF NOT EXISTS {self.table_jobs}_keyword_idx
+                    ON {self.table_jobs} ("Keyword", "JobPosted");
+                CREATE VIEW IF NOT EXISTS {self.view_job_skills} AS
+                    SELECT j."JobId", j."Title", j."JobLink", j."JobPosted", j."Keyword", s."SkillName"
+                    FROM {self.table_job_skills} js
+                    JOIN {self.table_jobs} j ON j."JobId" = js."JobId"
+                    JOIN {self.table_skills} s ON s."SkillId" = js."SkillId";
+                """
+            )
+        self._create_cube()
+
+    def _create_cube(self):
+        """
+        SQLite counterpart of sql/skill_daily_counts.sql: per-(keyword, day, skill) and
+        per-(keyword, day) job counts kept current by row triggers on jobs/job_skills.
+        Jobs without a parseable JobPosted are counted on Day = UNDATED_DAY.
+
+        Triggers are recreated on every start; PRAGMA user_version records the cube
+        version, and an older (or new) cube is rebuilt once.
+        """
+        jobs, job_skills, skills = self.table_jobs, self.table_job_skills, self.table_skills
+        cube, totals = self.TABLE_DAILY_COUNTS, self.TABLE_DAILY_JOBS
+
+        def day(ref: str) -> str:
+            return f"coalesce(date({ref}.\"JobPosted\"), '{self.UNDATED_DAY}')"
+
+        def adjust_job(ref: str, sign: str) -> str:
+            """Adds sign to every cell of the job in row `ref` (OLD/NEW of jobs)."""
+            return f"""
+                INSERT INTO {cube} ("Day", "Keyword", "SkillName", "Jobs")
+                    SELECT {day(ref)}, {ref}."Keyword", s."SkillName", {sign}
+                    FROM {job_skills} x JOIN {skills} s ON s."SkillId" = x."SkillId"
+                    WHERE x."JobId" = {ref}."JobId" AND {ref}."Keyword" IS NOT NULL AND s."SkillName" <> ''
+                    ON CONFLICT ("Keyword", "Day", "SkillName") DO UPDATE SET "Jobs" = "Jobs" + excluded."Jobs";
+                INSERT INTO {totals} ("Day", "Keyword", "Jobs")
+                    SELECT {day(ref)}, {ref}."Keyword", {sign}
+                    WHERE {ref}."Keyword" IS NOT NULL
+                    ON CONFLICT ("Keyword", "Day") DO UPDATE SET "Jobs" = "Jobs" + excluded."Jobs";
+            """
+
+        with self._lock, self.conn:
+            stale = self.conn.execute("PRAGMA user_version").fetchone()[0] < self.CUBE_VERSION
+            self.conn.executescript(
+                f"""
+                DROP TRIGGER IF EXISTS {job_skills}_cube_insert;
+                DROP TRIGGER IF EXISTS {job_skills}_cube_delete;
+                DROP TRIGGER IF EXISTS {jobs}_cube_insert;
+                DROP TRIGGER IF EXISTS {jobs}_cube_update;
+                DROP TRIGGER IF EXISTS {jobs}_cube_delete;
+
+                CREATE TABLE IF NOT EXISTS {cube} (
+                    "Day"       TEXT    NOT NULL,
+                    "Keyword"   TEXT    NOT NULL,
+                    "SkillName" TEXT    NOT NULL,
+                    "Jobs"      INTEGER NOT NULL,
+                    PRIMARY KEY ("Keyword", "Day", "SkillName")
+                );
+                CREATE TABLE IF NOT EXISTS {totals} (
+                    "Day"     TEXT    NOT NULL,
+                    "Keyword" TEXT    NOT NULL,
+                    "Jobs"    INTEGER NOT NULL,
+                    PRIMARY KEY ("Keyword", "Day")
+                );
+
+                CREATE TRIGGER {job_skills}_cube_insert AFTER INSERT ON {job_skills}
+                BEGIN
+                    INSERT INTO {cube} ("Day", "Keyword", "SkillName", "Jobs")
+                        SELECT {day("j")}, j."Keyword", s."SkillName", 1
+                        FROM {jobs} j, {skills} s
+                        WHERE j."JobId" = NEW."JobId" AND s."SkillId" = NEW."SkillId"
+                          AND j."Keyword" IS NOT NULL AND s."SkillName" <> ''
+                        ON CONFLICT ("Keyword", "Day", "SkillName") DO UPDATE SET "Jobs" = "Jobs" + 1;
+                END;
+
+                CREATE TRIGGER {job_skills}_cube_delete AFTER DELETE ON {job_skills}
+                BEGIN
+                    UPDATE {cube} SET "Jobs" = "Jobs" - 1
+                        WHERE ("Keyword", "Day", "SkillName") = (
+                            SELECT j."Keyword", {day("j")}, s."SkillName"
+                            FROM {jobs} j, {skills} s
+                            WHERE j."JobId" = OLD."JobId" AND s."SkillId" = OLD."SkillId"
+                        );
+                    DELETE FROM {cube} WHERE "Jobs" <= 0;
+                END;
+
+                CREATE TRIGGER {jobs}_cube_insert AFTER INSERT ON {jobs}
+                BEGIN
+                    INSERT INTO {totals} ("Day", "Keyword", "Jobs")
+                        SELECT {day("NEW")}, NEW."Keyword", 1
+                        WHERE NEW."Keyword" IS NOT NULL
+                        ON CONFLICT ("Keyword", "Day") DO UPDATE SET "Jobs" = "Jobs" + 1;
+                END;
+
+                CREATE TRIGGER {jobs}_cube_update AFTER UPDATE OF "JobPosted", "Keyword" ON {jobs}
+                WHEN OLD."JobPosted" IS NOT NEW."JobPosted" OR OLD."Keyword" IS NOT NEW."Keyword"
+                BEGIN
+                    {adjust_job("OLD", "-1")}
+                    {adjust_job("NEW", "1")}
+                    DELETE FROM {cube} WHERE "Jobs" <= 0;
+                    DELETE FROM {totals} WHERE "Jobs" <= 0;
+                END;
+
+                CREATE TRIGGER {jobs}_cube_delete BEFORE DELETE ON {jobs}
+                BEGIN
+                    {adjust_job("OLD", "-1")}
+                    DELETE FROM {cube} WHERE "Jobs" <= 0;
+                    DELETE FROM {totals} WHERE "Jobs" <= 0;
+                END;
+                """
+            )
+        if stale:
+            self.rebuild_skill_daily_counts()     # backfill new cubes and ones without undated cells
+            with self._lock:
+                self.conn.execute(f"PRAGMA user_version = {self.CUBE_VERSION}")
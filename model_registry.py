@@ -0,0 +1,94 @@
+import os
+import threading
+import importlib.util
+from typing import Dict, Iterable, Optional
+
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of embedding models, loaded lazily and at most once.
+
+    Usage:
+        from model_registry import models
+        emb = models.get().encode(skills, normalize_embeddings=True)
+
+    With gunicorn --preload, call models.preload() at import time of the app
+    (PRELOAD_MODELS=1) so the master loads the weights once and forked workers
+    share those pages copy-on-write instead of each loading their own copy.
+
+    EMBEDDING_BACKEND selects the implementation:
+        torch (default)  sentence_transformers.SentenceTransformer
+        onnx             onnx_embedder.OnnxEmbedder (int8 ONNX Runtime, no torch import);
+                         falls back to torch if the export or onnxruntime/tokenizers is
+                         missing (decided up front, see backend_of)
+    """
+
+    def __init__(self, backend: Optional[str] = None) -> None:
+        self.backend = (backend or os.getenv("EMBEDDING_BACKEND", "torch")).lower()
+        self._models: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str = DEFAULT_MODEL):
+        """Returns the model `name`, loading it on first use (thread-safe)."""
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._load(name)
+                    self._models[name] = model
+        return model
+
+    def backend_of(self, name: str = DEFAULT_MODEL) -> str:
+        """
+        Backend serving `name` ("torch" after an ONNX fallback). Decided without loading
+        the model, so embedding stores can pick their files before anything is encoded.
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return "onnx" if type(model).__name__ == "OnnxEmbedder" else "torch"
+        return "onnx" if self.backend == "onnx" and self._onnx_available(name) else "torch"
+
+    def preload(self, names: Iterable[str] = (DEFAULT_MODEL,)) -> None:
+        """
+        Loads weights only; no inference is run, so torch's thread pools are
+        created after fork in each worker rather than inherited from the master.
+        """
+        for name in names:
+            self.get(name)
+
+    @staticmethod
+    def _onnx_available(name: str) -> bool:
+        """onnxruntime and tokenizers are installed and the export of `name` exists."""
+        if any(importlib.util.find_spec(m) is None for m in ("onnxruntime", "tokenizers")):
+            return False
+        from onnx_embedder import ONNX_FILE, default_onnx_dir
+        return os.path.exists(os.path.join(default_onnx_dir(name), ONNX_FILE))
+
+    def _load(self, name: str):
+        # the fallback is decided by backend_of only; a broken export that is present raises
+        if self.backend_of(name) == "onnx":
+            from onnx_embedder import OnnxEmbedder
+
+            print(f"[info] Loading ONNX embedding model '{name}'")
+            return OnnxEmbedder(name)
+        if self.backend == "onnx":
+            print(f"[warn] ONNX backend unavailable for '{name}' (no export or onnxruntime); falling back to sentence-transformers")
+
+        from sentence_transformers import SentenceTransformer
+
+        print(f"[info] Loading embedding model '{name}'")
+        return SentenceTransformer(name)
+
+
+models = ModelRegistry()
+
+
+def preload_from_env() -> None:
+    """Preloads models when PRELOAD_MODELS=1 (comma-separated names via EMBEDDING_MODELS)."""
+    if os.getenv("PRELOAD_MODELS", "0") == "1":
+        names = [n.strip() for n in os.getenv("EMBEDDING_MODELS", DEFAULT_MODEL).split(",") if n.strip()]
+        models.preload(names)
@@ -0,0 +1,153 @@
+import os
+import re
+import json
+import numpy as np
+from typing import List, Optional, Sequence, Union
+
+
+ONNX_FILE = "model.int8.onnx"
+
+
+def default_onnx_dir(model_name: str) -> str:
+    """$EMBEDDING_ONNX_DIR/<model>, defaulting to data/onnx/<model>."""
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    return os.path.join(os.getenv("EMBEDDING_ONNX_DIR", os.path.join("data", "onnx")), safe)
+
+
+class OnnxEmbedder:
+    """
+    CPU sentence embedder running an int8-quantized ONNX export of a
+    sentence-transformers model (mean pooling, like all-MiniLM-L6-v2) with ONNX Runtime.
+
+    Needs only onnxruntime + tokenizers at runtime, so workers don't import torch.
+    encode() mirrors SentenceTransformer.encode for the arguments this repo uses.
+
+    Usage:
+        python onnx_embedder.py all-MiniLM-L6-v2          # one-off export (needs torch/transformers/onnx)
+        EMBEDDING_BACKEND=onnx                            # then model_registry serves this class
+    """
+
+    def __init__(self, model_name: str, directory: Optional[str] = None, filename: str = ONNX_FILE) -> None:
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.directory = directory or default_onnx_dir(model_name)
+        model_path = os.path.join(self.directory, filename)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No ONNX export at {model_path}. Run `python onnx_embedder.py {model_name}` first."
+            )
+
+        config = {}
+        config_path = os.path.join(self.directory, "embedder_config.json")
+        if os.path.exists(config_path):
+            with open(config_path, encoding="utf-8") as f:
+                config = json.load(f)
+        self.max_seq_length = int(config.get("max_seq_length", 256))
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.directory, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding(pad_id=int(config.get("pad_id", 0)), pad_token=config.get("pad_token", "[PAD]"))
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = int(os.getenv("ONNX_THREADS", "0"))     # 0 = onnxruntime default
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(
+        self,
+        sentences: Union[str, Sequence[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = False,
+        convert_to_numpy: bool = True,
+        **kwargs,
+    ) -> np.ndarray:
+        """Returns float32 (n, dim) embeddings (a single vector for a single string)."""
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else [str(s) for s in sentences]
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        # batch similar lengths together to minimize padding, then restore the input order
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        batches = [
+            self._embed_batch([texts[i] for i in order[start:start + batch_size]])
+            for start in range(0, len(texts), batch_size)
+        ]
+        out = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        out[order] = np.concatenate(batches)
+
+        if normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out[0] if single else out
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self.session.get_outputs()[0].shape[-1])
+
+    # ---------- helpers ----------
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+        weights = mask[:, :, None].astype(np.float32)
+        return (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+
+
+def export_onnx(model_name: str, directory: Optional[str] = None, opset: int = 14) -> str:
+    """
+    Exports the transformer of a sentence-transformers model to ONNX and writes an
+    int8 (dynamic, weight-only) quantized copy next to it along with tokenizer.json.
+    Build-time only: needs torch, transformers, onnx and onnxruntime.
+    Returns the export directory.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    hf_name = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    directory = directory or default_onnx_dir(model_name)
+    os.makedirs(directory, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(hf_name)
+    model = AutoModel.from_pretrained(hf_name).eval()
+    tokenizer.save_pretrained(directory)        # writes tokenizer.json for the fast tokenizer
+
+    dummy = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+    fp32_path = os.path.join(directory, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(dummy[n] for n in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={n: {0: "batch", 1: "sequence"} for n in input_names + ["last_hidden_state"]},
+            opset_version=opset,
+        )
+    quantize_dynamic(fp32_path, os.path.join(directory, ONNX_FILE), weight_type=QuantType.QInt8)
+
+    max_len = min(int(getattr(tokenizer, "model_max_length", 256) or 256), 256)
+    with open(os.path.join(directory, "embedder_config.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "model": hf_name,
+            "max_seq_length": max_len,
+            "pad_id": int(tokenizer.pad_token_id or 0),
+            "pad_token": tokenizer.pad_token or "[PAD]",
+        }, f)
+    print(f"✅ Exported {hf_name} to {directory}")
+    return directory
+
+
+if __name__ == "__main__":
+    import sys
+
+    export_onnx(sys.argv[1] if len(sys.argv) > 1 else "all-MiniLM-L6-v2")
@@ -1,4 +1,5 @@
 from data_generation import linkedin, adzuna, indeed, jobspresso
+from data_generation.posted_dates import source_frame
 import time
 import pandas as pd
 from gpt_tool_extraction import GPTToolExtractor
@@ -21,18 +22,18 @@ class JobPipeline:
 
     def fetch_data(self):
         print("function called")
-        adzuna_data = pd.DataFrame(adzuna.Adzuna(self.keyword).jobs)
+        adzuna_data = source_frame(adzuna.Adzuna(self.keyword).jobs, "adzuna")
         pprint(len(adzuna_data))
        
-        linkedin_data = pd.DataFrame(linkedin.LinkedIn(self.keyword).jobs)
+        linkedin_data = source_frame(linkedin.LinkedIn(self.keyword).jobs, "linkedin")
         print("LinkedIn done")
         print(len(linkedin_data))
 
-        indeed_data = pd.DataFrame(indeed.Indeed(self.keyword).jobs)
+        indeed_data = source_frame(indeed.Indeed(self.keyword).jobs, "indeed")
         print(len(indeed_data))
         print("Indeed done")
 
-        jobspresso_data = pd.DataFrame(jobspresso.Jobspresso(category='ai_&_data').get_jobs())
+        jobspresso_data = source_frame(jobspresso.Jobspresso(category='ai_&_data').get_jobs(), "jobspresso")
         print(jobspresso_data.columns)
         print(len(jobspresso_data))
         print("Jobspresso done")
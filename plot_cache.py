@@ -0,0 +1,137 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from typing import Callable, Optional
+
+
+NAME_RE = re.compile(r"[0-9a-f]{64}\.[a-z0-9]{2,5}")     # <sha256>.<ext>
+
+
+class PlotCache:
+    """
+    On-disk cache of rendered plots, keyed by a hash of what was drawn.
+
+    Entries are named <sha256>.<ext>, the hash taken over the plot spec (plots.py),
+    the output options (format, dpi, byte budget) and plots.STYLE_VERSION, so an
+    unchanged analysis is never drawn twice and a name always stands for the same
+    bytes (the /plots/<name> URLs can be cached forever). Files are written
+    atomically; reads bump the file's mtime and the least recently used files are
+    deleted once the directory grows past max_bytes. All worker processes share
+    the directory.
+
+    Usage:
+        from plot_cache import get_plot_cache
+        cache = get_plot_cache()
+        name = cache.key(spec, "webp", dpi=150, style=1)       # '<sha256>.webp'
+        data = cache.get_or_render(name, lambda: plots.render_bytes(spec, "webp"))
+        cache.path(name)                                       # file to serve
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None) -> None:
+        """directory defaults to $PLOT_CACHE_DIR, then data/plots; max_bytes to $PLOT_CACHE_MAX_MB (256)."""
+        self.directory = directory or os.getenv("PLOT_CACHE_DIR", os.path.join("data", "plots"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv("PLOT_CACHE_MAX_MB", "256")) * 2 ** 20)
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None        # bytes on disk, counted on first write
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- public API ----------
+    @staticmethod
+    def key(spec: dict, ext: str = "png", **options) -> str:
+        """'<hex digest>.<ext>' of spec + ext + options (JSON with sorted keys, so dict order does not matter)."""
+        payload = json.dumps({"spec": spec, "ext": ext, **options}, sort_keys=True, separators=(",", ":"), default=str)
+        return f"{hashlib.sha256(payload.encode('utf-8')).hexdigest()}.{ext}"
+
+    def path(self, name: str) -> str:
+        if not NAME_RE.fullmatch(name):
+            raise ValueError(f"not a plot cache name: {name!r}")
+        return os.path.join(self.directory, name)
+
+    def get(self, name: str) -> Optional[bytes]:
+        """Stored bytes for name (None on a miss); marks the file as recently used."""
+        path = self.path(name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, name: str, data: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(name)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_usage()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def get_or_render(self, name: str, render: Callable[[], bytes]) -> bytes:
+        """Cached bytes, or render() stored under name (empty results are not stored)."""
+        data = self.get(name)
+        if data is None:
+            data = render()
+            if data:
+                self.put(name, data)
+        return data
+
+    def touch(self, name: str) -> bool:
+        """True if name is stored (marking it as recently used); False for a miss or a bad name."""
+        if not NAME_RE.fullmatch(name):
+            return False
+        try:
+            os.utime(self.path(name))
+            return True
+        except FileNotFoundError:
+            return False
+
+    # ---------- helpers ----------
+    def _entries(self):
+        with os.scandir(self.directory) as it:
+            return [e for e in it if e.is_file() and NAME_RE.fullmatch(e.name)]
+
+    def _disk_usage(self) -> int:
+        return sum(e.stat().st_size for e in self._entries())
+
+    def _evict(self) -> None:
+        """Deletes least recently used files until the directory is under 90% of max_bytes."""
+        entries = sorted(((e.stat(), e.path) for e in self._entries()), key=lambda x: x[0].st_mtime)
+        size = sum(st.st_size for st, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for st, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:    # evicted by another worker
+                pass
+            size -= st.st_size
+            removed += 1
+        self._size = size
+        if removed:
+            print(f"[info] Plot cache: evicted {removed} files, {size / 2 ** 20:.1f} MB left")
+
+
+_cache: Optional[PlotCache] = None
+
+
+def get_plot_cache() -> PlotCache:
+    """Process-wide PlotCache (configured from the environment)."""
+    global _cache
+    if _cache is None:
+        _cache = PlotCache()
+    return _cache
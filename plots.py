@@ -0,0 +1,303 @@
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+
+import io
+import os
+import base64
+import numpy as np
+import pandas as pd
+from PIL import Image, features
+from typing import List, Optional, Tuple
+
+from plot_cache import get_plot_cache
+
+
+# Every analysis plot is described by a spec: a plain dict of lists/numbers/strings
+# (JSON-serializable as-is). The /api/* endpoints return specs for client-side charts;
+# render() draws the same spec with matplotlib for the cached images. Rendered
+# images are kept in the on-disk PlotCache, keyed by spec + output options + STYLE_VERSION.
+
+STYLE_VERSION = 1       # bump when a drawer changes, so cached images are redrawn
+
+# output format -> (file extension, MIME type)
+#   png   matplotlib's full-colour PNG
+#   png8  256-colour palette PNG, optimized (about a third of png for these charts)
+#   webp  lossy WebP (falls back to png8 if Pillow was built without WebP)
+#   svg   vector, text kept as text; no dpi, and the byte budget cannot be applied
+FORMATS = {
+    "png": ("png", "image/png"),
+    "png8": ("png", "image/png"),
+    "webp": ("webp", "image/webp"),
+    "svg": ("svg", "image/svg+xml"),
+}
+DEFAULT_FORMAT = os.getenv("PLOT_FORMAT", "png8")
+DEFAULT_DPI = int(os.getenv("PLOT_DPI", "150"))
+DEFAULT_MAX_BYTES = int(float(os.getenv("PLOT_MAX_KB", "256")) * 1024)     # 0 = no budget
+MIN_DPI = 60
+WEBP_QUALITY = 80
+
+PALETTE = [
+    "#3498db", "#e74c3c", "#2ecc71", "#f39c12",
+    "#9b59b6", "#1abc9c", "#34495e", "#e67e22"
+]
+
+
+# ---------- specs ----------
+def bars_spec(names: List[str], counts: List[int]) -> dict:
+    """Plain top-skill frequencies."""
+    return {
+        "kind": "bars",
+        "title": "Top Skills (Frequency Only)",
+        "xlabel": "Mentions",
+        "labels": [str(n) for n in names],
+        "values": [int(c) for c in counts],
+    }
+
+
+def categories_spec(top_categories: list) -> dict:
+    """Semantic categories in the CategoryModel.categorize format."""
+    return {
+        "kind": "categories",
+        "title": "Top Skill Categories (Semantic Clusters)",
+        "xlabel": "Number of Job Opportunities",
+        "labels": [c["category"] for c in top_categories],
+        "values": [int(c["total_jobs"]) for c in top_categories],
+        "examples": [list(c["examples"]) for c in top_categories],
+        "num_skills": [int(c["num_skills"]) for c in top_categories],
+    }
+
+
+def trends_spec(wide: pd.DataFrame, granularity: str = "day", rolling: Optional[int] = None) -> dict:
+    """A SkillsTrendAdapter.trend_series() table: one series per skill over period starts."""
+    title = f"Top {len(wide.columns)} Skills per {granularity.title()} — Line Trends"
+    if rolling and rolling > 1:
+        title += f" ({rolling}-{granularity} rolling mean)"
+    return {
+        "kind": "trends",
+        "title": title,
+        "granularity": granularity,
+        "rolling": rolling,
+        "dates": [d.strftime("%Y-%m-%d") for d in wide.index],
+        "series": [
+            {"name": str(skill), "values": [round(float(v), 3) for v in wide[skill].to_numpy()]}
+            for skill in wide.columns
+        ],
+    }
+
+
+def wilson_spec(
+    data: pd.DataFrame,
+    nec_wlb_pct: float,
+    nice_min_pct: float,
+    nice_max_pct: float,
+    annotate_top: int = 12,
+) -> dict:
+    """WilsonNecessityWidget.run() rows as scatter points (x = Wilson lower %, y = raw share %)."""
+    d = data[data["counts"] > 0]
+    top = set(d.nlargest(annotate_top, "counts")["name"])
+    return {
+        "kind": "wilson",
+        "title": "Necessary vs Better-to-Have Skills",
+        "xlabel": "Wilson Lower (%) — Conservative Commonness",
+        "ylabel": "Raw Share (%)",
+        "nec_wlb_pct": float(nec_wlb_pct),
+        "nice_min_pct": float(nice_min_pct),
+        "nice_max_pct": float(nice_max_pct),
+        "points": [
+            {
+                "name": str(name),
+                "x": round(float(x), 3),
+                "y": round(float(y), 3),
+                "counts": int(c),
+                "label": str(label),
+                "annotate": name in top,
+            }
+            for name, x, y, c, label in zip(
+                d["name"], d["wilson_lower_pct"], d["percentage"], d["counts"], d["label"]
+            )
+        ],
+    }
+
+
+# ---------- rendering ----------
+def plot_options(fmt: Optional[str] = None, dpi: Optional[int] = None, max_bytes: Optional[int] = None) -> Tuple[str, int, int]:
+    """(fmt, dpi, max_bytes) with None replaced by the PLOT_FORMAT / PLOT_DPI / PLOT_MAX_KB defaults."""
+    fmt = fmt or DEFAULT_FORMAT
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {sorted(FORMATS)}, got {fmt!r}")
+    if fmt == "webp" and not features.check("webp"):
+        print("[warn] Pillow has no WebP support; using png8")
+        fmt = "png8"
+    return fmt, int(dpi or DEFAULT_DPI), int(DEFAULT_MAX_BYTES if max_bytes is None else max_bytes)
+
+
+def render(spec: dict, dpi: Optional[int] = None, fmt: Optional[str] = None, max_bytes: Optional[int] = None) -> str:
+    """base64 image of a spec ('' for an empty one), drawn only on a plot cache miss."""
+    options = plot_options(fmt, dpi, max_bytes)
+    return to_base64(get_plot_cache().get_or_render(render_key(spec, *options), lambda: render_bytes(spec, *options)))
+
+
+def to_base64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def render_key(spec: dict, fmt: Optional[str] = None, dpi: Optional[int] = None, max_bytes: Optional[int] = None) -> str:
+    """Plot cache name ('<sha256>.<ext>') of spec with these options (served as /plots/<name>)."""
+    fmt, dpi, max_bytes = plot_options(fmt, dpi, max_bytes)
+    if fmt == "svg":
+        dpi = max_bytes = 0
+    return get_plot_cache().key(spec, FORMATS[fmt][0], fmt=fmt, dpi=dpi, max_bytes=max_bytes, style=STYLE_VERSION)
+
+
+def render_bytes(spec: dict, fmt: Optional[str] = None, dpi: Optional[int] = None, max_bytes: Optional[int] = None) -> bytes:
+    """
+    Image bytes of a spec, always drawn (b'' for an empty one). Raster output over
+    max_bytes is saved again at a lower dpi (size grows about with dpi²) until it
+    fits or reaches MIN_DPI.
+    """
+    fmt, dpi, max_bytes = plot_options(fmt, dpi, max_bytes)
+    fig = draw(spec)
+    if fig is None:
+        return b""
+    try:
+        data = _save(fig, fmt, dpi)
+        while fmt != "svg" and max_bytes and len(data) > max_bytes and dpi > MIN_DPI:
+            scale = min(0.9, max(0.5, 0.95 * (max_bytes / len(data)) ** 0.5))
+            dpi = max(MIN_DPI, int(dpi * scale))
+            data = _save(fig, fmt, dpi)
+        if max_bytes and len(data) > max_bytes:
+            print(f"[warn] {spec['kind']} plot is {len(data) // 1024} KB as {fmt}, over the {max_bytes // 1024} KB budget")
+        return data
+    finally:
+        plt.close(fig)
+
+
+def mime_type(b64: str) -> str:
+    """MIME type of a base64 image from render() (sniffed from its first bytes)."""
+    head = base64.b64decode(b64[:16] + "=" * (-len(b64[:16]) % 4))
+    if head.startswith(b"RIFF"):
+        return "image/webp"
+    if head.lstrip().startswith((b"<?xml", b"<svg")):
+        return "image/svg+xml"
+    return "image/png"
+
+
+def draw(spec: dict):
+    """matplotlib Figure of a spec (None if there is nothing to draw)."""
+    return _DRAW[spec["kind"]](spec)
+
+
+def _save(fig, fmt: str, dpi: int) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "svg":
+        with plt.rc_context({"svg.fonttype": "none", "svg.hashsalt": "plots"}):
+            fig.savefig(buf, format="svg", bbox_inches="tight", metadata={"Date": None})
+        return buf.getvalue()
+
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=dpi)
+    if fmt == "png":
+        return buf.getvalue()
+
+    img = Image.open(buf)
+    out = io.BytesIO()
+    if fmt == "png8":
+        img.quantize(256, method=Image.Quantize.FASTOCTREE).save(out, format="PNG", optimize=True)
+    else:
+        img.save(out, format="WEBP", quality=WEBP_QUALITY, method=6)
+    return out.getvalue()
+
+
+def _draw_barh(spec: dict, y_labels: List[str], value_fmt: str, pad: float):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    fig.patch.set_facecolor("#f8f9fa")
+
+    counts = spec["values"]
+    bars = ax.barh(range(len(counts)), counts, color=PALETTE[:len(counts)], alpha=0.85)
+
+    for bar, val in zip(bars, counts):
+        ax.text(bar.get_width() + pad, bar.get_y() + bar.get_height() / 2,
+                value_fmt.format(val), va="center", fontsize=10, color="#2c3e50")
+
+    ax.set_yticks(range(len(counts)))
+    ax.set_yticklabels(y_labels, fontsize=10)
+    ax.invert_yaxis()
+    ax.set_xlabel(spec["xlabel"], fontsize=12)
+    ax.set_title(spec["title"], fontsize=14, pad=10)
+    ax.grid(axis="x", linestyle="--", alpha=0.3)
+    plt.tight_layout()
+    return fig
+
+
+def _draw_bars(spec: dict):
+    if not spec["labels"]:
+        return None
+    return _draw_barh(spec, [s.title() for s in spec["labels"]], "{:,}", pad=1)
+
+
+def _draw_categories(spec: dict):
+    if not spec["labels"]:
+        return None
+    # label with examples
+    y_labels = []
+    for name, examples, num_skills in zip(spec["labels"], spec["examples"], spec["num_skills"]):
+        ex = ", ".join(examples[:3])
+        if len(examples) > 3:
+            ex += f" +{num_skills - 3} more"
+        y_labels.append(f"{name}\n({ex})")
+    return _draw_barh(spec, y_labels, "{:,} jobs", pad=2)
+
+
+def _draw_trends(spec: dict):
+    if not spec["series"]:
+        return None
+    dates = pd.to_datetime(spec["dates"])
+
+    fig, ax = plt.subplots(figsize=(12, 7))
+    for s in spec["series"]:
+        ax.plot(dates, s["values"], marker="o", linewidth=2, label=s["name"], alpha=0.9)
+
+    ax.set_title(spec["title"], fontsize=14, fontweight="bold")
+    ax.set_xlabel("Date", fontsize=12, fontweight="bold")
+    ax.set_ylabel("Count", fontsize=12, fontweight="bold")
+    ax.grid(True, linestyle="--", alpha=0.3)
+    ax.set_facecolor("#fafafa")
+
+    # X-axis date formatting
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%b %Y" if spec["granularity"] == "month" else "%b %d"))
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+
+    ax.legend(title="Skill", bbox_to_anchor=(1.02, 1), loc="upper left", frameon=True)
+    plt.tight_layout()
+    return fig
+
+
+def _draw_wilson(spec: dict):
+    points = pd.DataFrame(spec["points"], columns=["name", "x", "y", "counts", "label", "annotate"])
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.axhspan(spec["nice_min_pct"], spec["nice_max_pct"], alpha=0.08)
+    ax.axvline(spec["nec_wlb_pct"], linestyle="--", alpha=0.7)
+
+    for label, g in points.groupby("label"):
+        ax.scatter(g["x"], g["y"], s=np.clip(g["counts"] * 3, 30, 500), alpha=0.8, label=label)
+
+    for _, r in points[points["annotate"]].iterrows():
+        ax.annotate(r["name"], (r["x"], r["y"]), xytext=(4, 4), textcoords="offset points", fontsize=8)
+
+    ax.set_xlabel(spec["xlabel"])
+    ax.set_ylabel(spec["ylabel"])
+    ax.set_title(spec["title"])
+    ax.legend(frameon=False)
+    ax.grid(alpha=0.2)
+    plt.tight_layout()
+    return fig
+
+
+_DRAW = {
+    "bars": _draw_bars,
+    "categories": _draw_categories,
+    "trends": _draw_trends,
+    "wilson": _draw_wilson,
+}
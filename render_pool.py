@@ -0,0 +1,122 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+import plots
+from plot_cache import get_plot_cache
+
+
+def _warm_worker() -> None:
+    """Runs once per worker: imports matplotlib (via plots) and builds the font cache."""
+    plots.render_bytes(plots.bars_spec(["warm up"], [1]), fmt="png8", dpi=20)
+
+
+class RenderPool:
+    """
+    Draws several plot specs (plots.py) at once in a pool of warm worker processes.
+
+    matplotlib is CPU-bound and holds the GIL, so the three plots of an analysis
+    take the sum of their render times when drawn in the request thread. Here each
+    spec that misses the plot cache is sent to its own worker and the images come back
+    together, so a batch takes about as long as its slowest plot. Workers are forked
+    from a forkserver that has already imported plots/matplotlib, and each one draws a
+    throwaway figure on start so the font cache is loaded before the first request.
+
+    The pool is created on first use in the process that uses it (after gunicorn
+    forks its workers). With PLOT_WORKERS <= 1 (the default on a single CPU) specs are
+    drawn in-process, as they are when the pool breaks.
+
+    Usage:
+        from render_pool import get_render_pool
+        names = get_render_pool().render_cached([spec1, spec2, spec3])          # /plots/<name>
+        images_b64 = get_render_pool().render([spec1, spec2, spec3], fmt="webp", dpi=110)
+        images = get_render_pool().render_bytes([spec1, spec2, spec3])
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        """workers defaults to $PLOT_WORKERS, then min(3, cpu count)."""
+        if workers is None:
+            workers = int(os.getenv("PLOT_WORKERS", str(min(3, os.cpu_count() or 1))))
+        self.workers = max(0, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    # ---------- public API ----------
+    def render_cached(
+        self, specs: List[Optional[dict]], fmt: Optional[str] = None, dpi: Optional[int] = None, max_bytes: Optional[int] = None
+    ) -> List[str]:
+        """Plot cache name per spec ('' for None or an empty spec), drawing the misses concurrently."""
+        names, _ = self._render(specs, plots.plot_options(fmt, dpi, max_bytes))
+        return names
+
+    def render(
+        self, specs: List[Optional[dict]], fmt: Optional[str] = None, dpi: Optional[int] = None, max_bytes: Optional[int] = None
+    ) -> List[str]:
+        """base64 image per spec, like plots.render() ('' for None or an empty spec)."""
+        return [plots.to_base64(data) for data in self.render_bytes(specs, fmt, dpi, max_bytes)]
+
+    def render_bytes(
+        self, specs: List[Optional[dict]], fmt: Optional[str] = None, dpi: Optional[int] = None, max_bytes: Optional[int] = None
+    ) -> List[bytes]:
+        """Image bytes per spec (b'' for None or an empty spec)."""
+        names, drawn = self._render(specs, plots.plot_options(fmt, dpi, max_bytes))
+        cache = get_plot_cache()
+        return [drawn[i] if i in drawn else (cache.get(n) or b"") if n else b"" for i, n in enumerate(names)]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # ---------- helpers ----------
+    def _render(self, specs: List[Optional[dict]], options: tuple):
+        """(name per spec, {position: bytes} of the specs drawn now); misses are stored in the plot cache."""
+        cache = get_plot_cache()
+        names = [plots.render_key(spec, *options) if spec else "" for spec in specs]
+        misses = [i for i, n in enumerate(names) if n and not cache.touch(n)]
+
+        drawn = {}
+        for i, data in zip(misses, self._draw([specs[i] for i in misses], options)):
+            if data:
+                cache.put(names[i], data)
+            else:
+                names[i] = ""
+            drawn[i] = data
+        return names, drawn
+
+    def _draw(self, specs: List[dict], options: tuple) -> List[bytes]:
+        """Image bytes per spec; in-process for a single spec or a single worker."""
+        if len(specs) < 2 or self.workers <= 1:
+            return [plots.render_bytes(spec, *options) for spec in specs]
+        try:
+            executor = self._get_executor()
+            futures = [executor.submit(plots.render_bytes, spec, *options) for spec in specs]
+            return [f.result() for f in futures]
+        except (BrokenProcessPool, OSError) as e:
+            print(f"[warn] Render pool unavailable ({e}); drawing in-process")
+            self.shutdown()
+            return [plots.render_bytes(spec, *options) for spec in specs]
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                ctx = multiprocessing.get_context("forkserver")
+                ctx.set_forkserver_preload(["plots"])
+            else:
+                ctx = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=ctx, initializer=_warm_worker
+            )
+        return self._executor
+
+
+_pool: Optional[RenderPool] = None
+
+
+def get_render_pool() -> RenderPool:
+    """Process-wide RenderPool (configured from the environment)."""
+    global _pool
+    if _pool is None:
+        _pool = RenderPool()
+    return _pool
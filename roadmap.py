@@ -4,9 +4,10 @@ from dotenv import load_dotenv
 import os
 
 class GPTToolExtractor:
-    def __init__(self, time, input_list):
+    def __init__(self, time, input_list, related=None):
         load_dotenv()
         self.input_list = input_list
+        self.related = related or []   # skills often listed alongside input_list (skill_cooccurrence)
         self.time = time
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.result = self.gpt_tools()
@@ -492,6 +493,11 @@ Constraints:
 
         List: {', '.join(self.input_list)}
         """
+        if self.related:
+            prompt += f"""
+Job postings that ask for these skills often also ask for: {', '.join(self.related)}.
+Where they fit, cover the most relevant of them under Core Topics or Stretch Topics.
+"""
 
         response = self.client.chat.completions.create(
             model="gpt-4o-mini",
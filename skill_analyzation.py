@@ -1,11 +1,17 @@
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import io
-import base64
 import numpy as np
 import pandas as pd
 
+import plots
+from skill_matrix import SkillMatrix
+from skill_parsing import POST_ID, is_exploded
+
+
+ML_TERMS = {
+    "ml", "machine learning", "deep learning", "ai",
+    "tensorflow", "pytorch", "scikit-learn", "nlp",
+    "llms", "data science"
+}
+STAT_COLUMNS = ["name", "counts", "share", "percentage", "wilson_lower", "wilson_lower_pct"]
 
 
 class WilsonNecessityWidget:
@@ -25,7 +31,7 @@ class WilsonNecessityWidget:
         if skills_col not in df.columns:
             raise ValueError(f"Column '{skills_col}' not found.")
 
-        self.df = df.copy()
+        self.df = df     # read-only; the job x skill matrix is built from it on run()
         self.skills_col = skills_col
 
         self.min_support = min_support
@@ -36,15 +42,51 @@ class WilsonNecessityWidget:
         self.collapse_ml = collapse_ml
         self.drop_ml_originals = drop_ml_originals
         self.ml_name = ml_name
-        self.ml_terms = ml_terms or {
-            "ml", "machine learning", "deep learning", "ai",
-            "tensorflow", "pytorch", "scikit-learn", "nlp",
-            "llms", "data science"
-        }
+        self.ml_terms = ml_terms or ML_TERMS
 
-        self.n_posts = len(self.df)
+        self.n_posts = self.df[POST_ID].nunique() if is_exploded(self.df) else len(self.df)
+        self.skill_counts = None   # set by from_counts()
+        self.ml_jobs = None        # posts listing any ML term, from from_counts(ml_jobs=...)
+        self.stats = None          # set by from_stats()
+        self.matrix = None         # SkillMatrix; built lazily or set by from_matrix()
         self.data = None
 
+    @classmethod
+    def from_counts(cls, skill_counts: pd.Series, n_posts: int, ml_jobs: int | None = None, **kwargs):
+        """
+        Build from pre-aggregated counts (skill -> number of posts, e.g. Database.skill_counts())
+        instead of a per-post frame. n_posts is the Wilson denominator; ml_jobs, the posts
+        listing any ML term (Database.any_skill_jobs), makes the merged ML row exact.
+        """
+        skills_col = kwargs.get("skills_col", "skills")
+        widget = cls(pd.DataFrame({skills_col: []}), **kwargs)
+        widget.skill_counts = skill_counts
+        widget.n_posts = int(n_posts)
+        widget.ml_jobs = ml_jobs
+        return widget
+
+    @classmethod
+    def from_matrix(cls, matrix: SkillMatrix, **kwargs):
+        """Build from an existing job x skill SkillMatrix (shared with other analyses)."""
+        skills_col = kwargs.get("skills_col", "skills")
+        widget = cls(pd.DataFrame({skills_col: []}), **kwargs)
+        widget.matrix = matrix
+        widget.n_posts = matrix.n_jobs
+        return widget
+
+    @classmethod
+    def from_stats(cls, stats: pd.DataFrame, n_posts: int, **kwargs):
+        """
+        Build from per-skill rows that already carry counts, shares and Wilson bounds
+        (STAT_COLUMNS, e.g. one keyword of batch_analysis.BatchAnalysis.wilson_stats());
+        run() only thresholds and labels them.
+        """
+        skills_col = kwargs.get("skills_col", "skills")
+        widget = cls(pd.DataFrame({skills_col: []}), **kwargs)
+        widget.stats = stats
+        widget.n_posts = int(n_posts)
+        return widget
+
     # ---------- Core Math ----------
     @staticmethod
     def wilson_lower_vectorized(k, n, z=1.96):
@@ -55,48 +97,60 @@ class WilsonNecessityWidget:
         margin = z * np.sqrt((p * (1 - p) / n) + z2 / (4 * n**2))
         return (center - margin) / denom
 
-    @staticmethod
-    def clean_and_split(s):
-        if pd.isna(s):
-            return []
-        return sorted(set(p.strip().lower() for p in str(s).split(",") if p.strip()))
-
     # ---------- Data Prep ----------
     def _build_counts(self):
-        self.df["skill_list"] = self.df[self.skills_col].apply(self.clean_and_split)
-        counts = self.df["skill_list"].explode().value_counts()
-
-        data = pd.DataFrame({
-            "name": counts.index,
-            "counts": counts.values
+        if self.stats is not None:
+            return self.stats[STAT_COLUMNS].reset_index(drop=True)
+
+        if self.skill_counts is not None:
+            counts = self.skill_counts.sort_values(ascending=False)
+            return self._collapse_ml(self._frame(counts.index.to_numpy(), counts.to_numpy()))
+
+        if self.matrix is None:
+            self.matrix = SkillMatrix.from_frame(self.df, self.skills_col)
+        m = self.matrix
+        if self.collapse_ml:
+            ml = [s for s in m.skills if str(s).lower() in self.ml_terms]
+            m = m.collapse(ml, self.ml_name, drop_originals=self.drop_ml_originals)
+
+        counts = m.column_counts()
+        order = np.argsort(-counts, kind="stable")
+        return self._frame(m.skills[order], counts[order])
+
+    def _frame(self, names, counts):
+        """One vectorized pass: shares and Wilson lower bounds for every skill."""
+        counts = np.asarray(counts, dtype=np.int64)
+        share = counts / self.n_posts
+        wilson = self.wilson_lower_vectorized(counts, self.n_posts)
+        return pd.DataFrame({
+            "name": names,
+            "counts": counts,
+            "share": share,
+            "percentage": share * 100,
+            "wilson_lower": wilson,
+            "wilson_lower_pct": wilson * 100
         })
 
-        data["share"] = data["counts"] / self.n_posts
-        data["percentage"] = data["share"] * 100
-        data["wilson_lower"] = self.wilson_lower_vectorized(data["counts"], self.n_posts)
-        data["wilson_lower_pct"] = data["wilson_lower"] * 100
-
-        return data.reset_index(drop=True)
-
     # ---------- ML Collapse ----------
     def _collapse_ml(self, data):
+        """
+        Count-only path (from_counts): the ML row counts the posts listing any ML term,
+        as the matrix path's OR does. That union comes from ml_jobs; without it the
+        counts are summed instead, an upper bound when a post lists several (capped at n).
+        """
         if not self.collapse_ml:
             return data
 
         ml_mask = data["name"].str.lower().isin(self.ml_terms)
-        ml_total = data.loc[ml_mask, "counts"].sum()
+        if self.ml_jobs is not None:
+            ml_total = int(self.ml_jobs)
+        else:
+            ml_total = min(int(data.loc[ml_mask, "counts"].sum()), self.n_posts)
 
         if ml_total == 0:
             return data
 
-        ml_row = pd.DataFrame([{
-            "name": self.ml_name,
-            "counts": ml_total,
-            "share": ml_total / self.n_posts,
-            "percentage": (ml_total / self.n_posts) * 100,
-            "wilson_lower": self.wilson_lower_vectorized(ml_total, self.n_posts),
-            "wilson_lower_pct": self.wilson_lower_vectorized(ml_total, self.n_posts) * 100
-        }])
+        ml_row = self._frame([self.ml_name], [ml_total])
 
         if self.drop_ml_originals:
             data = data.loc[~ml_mask]
@@ -104,61 +158,40 @@ class WilsonNecessityWidget:
         return pd.concat([data, ml_row], ignore_index=True)
 
     # ---------- Labeling ----------
-    def _label(self, row):
-        if row["counts"] < self.min_support:
-            return "Other"
-        if row["wilson_lower_pct"] >= self.nec_wlb_pct:
-            return "Necessary"
-        if self.nice_min_pct <= row["percentage"] < self.nice_max_pct:
-            return "Better-to-have"
-        return "Other"
+    def _labels(self, data):
+        return np.select(
+            [
+                data["counts"].to_numpy() < self.min_support,
+                data["wilson_lower_pct"].to_numpy() >= self.nec_wlb_pct,
+                (data["percentage"].to_numpy() >= self.nice_min_pct) & (data["percentage"].to_numpy() < self.nice_max_pct),
+            ],
+            ["Other", "Necessary", "Better-to-have"],
+            default="Other",
+        )
 
     # ---------- Public API ----------
     def run(self):
         data = self._build_counts()
-        data = self._collapse_ml(data)
 
         # ---- Auto-set threshold if not provided ----
         if self.nec_wlb_pct is None:
             self.nec_wlb_pct = np.percentile(data["wilson_lower_pct"], 75)
 
-        data["label"] = data.apply(self._label, axis=1)
+        data["label"] = self._labels(data)
         self.data = data
         return data.sort_values("wilson_lower_pct", ascending=False)
 
     # ---------- Plot ----------
-    def plot(self, annotate_top=12):
+    def spec(self, annotate_top=12) -> dict:
+        """run() results as a plots.wilson_spec (what /api/wilson returns)."""
         if self.data is None:
             raise RuntimeError("Call .run() first.")
+        return plots.wilson_spec(self.data, self.nec_wlb_pct, self.nice_min_pct, self.nice_max_pct, annotate_top)
 
-        d = self.data[self.data["counts"] > 0]
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.axhspan(self.nice_min_pct, self.nice_max_pct, alpha=0.08)
-        ax.axvline(self.nec_wlb_pct, linestyle="--", alpha=0.7)
-
-        for label, g in d.groupby("label"):
-            ax.scatter(g["wilson_lower_pct"], g["percentage"],
-                       s=np.clip(g["counts"] * 3, 30, 500),
-                       alpha=0.8, label=label)
-
-        top = d.nlargest(annotate_top, "counts")
-        for _, r in top.iterrows():
-            ax.annotate(r["name"], (r["wilson_lower_pct"], r["percentage"]),
-                        xytext=(4, 4), textcoords="offset points", fontsize=8)
-
-        ax.set_xlabel("Wilson Lower (%) — Conservative Commonness")
-        ax.set_ylabel("Raw Share (%)")
-        ax.set_title("Necessary vs Better-to-Have Skills")
-        ax.legend(frameon=False)
-        ax.grid(alpha=0.2)
-        plt.tight_layout()
-        return fig, ax
-
-    def plot_base64(self, dpi=150):
-        fig, ax = self.plot()
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
-        plt.close(fig)
-        return base64.b64encode(buf.getvalue()).decode("ascii")
+    def plot(self, annotate_top=12):
+        fig = plots.draw(self.spec(annotate_top))
+        return fig, fig.axes[0]
 
+    def plot_base64(self, dpi=None, fmt=None, max_bytes=None):
+        """base64 image; fmt/dpi/max_bytes as in plots.render (None = PLOT_* defaults)."""
+        return plots.render(self.spec(), dpi=dpi, fmt=fmt, max_bytes=max_bytes)
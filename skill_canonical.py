@@ -0,0 +1,192 @@
+import os
+import re
+import json
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from skill_parsing import POST_ID
+
+
+class SkillCanonicalizer:
+    """
+    Collapses synonym variants ("Amazon Web Services", "aws cloud" -> "aws") onto one
+    canonical skill name, backed by a persistent alias -> canonical JSON map.
+
+    Resolution order for a skill not yet in the map:
+      1) seed aliases (SEED_ALIASES)
+      2) normalization key: case, whitespace, punctuation and generic suffixes
+         ("node.js" / "Node JS" / "nodejs") matching a known alias or canonical
+      3) embedding similarity >= similarity_threshold to a known canonical (optional)
+      4) otherwise the skill becomes a new canonical
+    New skills are resolved most-frequent first, so the common spelling wins.
+
+    Usage:
+        canon = SkillCanonicalizer("data/skill_aliases.json")
+        exploded = canon.apply(exploded)        # exploded = skill_parsing.explode_skills(df)
+    """
+
+    SEED_ALIASES = {
+        "amazon web services": "aws",
+        "aws cloud": "aws",
+        "google cloud platform": "gcp",
+        "google cloud": "gcp",
+        "microsoft azure": "azure",
+        "node": "node.js",
+        "js": "javascript",
+        "ts": "typescript",
+        "k8s": "kubernetes",
+        "postgres": "postgresql",
+        "python3": "python",
+        "python 3": "python",
+        "sklearn": "scikit-learn",
+        "golang": "go",
+        "csharp": "c#",
+        "c sharp": "c#",
+        "cicd": "ci/cd",
+        "mongo": "mongodb",
+        "react.js": "react",
+        "vue.js": "vue",
+        "ms excel": "excel",
+        "microsoft excel": "excel",
+    }
+
+    _SUFFIXES = re.compile(r"\s+(language|framework|library|programming)$")
+    _PUNCT = re.compile(r"[\s.\-_/]+")
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        use_embeddings: bool = True,
+        similarity_threshold: float = 0.9,
+        model_name: str = "all-MiniLM-L6-v2",
+    ) -> None:
+        """
+        path defaults to $SKILL_ALIASES_PATH, then data/skill_aliases.json.
+        """
+        self.path = path or os.getenv("SKILL_ALIASES_PATH", os.path.join("data", "skill_aliases.json"))
+        self.use_embeddings = use_embeddings
+        self.similarity_threshold = similarity_threshold
+        self.model_name = model_name
+        self._lock = threading.Lock()
+
+        self.aliases: Dict[str, str] = dict(self.SEED_ALIASES)
+        for canonical in set(self.SEED_ALIASES.values()):
+            self.aliases[canonical] = canonical
+        self.aliases.update(self._load())
+        self._keys: Dict[str, str] = {}
+        for alias, canonical in self.aliases.items():
+            self._keys.setdefault(self.rule_key(alias), canonical)
+
+    # ---------- public API ----------
+    @classmethod
+    def base_name(cls, skill: str) -> str:
+        """Lower-cased, whitespace-collapsed skill without a generic suffix ("spark framework" -> "spark")."""
+        s = " ".join(str(skill).lower().split())
+        return cls._SUFFIXES.sub("", s) or s
+
+    @classmethod
+    def rule_key(cls, skill: str) -> str:
+        """Normalization key; two skills with the same key are the same skill."""
+        return cls._PUNCT.sub("", cls.base_name(skill))
+
+    def canonicalize(self, skills: pd.Series) -> pd.Series:
+        """Maps a Series of (normalized) skill names to canonical names."""
+        counts = skills.value_counts()
+        new = [s for s in counts.index if s not in self.aliases]
+        if new:
+            with self._lock:
+                self._resolve([s for s in new if s not in self.aliases])
+        return skills.map(self.aliases).fillna(skills)
+
+    def apply(self, exploded: pd.DataFrame, skills_col: str = "skills") -> pd.DataFrame:
+        """
+        Canonicalizes an exploded skills frame and drops the per-post duplicates
+        that collapsing synonyms creates.
+        """
+        out = exploded.assign(**{skills_col: self.canonicalize(exploded[skills_col])})
+        keys = [POST_ID, skills_col] if POST_ID in out.columns else None
+        return out.drop_duplicates(subset=keys).reset_index(drop=True)
+
+    def save(self) -> None:
+        """Merges with the map on disk and writes it atomically."""
+        with self._lock:
+            self._write()
+
+    # ---------- helpers ----------
+    def _load(self) -> Dict[str, str]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[warn] Could not read skill aliases from {self.path}: {e}")
+            return {}
+
+    def _write(self) -> None:
+        merged = {**self._load(), **self.aliases}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(merged, f, ensure_ascii=False, sort_keys=True, indent=0)
+        os.replace(tmp, self.path)
+
+    def _resolve(self, new_skills: List[str]) -> None:
+        """new_skills must be ordered most-frequent first."""
+        known = len(self.aliases)       # aliases are only ever added, so a longer map means a change
+        unresolved = []
+        for skill in new_skills:
+            canonical = self._keys.get(self.rule_key(skill))
+            if canonical is not None:
+                self.aliases[skill] = canonical
+            else:
+                unresolved.append(skill)
+
+        if unresolved and self.use_embeddings:
+            unresolved = self._resolve_by_embedding(unresolved)
+
+        for skill in unresolved:
+            canonical = self._keys.setdefault(self.rule_key(skill), self.base_name(skill))
+            self.aliases[skill] = canonical
+            self.aliases.setdefault(canonical, canonical)
+
+        if len(self.aliases) != known:
+            self._write()
+
+    def _resolve_by_embedding(self, skills: List[str]) -> List[str]:
+        """
+        Aliases skills close enough to an existing (or earlier new) canonical and
+        registers the others as canonicals; returns the skills still unresolved (none).
+        """
+        from embedding_store import get_store
+
+        store = get_store(self.model_name)
+        vocab = sorted(set(self.aliases.values()))
+        vocab_emb = store.encode(vocab)
+        new_emb = store.encode(skills)
+
+        canon_names = list(vocab)
+        canon_mat = np.asarray(vocab_emb, dtype=np.float32).reshape(len(vocab), -1)
+        for skill, vec in zip(skills, np.asarray(new_emb, dtype=np.float32)):
+            key = self.rule_key(skill)
+            if key in self._keys:
+                self.aliases[skill] = self._keys[key]
+                continue
+            if len(canon_names):
+                sims = canon_mat @ vec
+                best = int(np.argmax(sims))
+                if sims[best] >= self.similarity_threshold:
+                    self.aliases[skill] = canon_names[best]
+                    self._keys.setdefault(key, canon_names[best])
+                    continue
+            # becomes a canonical itself; later new skills in this batch can match it
+            canonical = self.base_name(skill)
+            self._keys[key] = canonical
+            self.aliases[skill] = canonical
+            self.aliases.setdefault(canonical, canonical)
+            canon_names.append(canonical)
+            canon_mat = np.vstack([canon_mat, vec[None, :]]) if canon_mat.size else vec[None, :]
+        return []
@@ -0,0 +1,284 @@
+import os
+import json
+import time
+import threading
+import contextlib
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:     # non-POSIX: updates are only serialized within the process
+    fcntl = None
+
+from embedding_store import get_store
+from model_registry import DEFAULT_MODEL
+from skill_clustering import DISTANCE_THRESHOLD, cluster_embeddings
+
+
+OTHER = "other"     # skills not assigned yet, in lookup-only calls (assign_new=False)
+
+
+class CategoryModel:
+    """
+    Persistent skill -> category assignment, so category names and memberships stay
+    stable between runs instead of being reclustered from scratch on every request.
+
+    Each category has a representative name, members (skill -> largest count seen)
+    and a centroid (mean member embedding). Only names and members are stored
+    (JSON); centroids are rebuilt from the EmbeddingStore on load.
+
+    New skills join the nearest centroid within distance_threshold or seed a new
+    category, most frequent first. recluster() periodically rebuilds everything with
+    skill_clustering and keeps existing names where a cluster mostly descends from
+    an existing category.
+
+    Updates (load -> assign -> save) run under an exclusive lock on <path>.lock, so
+    worker processes extend each other's model instead of overwriting it.
+
+    Usage:
+        from skill_categories import get_category_model
+        categories = get_category_model().categorize(skill_counts)   # skill -> count Series
+        by_keyword = get_category_model().categorize_many(counts)    # (keyword, skill) -> count Series
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        model_name: str = DEFAULT_MODEL,
+        distance_threshold: float = DISTANCE_THRESHOLD,
+    ) -> None:
+        """path defaults to $SKILL_CATEGORIES_PATH, then data/skill_categories.json."""
+        self.path = path or os.getenv("SKILL_CATEGORIES_PATH", os.path.join("data", "skill_categories.json"))
+        self.model_name = model_name
+        self.distance_threshold = distance_threshold
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._reset()
+        self._load()
+
+    # ---------- public API ----------
+    def categorize(self, skill_counts: pd.Series, assign_new: bool = True) -> List[dict]:
+        """
+        Returns one entry per category present in skill_counts:
+        {"category", "total_jobs", "examples", "num_skills"} (the analyze_top_skills format).
+        assign_new=False only looks skills up: unseen ones are summed into OTHER and
+        nothing is embedded (for request paths that must stay cheap).
+        """
+        counts = skill_counts.sort_values(ascending=False, kind="stable")
+        cat_ids, names = self._lookup(counts, assign_new)
+        return [self._summary(names[cat_id], group) for cat_id, group in counts.groupby(cat_ids, sort=False)]
+
+    def categorize_many(self, skill_counts: pd.Series) -> Dict[str, List[dict]]:
+        """
+        categorize() for several keywords at once; skill_counts is indexed by (keyword, skill).
+        Skills new to the model are embedded and assigned once over the union of all
+        keywords, then every keyword is summarized in one groupby.
+        """
+        counts = skill_counts.sort_values(ascending=False, kind="stable")
+        skills = counts.index.get_level_values(1)
+        totals = counts.groupby(skills).max().sort_values(ascending=False, kind="stable")
+        ids, names = self._lookup(totals)
+        cat_ids = skills.map(pd.Series(ids, index=totals.index)).to_numpy()
+
+        out: Dict[str, List[dict]] = {}
+        for (keyword, cat_id), group in counts.groupby([counts.index.get_level_values(0), cat_ids], sort=False):
+            out.setdefault(keyword, []).append(self._summary(names[cat_id], group.droplevel(0)))
+        return out
+
+    def recluster(self) -> None:
+        """Full rebuild over every known skill; compacts drifted or fragmented categories."""
+        with self._lock, self._file_lock():
+            self._load()
+            weights = {s: w for members in self.members for s, w in members.items()}
+            if not weights:
+                return
+            skills = sorted(weights, key=weights.get, reverse=True)
+            w = np.array([weights[s] for s in skills], dtype=np.float64)
+            emb = get_store(self.model_name).encode(skills)
+            labels = cluster_embeddings(emb, weights=w, distance_threshold=self.distance_threshold)
+
+            old_names, old_of = self.names, dict(self.skill_to_cat)
+            self._reset()
+            used = set()
+            for label in pd.unique(labels):
+                idx = np.flatnonzero(labels == label)      # already in descending weight order
+                # keep the name of the old category contributing the most weight
+                votes = pd.Series(w[idx]).groupby([old_of.get(skills[i], -1) for i in idx]).sum()
+                votes = votes[votes.index >= 0].sort_values(ascending=False)
+                name = next((old_names[c] for c in votes.index if old_names[c] not in used), skills[idx[0]])
+                used.add(name)
+                self._seed(name, {skills[i]: int(w[i]) for i in idx}, emb[idx])
+            self.reclustered_at = time.time()
+            self._save()
+            print(f"[info] Reclustered {len(skills)} skills into {len(self.names)} categories")
+
+    def maybe_recluster(self, max_age_days: float = 7.0) -> bool:
+        """Runs recluster() if the last one is older than max_age_days."""
+        if time.time() - (self.reclustered_at or 0) < max_age_days * 86400:
+            return False
+        self.recluster()
+        return True
+
+    # ---------- helpers ----------
+    def _reset(self) -> None:
+        self.names: List[str] = []
+        self.members: List[Dict[str, int]] = []
+        self.skill_to_cat: Dict[str, int] = {}
+        self._centroids = np.zeros((0, 0), dtype=np.float32)    # capacity-doubling buffer
+        self.sizes = np.zeros(0, dtype=np.float64)
+        self.reclustered_at = None
+
+    @property
+    def centroids(self) -> np.ndarray:
+        return self._centroids[:len(self.names)]
+
+    def _seed(self, name: str, members: Dict[str, int], emb: np.ndarray) -> int:
+        cat_id = len(self.names)
+        self.names.append(name)
+        self.members.append(dict(members))
+        for skill in members:
+            self.skill_to_cat[skill] = cat_id
+        centroid = emb.mean(axis=0)
+        centroid /= np.linalg.norm(centroid) or 1.0
+        if cat_id == len(self._centroids):
+            grown = np.zeros((max(16, 2 * cat_id), len(centroid)), dtype=np.float32)
+            if cat_id:
+                grown[:cat_id] = self._centroids[:cat_id]
+            self._centroids = grown
+            sizes = np.zeros(len(grown))
+            sizes[:cat_id] = self.sizes[:cat_id]
+            self.sizes = sizes
+        self._centroids[cat_id] = centroid
+        self.sizes[cat_id] = len(members)
+        return cat_id
+
+    def _join(self, cat_id: int, skill: str, count: int, vec: np.ndarray) -> None:
+        self.members[cat_id][skill] = max(count, self.members[cat_id].get(skill, 0))
+        self.skill_to_cat[skill] = cat_id
+        n = self.sizes[cat_id]
+        centroid = self._centroids[cat_id] * n + vec
+        self._centroids[cat_id] = centroid / (np.linalg.norm(centroid) or 1.0)
+        self.sizes[cat_id] = n + 1
+
+    def _assign(self, new: List[str], counts: pd.Series) -> None:
+        """new must be ordered most-frequent first."""
+        emb = get_store(self.model_name).encode(new)
+        min_sim = 1.0 - self.distance_threshold
+
+        best = np.full(len(new), -1)
+        if len(self.names):
+            sims = emb @ self.centroids.T
+            arg = sims.argmax(axis=1)
+            ok = sims[np.arange(len(new)), arg] >= min_sim
+            best[ok] = arg[ok]
+
+        first_new = len(self.names)
+        for skill, vec, cat_id in zip(new, emb, best):
+            count = int(counts[skill])
+            if cat_id < 0 and len(self.names) > first_new:
+                s = self.centroids[first_new:] @ vec
+                b = int(s.argmax())
+                if s[b] >= min_sim:
+                    cat_id = first_new + b
+            if cat_id >= 0:
+                self._join(int(cat_id), skill, count, vec)
+            else:
+                self._seed(skill, {skill: count}, vec[None, :])
+
+    def _lookup(self, counts: pd.Series, assign_new: bool = True):
+        """
+        Assigns unseen skills of counts (ordered most-frequent first); returns (cat ids aligned
+        with counts, names). With assign_new=False unseen skills get the id of a trailing OTHER.
+        """
+        with self._lock:
+            self._load()
+            if not assign_new:
+                other = len(self.names)
+                ids = np.fromiter((self.skill_to_cat.get(s, other) for s in counts.index), dtype=np.int64, count=len(counts))
+                return ids, self.names + [OTHER]
+            if any(s not in self.skill_to_cat for s in counts.index):
+                with self._file_lock():
+                    self._load()        # another worker may have assigned some of them meanwhile
+                    new = [s for s in counts.index if s not in self.skill_to_cat]
+                    if new:
+                        self._assign(new, counts)
+                        self._save()
+            return counts.index.map(self.skill_to_cat).to_numpy(), list(self.names)
+
+    @staticmethod
+    def _summary(name: str, group: pd.Series) -> dict:
+        return {
+            "category": name.title(),
+            "total_jobs": int(group.sum()),
+            "examples": [s.title() for s in group.index[:4]],
+            "num_skills": len(group)
+        }
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared by all processes using self.path (as in EmbeddingStore._append)."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        """(Re)reads the model if the file changed since the last load (e.g. another worker wrote it)."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[warn] Could not read skill categories from {self.path}: {e}")
+            return
+
+        self._reset()
+        cats = state.get("categories", [])
+        skills = [s for cat in cats for s in cat["members"]]
+        emb = get_store(self.model_name).encode(skills)
+        start = 0
+        for cat in cats:
+            end = start + len(cat["members"])
+            self._seed(cat["name"], cat["members"], emb[start:end])
+            start = end
+        self.reclustered_at = state.get("reclustered_at")
+        self._mtime = mtime
+
+    def _save(self) -> None:
+        state = {
+            "model": self.model_name,
+            "distance_threshold": self.distance_threshold,
+            "reclustered_at": self.reclustered_at,
+            "categories": [{"name": n, "members": m} for n, m in zip(self.names, self.members)],
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+
+_model: Optional[CategoryModel] = None
+_model_lock = threading.Lock()
+
+
+def get_category_model() -> CategoryModel:
+    """Process-wide CategoryModel."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = CategoryModel()
+        return _model
@@ -0,0 +1,84 @@
+import numpy as np
+from typing import Optional
+
+
+DISTANCE_THRESHOLD = 0.35   # cosine distance; ~0.65 cosine similarity
+EXACT_MAX = 2000            # above this, the O(n^2) distance matrix gets too large
+
+
+def cluster_embeddings(
+    emb: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    distance_threshold: float = DISTANCE_THRESHOLD,
+    exact_max: int = EXACT_MAX,
+) -> np.ndarray:
+    """
+    Cluster L2-normalized embeddings by cosine distance; returns integer labels.
+
+    n <= exact_max: exact average-linkage AgglomerativeClustering (full distance matrix).
+    n >  exact_max: leader clustering at the same threshold, O(n * clusters) time and
+                    O(clusters * dim) extra memory. Items are visited by descending
+                    weight (e.g. mention counts), so the most common skill of each
+                    cluster is its leader.
+    """
+    emb = np.asarray(emb, dtype=np.float32)
+    n = len(emb)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if n == 1:
+        return np.zeros(1, dtype=np.int64)
+
+    if n <= exact_max:
+        from sklearn.cluster import AgglomerativeClustering
+
+        clustering = AgglomerativeClustering(
+            linkage="average",
+            metric="cosine",
+            distance_threshold=distance_threshold,
+            n_clusters=None
+        )
+        return clustering.fit_predict(emb)
+
+    order = np.argsort(-np.asarray(weights), kind="stable") if weights is not None else np.arange(n)
+    return leader_clustering(emb, order, distance_threshold)
+
+
+def leader_clustering(emb: np.ndarray, order: np.ndarray, distance_threshold: float, block: int = 1024) -> np.ndarray:
+    """
+    Single pass: each item joins the most similar existing leader within the threshold,
+    otherwise it becomes a new leader. Items are matched against the leaders known at
+    the start of their block in one matrix product; only the leftovers are handled
+    one by one against the leaders created inside the block.
+    """
+    n, dim = emb.shape
+    min_sim = 1.0 - distance_threshold
+    labels = np.full(n, -1, dtype=np.int64)
+    leaders = np.empty((min(n, 1024), dim), dtype=np.float32)
+    n_leaders = 0
+
+    for start in range(0, n, block):
+        idx = order[start:start + block]
+        pending = idx
+        if n_leaders:
+            sims = emb[idx] @ leaders[:n_leaders].T
+            best = sims.argmax(axis=1)
+            ok = sims[np.arange(len(idx)), best] >= min_sim
+            labels[idx[ok]] = best[ok]
+            pending = idx[~ok]
+
+        first_new = n_leaders
+        for i in pending:
+            v = emb[i]
+            if n_leaders > first_new:
+                s = leaders[first_new:n_leaders] @ v
+                b = int(s.argmax())
+                if s[b] >= min_sim:
+                    labels[i] = first_new + b
+                    continue
+            if n_leaders == len(leaders):
+                leaders = np.concatenate([leaders, np.empty_like(leaders)])
+            leaders[n_leaders] = v
+            labels[i] = n_leaders
+            n_leaders += 1
+
+    return labels
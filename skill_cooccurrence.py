@@ -0,0 +1,212 @@
+import os
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from typing import Dict, Iterable, List, Optional
+
+from cache_utils import TTLCache
+from skill_matrix import SkillMatrix
+
+
+METRICS = ("lift", "pmi", "jobs", "confidence")
+
+# per-keyword indexes, per worker; keys start with the keyword. Entries expire after the
+# TTL (new postings show up within it) or when invalidate_cooccurrence() runs.
+_index_cache = TTLCache(maxsize=32, ttl=float(os.getenv("COOCCURRENCE_CACHE_TTL", "900")))
+
+
+class SkillCooccurrence:
+    """
+    Which skills are mentioned together, from the sparse product C = Xᵀ·X of a
+    binary job x skill matrix X (see skill_matrix). C[a, b] = jobs listing both a and b.
+
+    For a pair with C[a, b] = n_ab, skill counts n_a, n_b and N jobs:
+        lift       = n_ab * N / (n_a * n_b)     (> 1: together more often than by chance)
+        pmi        = log2(lift)
+        confidence = n_ab / n_a                 (share of a's jobs that also list b)
+
+    Scores are kept only for the stored entries of C, so memory is O(co-occurring
+    pairs); top-k per skill uses argpartition on one CSR row.
+
+    Usage:
+        from skill_cooccurrence import SkillCooccurrence
+        co = SkillCooccurrence.from_pairs(view["JobId"], view["SkillName"])
+        co = SkillCooccurrence.from_pair_counts(*db.skill_pairs("data science"))   # aggregated in the database
+        co.related("python", k=5)                     # DataFrame(skill, jobs, lift, pmi, confidence)
+        co.recommend(["python", "sql"], k=5)          # best partners of a set of skills
+    """
+
+    def __init__(self, matrix: SkillMatrix, min_count: int = 2, min_pair: int = 2) -> None:
+        """
+        min_count: ignore skills listed by fewer jobs; min_pair: ignore pairs seen in fewer
+        jobs (lift on one or two postings is mostly noise).
+        """
+        X = matrix.X.astype(np.int32)
+        self._index(matrix.skills, (X.T @ X).tocsr(), matrix.column_counts(), matrix.n_jobs, min_count, min_pair)
+
+    # ---------- constructors ----------
+    @classmethod
+    def from_pairs(cls, job_ids, skills, **kwargs) -> "SkillCooccurrence":
+        """From parallel (job, skill) arrays, e.g. job_skill_view's JobId / SkillName."""
+        return cls(SkillMatrix.from_pairs(job_ids, skills), **kwargs)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, skills_col: str = "skills", **kwargs) -> "SkillCooccurrence":
+        """From a raw or exploded posts frame (see SkillMatrix.from_frame)."""
+        return cls(SkillMatrix.from_frame(df, skills_col), **kwargs)
+
+    @classmethod
+    def from_pair_counts(cls, pairs: pd.DataFrame, n_jobs: int, min_count: int = 2, min_pair: int = 2) -> "SkillCooccurrence":
+        """
+        From pair counts aggregated elsewhere (Database.skill_pairs): DataFrame(SkillA, SkillB, Jobs)
+        with SkillA <= SkillB, a SkillA == SkillB row holding each skill's job count, and
+        n_jobs jobs in total. No job x skill rows are needed.
+        """
+        skills = pd.unique(pd.concat([pairs["SkillA"], pairs["SkillB"]], ignore_index=True).to_numpy(dtype=object))
+        vocab = {s: i for i, s in enumerate(skills)}
+        a = pairs["SkillA"].map(vocab).to_numpy(dtype=np.int64)
+        b = pairs["SkillB"].map(vocab).to_numpy(dtype=np.int64)
+        jobs = pairs["Jobs"].to_numpy(dtype=np.int64)
+
+        diag = a == b
+        counts = np.zeros(len(skills), dtype=np.int64)
+        counts[a[diag]] = jobs[diag]
+        off = ~diag
+        rows, cols = np.concatenate([a[off], b[off]]), np.concatenate([b[off], a[off]])
+        C = sp.csr_matrix((np.concatenate([jobs[off], jobs[off]]), (rows, cols)), shape=(len(skills), len(skills)))
+
+        co = cls.__new__(cls)
+        co._index(np.asarray(skills, dtype=object), C, counts, int(n_jobs), min_count, min_pair)
+        return co
+
+    def _index(self, skills: np.ndarray, C: sp.csr_matrix, counts: np.ndarray, n_jobs: int, min_count: int, min_pair: int) -> None:
+        """Keeps the pairs of C passing the thresholds and scores them."""
+        self.skills = skills
+        self.vocab = {s: i for i, s in enumerate(skills)}
+        self.n_jobs = n_jobs
+        self.counts = counts
+
+        C.sort_indices()
+        rows = np.repeat(np.arange(C.shape[0]), np.diff(C.indptr))
+        drop = (rows == C.indices) | (C.data < min_pair)
+        drop |= (self.counts[rows] < min_count) | (self.counts[C.indices] < min_count)
+        C.data[drop] = 0
+        C.eliminate_zeros()
+        self.C = C
+
+        rows = np.repeat(np.arange(C.shape[0]), np.diff(C.indptr))
+        n_a = self.counts[rows].astype(np.float64)
+        n_b = self.counts[C.indices].astype(np.float64)
+        n_ab = C.data.astype(np.float64)
+        lift = n_ab * self.n_jobs / (n_a * n_b)
+        self._scores: Dict[str, np.ndarray] = {
+            "lift": lift,
+            "pmi": np.log2(lift),
+            "jobs": n_ab,
+            "confidence": n_ab / n_a,
+        }
+
+    # ---------- queries ----------
+    @property
+    def n_pairs(self) -> int:
+        """Stored (a, b) pairs; each unordered pair is counted twice."""
+        return self.C.nnz
+
+    def related(self, skill: str, k: int = 10, metric: str = "lift") -> pd.DataFrame:
+        """Top k skills co-occurring with skill, best first (empty if unknown or too rare)."""
+        i = self.vocab.get(skill)
+        if i is None:
+            return self._frame(np.array([], dtype=np.int64), np.array([]))
+        lo, hi = self.C.indptr[i], self.C.indptr[i + 1]
+        cols = self.C.indices[lo:hi]
+        order = self._top(self._metric(metric)[lo:hi], k)
+        return self._frame(cols[order], np.arange(lo, hi)[order])
+
+    def top_related(self, k: int = 5, metric: str = "lift") -> Dict[str, List[str]]:
+        """skill -> its top k partners, for every skill with at least one partner."""
+        scores = self._metric(metric)
+        out = {}
+        for i in np.flatnonzero(np.diff(self.C.indptr)):
+            lo, hi = self.C.indptr[i], self.C.indptr[i + 1]
+            order = self._top(scores[lo:hi], k)
+            out[self.skills[i]] = self.skills[self.C.indices[lo:hi][order]].tolist()
+        return out
+
+    def recommend(self, skills: Iterable[str], k: int = 10, metric: str = "lift") -> pd.DataFrame:
+        """
+        Skills that go with a set: each candidate is scored by its best score against any
+        of the given skills; the given skills themselves are left out.
+        """
+        ids = np.unique([self.vocab[s] for s in skills if s in self.vocab])
+        if len(ids) == 0:
+            return self._frame(np.array([], dtype=np.int64), np.array([]))
+
+        positions = np.concatenate([np.arange(self.C.indptr[i], self.C.indptr[i + 1]) for i in ids])
+        scores = self._metric(metric)[positions]
+        cols = self.C.indices[positions]
+
+        # best entry per candidate column
+        order = np.lexsort((-scores, cols))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = cols[order][1:] != cols[order][:-1]
+        best = order[first]
+        best = best[~np.isin(cols[best], ids)]
+
+        top = best[self._top(scores[best], k)]
+        return self._frame(cols[top], positions[top])
+
+    # ---------- helpers ----------
+    def _metric(self, metric: str) -> np.ndarray:
+        if metric not in self._scores:
+            raise ValueError(f"metric must be one of {list(METRICS)}, got {metric!r}")
+        return self._scores[metric]
+
+    @staticmethod
+    def _top(values: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the k largest values, largest first (argpartition, then sort only k)."""
+        if k <= 0 or len(values) == 0:
+            return np.array([], dtype=np.int64)
+        if k < len(values):
+            part = np.argpartition(-values, k - 1)[:k]
+        else:
+            part = np.arange(len(values))
+        return part[np.argsort(-values[part], kind="stable")]
+
+    def _frame(self, cols: np.ndarray, positions: np.ndarray) -> pd.DataFrame:
+        positions = positions.astype(np.int64)
+        return pd.DataFrame({
+            "skill": self.skills[cols] if len(cols) else np.array([], dtype=object),
+            "jobs": self._scores["jobs"][positions].astype(np.int64),
+            "lift": self._scores["lift"][positions],
+            "pmi": self._scores["pmi"][positions],
+            "confidence": self._scores["confidence"][positions],
+        })
+
+
+def keyword_cooccurrence(db, keyword: str, **kwargs) -> SkillCooccurrence:
+    """
+    Index for keyword from the pair counts db.skill_pairs aggregates in the database
+    (any Database / LocalDatabase / PostgresCopyDatabase), cached per worker for
+    COOCCURRENCE_CACHE_TTL seconds; kwargs as for SkillCooccurrence.
+    """
+    def build():
+        pairs, n_jobs = db.skill_pairs(keyword, min_pair=kwargs.get("min_pair", 2))
+        return SkillCooccurrence.from_pair_counts(pairs, n_jobs, **kwargs)
+
+    key = (keyword, tuple(sorted(kwargs.items())))
+    return _index_cache.get_or_set(key, build)
+
+
+def invalidate_cooccurrence(keyword: Optional[str] = None) -> int:
+    """Drops cached indexes for keyword (all keywords if None)."""
+    return _index_cache.invalidate(None if keyword is None else (lambda key: key[0] == keyword))
+
+
+def related_summary(co: SkillCooccurrence, skills: Iterable[str], per_skill: int = 5, metric: str = "lift") -> Dict[str, List[str]]:
+    """skill -> names of its top partners, for display next to the charts or in a prompt."""
+    out = {}
+    for s in skills:
+        partners = co.related(s, k=per_skill, metric=metric)["skill"].tolist()
+        if partners:
+            out[s] = partners
+    return out
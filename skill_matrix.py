@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from typing import Dict, Iterable, Optional
+
+from skill_parsing import POST_ID, ensure_exploded, is_exploded
+
+
+class SkillMatrix:
+    """
+    Binary job x skill incidence matrix (scipy.sparse CSR) with interned skill ids.
+
+    X[j, s] = 1 if job j mentions skill s; column s is named skills[s].
+    Memory is O(job-skill pairs): int32 indices plus one byte per pair.
+
+    Usage:
+        from skill_matrix import SkillMatrix
+        m = SkillMatrix.from_frame(df, "skills")      # raw or exploded frame
+        counts = m.column_counts()                    # jobs per skill, aligned with m.skills
+        has_ml = m.any_of(["ml", "pytorch"])          # per-job OR of several skills
+    """
+
+    def __init__(self, X: sp.csr_matrix, skills: np.ndarray) -> None:
+        self.X = X
+        self.skills = np.asarray(skills, dtype=object)
+        self.vocab: Dict[str, int] = {s: i for i, s in enumerate(self.skills)}
+
+    # ---------- constructors ----------
+    @classmethod
+    def from_pairs(cls, job_ids, skills, n_jobs: Optional[int] = None) -> "SkillMatrix":
+        """
+        From parallel arrays of (job, skill) pairs. Job ids are interned as well,
+        unless they are already positions 0..n_jobs-1 (n_jobs given); duplicates collapse to 1.
+        """
+        skill_codes, vocab = pd.factorize(pd.Series(skills, dtype=object), sort=False)
+        if n_jobs is None:
+            job_codes, uniques = pd.factorize(pd.Series(job_ids), sort=False)
+            n_jobs = len(uniques)
+        else:
+            job_codes = np.asarray(job_ids, dtype=np.int64)
+        valid = skill_codes >= 0        # missing skills
+        return cls.from_codes(job_codes[valid], skill_codes[valid], vocab.to_numpy(), n_jobs)
+
+    @classmethod
+    def from_codes(cls, job_codes, skill_codes, skills, n_jobs: int) -> "SkillMatrix":
+        """
+        From already interned pairs: job_codes in 0..n_jobs-1, skill_codes indexing skills
+        (e.g. pandas categorical codes, see analysis_frame). Duplicates collapse to 1.
+        """
+        X = sp.csr_matrix(
+            (np.ones(len(skill_codes), dtype=np.int8), (job_codes, skill_codes)),
+            shape=(n_jobs, len(skills)),
+        )
+        X.sum_duplicates()
+        X.data[:] = 1
+        return cls(X, skills)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, skills_col: str = "skills") -> "SkillMatrix":
+        """
+        From a raw posts frame (one row per post; posts without skills stay as empty
+        rows) or an exploded one (one row per post-skill; see skill_parsing).
+        """
+        if is_exploded(df):
+            return cls.from_pairs(df[POST_ID].to_numpy(), df[skills_col].to_numpy())
+        exploded = ensure_exploded(df[[skills_col]], skills_col)
+        return cls.from_pairs(exploded[POST_ID].to_numpy(), exploded[skills_col].to_numpy(), n_jobs=len(df))
+
+    # ---------- queries ----------
+    @property
+    def n_jobs(self) -> int:
+        return self.X.shape[0]
+
+    def column_counts(self) -> np.ndarray:
+        """Jobs per skill (column sums), aligned with self.skills."""
+        return np.bincount(self.X.indices, minlength=len(self.skills))
+
+    def ids(self, names: Iterable[str]) -> np.ndarray:
+        """Column ids of the known skills among names (unknown names are skipped)."""
+        return np.array([self.vocab[n] for n in names if n in self.vocab], dtype=np.int64)
+
+    def any_of(self, names: Iterable[str]) -> np.ndarray:
+        """Boolean per job: mentions at least one of names (sparse column OR)."""
+        cols = self.ids(names)
+        if len(cols) == 0:
+            return np.zeros(self.n_jobs, dtype=bool)
+        return self.X[:, cols].getnnz(axis=1) > 0
+
+    def collapse(self, names: Iterable[str], new_name: str, drop_originals: bool = True) -> "SkillMatrix":
+        """
+        Replaces the columns of names with one column `new_name` = their OR, so a job
+        mentioning several of them counts once. Returns a new SkillMatrix.
+        """
+        cols = self.ids(names)
+        if len(cols) == 0:
+            return self
+        merged = sp.csr_matrix(self.any_of(self.skills[cols]).astype(np.int8)[:, None])
+        keep = np.ones(len(self.skills), dtype=bool)
+        if drop_originals:
+            keep[cols] = False
+        X = sp.hstack([self.X[:, np.flatnonzero(keep)], merged], format="csr", dtype=np.int8)
+        return SkillMatrix(X, np.append(self.skills[keep], new_name))
@@ -0,0 +1,61 @@
+import pandas as pd
+
+
+POST_ID = "post_id"
+
+# "['Python', 'SQL']" (a stringified list, e.g. read back from CSV) -> "'Python', 'SQL'"
+_LIST_WRAPPER = r"^\s*\[|\]\s*$"
+_SEPARATORS = r"[,;]"
+_QUOTES = " \t\r\n'\""
+
+
+def explode_skills(df: pd.DataFrame, skills_col: str = "skills") -> pd.DataFrame:
+    """
+    Canonical exploded skills frame: one row per (post, skill).
+
+    Accepts python lists, comma/semicolon separated strings and stringified lists in
+    skills_col. Skills are stripped, lower-cased and de-duplicated within a post, and
+    empty values dropped. All other columns are kept; POST_ID holds the position of
+    the source row in df, so the number of posts is df[POST_ID].nunique().
+    """
+    base = df.reset_index(drop=True)
+    s = base[skills_col]
+
+    # strings are split in one vectorized pass (.str gives NaN for anything else); only
+    # that remainder (lists, numbers) is type-checked row by row
+    from_strings = _split_text(s)
+    rest = s[from_strings.isna() & s.notna()]
+    is_list = rest.map(lambda x: isinstance(x, (list, tuple, set)))
+    from_lists = rest[is_list].explode()
+    from_other = _split_text(rest[~is_list].astype(str))
+
+    skills = pd.concat([from_strings.explode(), from_lists, from_other.explode()]).dropna()
+    skills = skills.astype(str).str.strip(_QUOTES).str.lower()
+    skills = skills[(skills != "") & (skills != "nan")]
+
+    pairs = (
+        pd.DataFrame({POST_ID: skills.index.to_numpy(), skills_col: skills.to_numpy()})
+        .drop_duplicates()
+        .sort_values(POST_ID, kind="stable")
+    )
+    rest = base.drop(columns=[skills_col]).take(pairs[POST_ID].to_numpy())
+    rest.index = pairs.index
+    return pd.concat([rest, pairs], axis=1).reset_index(drop=True)
+
+
+def _split_text(s: pd.Series) -> pd.Series:
+    """Lists of raw skill strings per string value (NaN for non-strings)."""
+    try:
+        return s.str.replace(_LIST_WRAPPER, "", regex=True).str.split(_SEPARATORS, regex=True)
+    except AttributeError:      # no strings at all, e.g. only lists or numbers
+        return pd.Series(None, index=s.index, dtype=object)
+
+
+def is_exploded(df: pd.DataFrame) -> bool:
+    """True if df was produced by explode_skills()."""
+    return POST_ID in df.columns
+
+
+def ensure_exploded(df: pd.DataFrame, skills_col: str = "skills") -> pd.DataFrame:
+    """Returns df unchanged if it is already exploded, otherwise explode_skills(df)."""
+    return df if is_exploded(df) else explode_skills(df, skills_col)
@@ -0,0 +1,82 @@
+-- Aggregates served to the app via PostgREST RPC (supabase.rpc(...)).
+-- Run once in the Supabase SQL editor, after sql/skill_daily_counts.sql.
+-- Results scale with distinct skills/days (or co-occurring pairs), not with job x skill rows.
+-- All are ordered by a unique key: the client pages them with Range requests,
+-- since PostgREST's max_rows also caps RPC responses.
+
+-- Skill -> number of distinct jobs for a keyword, plus the keyword's total job count
+-- (TotalJobs is the Wilson "n"; Jobs is each skill's "k").
+-- Both read the daily cube (sql/skill_daily_counts.sql); a job has one posting day,
+-- so summing daily job counts gives distinct jobs.
+CREATE OR REPLACE FUNCTION keyword_skill_counts(p_keyword text)
+RETURNS TABLE ("SkillName" text, "Jobs" bigint, "TotalJobs" bigint)
+LANGUAGE sql STABLE AS $$
+    SELECT "SkillName",
+           sum("Jobs")::bigint,
+           (SELECT coalesce(sum("Jobs"), 0)::bigint FROM keyword_daily_jobs WHERE "Keyword" = p_keyword)
+    FROM skill_daily_counts
+    WHERE "Keyword" = p_keyword
+    GROUP BY 1
+    ORDER BY 2 DESC, 1;
+$$;
+
+-- (day, skill) -> number of distinct jobs posted that day mentioning the skill,
+-- optionally only from p_since on (trend windows). Undated cells are left out.
+DROP FUNCTION IF EXISTS keyword_daily_skill_counts(text);
+CREATE OR REPLACE FUNCTION keyword_daily_skill_counts(p_keyword text, p_since date DEFAULT NULL)
+RETURNS TABLE ("JobPosted" date, "SkillName" text, "count" bigint)
+LANGUAGE sql STABLE AS $$
+    SELECT "Day", "SkillName", "Jobs"
+    FROM skill_daily_counts
+    WHERE "Keyword" = p_keyword
+      AND "Day" > '-infinity'
+      AND (p_since IS NULL OR "Day" >= p_since)
+    ORDER BY 1, 3 DESC, 2;
+$$;
+
+-- Skill pairs of a keyword for skill_cooccurrence: jobs listing both skills (SkillA < SkillB;
+-- pairs in fewer than p_min_pair jobs are dropped), one SkillA = SkillB row per skill with
+-- its job count, and the number of jobs with any skill as TotalJobs. The self-join runs
+-- here, so the app reads pairs instead of the keyword's whole job_skill_view.
+CREATE OR REPLACE FUNCTION keyword_skill_pairs(p_keyword text, p_min_pair int DEFAULT 2)
+RETURNS TABLE ("SkillA" text, "SkillB" text, "Jobs" bigint, "TotalJobs" bigint)
+LANGUAGE sql STABLE AS $$
+    WITH js AS (
+        SELECT DISTINCT "JobId", "SkillName"
+        FROM job_skill_view
+        WHERE "Keyword" = p_keyword AND "SkillName" <> ''
+    )
+    SELECT a."SkillName",
+           b."SkillName",
+           count(*)::bigint,
+           (SELECT count(DISTINCT "JobId") FROM js)::bigint
+    FROM js a
+    JOIN js b ON b."JobId" = a."JobId" AND b."SkillName" >= a."SkillName"
+    GROUP BY 1, 2
+    HAVING a."SkillName" = b."SkillName" OR count(*) >= p_min_pair
+    ORDER BY 1, 2;
+$$;
+
+-- Keyword -> jobs listing any of p_skills (compared lower-case): the Wilson "k" of a merged
+-- skill group such as the ML terms, each job counted once however many of them it lists.
+CREATE OR REPLACE FUNCTION keyword_any_skill_jobs(p_keywords text[], p_skills text[])
+RETURNS TABLE ("Keyword" text, "Jobs" bigint)
+LANGUAGE sql STABLE AS $$
+    SELECT "Keyword", count(DISTINCT "JobId")::bigint
+    FROM job_skill_view
+    WHERE "Keyword" = ANY(p_keywords) AND lower("SkillName") = ANY(p_skills)
+    GROUP BY 1
+    ORDER BY 1;
+$$;
+
+-- Supabase API roles (skipped on a plain local Postgres where they don't exist)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'anon') THEN
+        GRANT EXECUTE ON FUNCTION keyword_skill_counts(text) TO anon, authenticated;
+        GRANT EXECUTE ON FUNCTION keyword_daily_skill_counts(text, date) TO anon, authenticated;
+        GRANT EXECUTE ON FUNCTION keyword_skill_pairs(text, int) TO anon, authenticated;
+        GRANT EXECUTE ON FUNCTION keyword_any_skill_jobs(text[], text[]) TO anon, authenticated;
+    END IF;
+END
+$$;
@@ -0,0 +1,18 @@
+-- Precomputed role pages (already_cached.py). Plots live in the blob store
+-- (blob_store.py); plt1..plt3 hold blob keys ('<sha256>.<ext>') instead of base64
+-- images, so reads and the daily upsert move a few hundred bytes per row.
+-- Existing tables: run this, then already_cached.migrate_cached_to_blobs() once.
+
+CREATE TABLE IF NOT EXISTS cached (
+    name        text PRIMARY KEY,
+    plt1        text,
+    plt2        text,
+    plt3        text,
+    skill_list  text,
+    updated_at  timestamptz NOT NULL DEFAULT now()
+);
+
+ALTER TABLE cached ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+
+-- upsert(on_conflict="name") needs a unique name
+CREATE UNIQUE INDEX IF NOT EXISTS cached_name_key ON cached (name);
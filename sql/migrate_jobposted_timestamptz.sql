@@ -0,0 +1,42 @@
+-- One-off: converts jobs."JobPosted" from free-form text to timestamptz.
+-- New rows are parsed per source at fetch time (data_generation/posted_dates.py);
+-- this converts the rows stored before that. Values Postgres can't read as a
+-- timestamp (e.g. 'N/A') become NULL. Safe to re-run: does nothing once converted.
+-- Run in the Supabase SQL editor, then re-run sql/analytics_rpc.sql.
+
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'jobs' AND column_name = 'JobPosted') <> 'text' THEN
+        RETURN;
+    END IF;
+
+    CREATE FUNCTION pg_temp.try_timestamptz(v text) RETURNS timestamptz
+    LANGUAGE plpgsql IMMUTABLE AS $f$
+    BEGIN
+        RETURN v::timestamptz;      -- ISO 8601 and RFC-822 ("Mon, 11 Aug 2025 10:00:00 +0000")
+    EXCEPTION WHEN others THEN
+        RETURN NULL;
+    END
+    $f$;
+
+    -- the view depends on the column type
+    DROP VIEW IF EXISTS job_skill_view;
+    ALTER TABLE jobs
+        ALTER COLUMN "JobPosted" TYPE timestamptz USING pg_temp.try_timestamptz("JobPosted");
+    CREATE VIEW job_skill_view AS
+        SELECT j."JobId", j."Title", j."JobLink", j."JobPosted", j."Keyword", s."SkillName"
+        FROM job_skills js
+        JOIN jobs j   ON j."JobId" = js."JobId"
+        JOIN skills s ON s."SkillId" = js."SkillId";
+END
+$$;
+
+-- Supabase API roles (skipped on a plain local Postgres where they don't exist)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'anon') THEN
+        GRANT SELECT ON job_skill_view TO anon, authenticated;
+    END IF;
+END
+$$;
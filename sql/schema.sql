@@ -0,0 +1,34 @@
+-- Tables and view used by the pipeline (Database / PostgresCopyDatabase).
+-- Run once against a fresh Postgres (e.g. a local instance for testing the COPY
+-- ingestion path), then sql/skill_daily_counts.sql and sql/analytics_rpc.sql
+-- (sql/cached.sql for the precomputed role pages).
+-- Existing databases created with a text "JobPosted" column: run
+-- sql/migrate_jobposted_timestamptz.sql first.
+
+CREATE TABLE IF NOT EXISTS skills (
+    "SkillId"   bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    "SkillName" text NOT NULL,
+    CONSTRAINT skills_skillname_key UNIQUE ("SkillName")
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    "JobId"     text PRIMARY KEY,
+    "Title"     text,
+    "JobLink"   text,
+    "JobPosted" timestamptz,
+    "Keyword"   text
+);
+
+CREATE TABLE IF NOT EXISTS job_skills (
+    "JobId"   text   NOT NULL REFERENCES jobs ("JobId") ON DELETE CASCADE,
+    "SkillId" bigint NOT NULL REFERENCES skills ("SkillId") ON DELETE CASCADE,
+    CONSTRAINT job_skills_jobid_skillid_key UNIQUE ("JobId", "SkillId")
+);
+
+CREATE INDEX IF NOT EXISTS jobs_keyword_idx ON jobs ("Keyword", "JobPosted");
+
+CREATE OR REPLACE VIEW job_skill_view AS
+    SELECT j."JobId", j."Title", j."JobLink", j."JobPosted", j."Keyword", s."SkillName"
+    FROM job_skills js
+    JOIN jobs j   ON j."JobId" = js."JobId"
+    JOIN skills s ON s."SkillId" = js."SkillId";
@@ -0,0 +1,182 @@
+-- Daily skill-count cube, maintained incrementally by triggers.
+-- Run after sql/schema.sql and before sql/analytics_rpc.sql (whose functions read it).
+--
+--   skill_daily_counts  (Day, Keyword, SkillName) -> jobs posted that day mentioning the skill
+--   keyword_daily_jobs  (Day, Keyword)            -> jobs posted that day
+--
+-- Every insert into job_skills / jobs adds to the matching cells, and a job whose
+-- JobPosted or Keyword changes on re-upsert is moved between cells, so analytics
+-- cost scales with days x skills instead of total postings. Undated jobs (JobPosted
+-- NULL) are counted on Day = '-infinity' so skill totals include them; trend queries
+-- (Day > '-infinity') leave them out.
+-- After manual edits to skills (renames, deletes) run: SELECT rebuild_skill_daily_counts();
+-- Trigger functions run as their owner, so API roles that may write job_skills/jobs
+-- don't need write access to the cube.
+
+CREATE TABLE IF NOT EXISTS skill_daily_counts (
+    "Day"       date   NOT NULL,
+    "Keyword"   text   NOT NULL,
+    "SkillName" text   NOT NULL,
+    "Jobs"      bigint NOT NULL,
+    PRIMARY KEY ("Keyword", "Day", "SkillName")
+);
+
+CREATE TABLE IF NOT EXISTS keyword_daily_jobs (
+    "Day"     date   NOT NULL,
+    "Keyword" text   NOT NULL,
+    "Jobs"    bigint NOT NULL,
+    PRIMARY KEY ("Keyword", "Day")
+);
+
+-- Cube day of a posting time: its UTC date, or '-infinity' when undated.
+CREATE OR REPLACE FUNCTION skill_cube_day(p_posted timestamptz) RETURNS date
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT coalesce((p_posted AT TIME ZONE 'UTC')::date, '-infinity'::date)
+$$;
+
+-- Adds p_sign to every cell of one job (its skills and the keyword total).
+CREATE OR REPLACE FUNCTION skill_cube_adjust_job(p_job text, p_posted timestamptz, p_keyword text, p_sign int)
+RETURNS void
+LANGUAGE plpgsql SECURITY DEFINER SET search_path FROM CURRENT AS $$
+DECLARE
+    v_day date := skill_cube_day(p_posted);
+BEGIN
+    IF p_keyword IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO skill_daily_counts AS c ("Day", "Keyword", "SkillName", "Jobs")
+    SELECT v_day, p_keyword, s."SkillName", p_sign
+    FROM job_skills x JOIN skills s ON s."SkillId" = x."SkillId"
+    WHERE x."JobId" = p_job AND s."SkillName" <> ''
+    ORDER BY s."SkillName"
+    ON CONFLICT ("Keyword", "Day", "SkillName") DO UPDATE SET "Jobs" = c."Jobs" + EXCLUDED."Jobs";
+
+    INSERT INTO keyword_daily_jobs AS c ("Day", "Keyword", "Jobs")
+    VALUES (v_day, p_keyword, p_sign)
+    ON CONFLICT ("Keyword", "Day") DO UPDATE SET "Jobs" = c."Jobs" + EXCLUDED."Jobs";
+
+    IF p_sign < 0 THEN
+        DELETE FROM skill_daily_counts WHERE "Keyword" = p_keyword AND "Day" = v_day AND "Jobs" <= 0;
+        DELETE FROM keyword_daily_jobs WHERE "Keyword" = p_keyword AND "Day" = v_day AND "Jobs" <= 0;
+    END IF;
+END
+$$;
+
+-- job_skills: one statement-level pass per insert/delete batch
+CREATE OR REPLACE FUNCTION skill_cube_job_skills_changed() RETURNS trigger
+LANGUAGE plpgsql SECURITY DEFINER SET search_path FROM CURRENT AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO skill_daily_counts AS c ("Day", "Keyword", "SkillName", "Jobs")
+        SELECT skill_cube_day(j."JobPosted"), j."Keyword", s."SkillName", count(*)
+        FROM new_rows n
+        JOIN jobs j   ON j."JobId" = n."JobId"
+        JOIN skills s ON s."SkillId" = n."SkillId"
+        WHERE j."Keyword" IS NOT NULL AND s."SkillName" <> ''
+        GROUP BY 1, 2, 3
+        ORDER BY 2, 1, 3        -- fixed lock order for concurrent batches
+        ON CONFLICT ("Keyword", "Day", "SkillName") DO UPDATE SET "Jobs" = c."Jobs" + EXCLUDED."Jobs";
+    ELSE
+        -- rows of a deleted job were already removed by its jobs BEFORE DELETE trigger
+        WITH d AS (
+            SELECT skill_cube_day(j."JobPosted") AS "Day", j."Keyword", s."SkillName", count(*) AS n
+            FROM old_rows o
+            JOIN jobs j   ON j."JobId" = o."JobId"
+            JOIN skills s ON s."SkillId" = o."SkillId"
+            WHERE j."Keyword" IS NOT NULL
+            GROUP BY 1, 2, 3
+        )
+        UPDATE skill_daily_counts c SET "Jobs" = c."Jobs" - d.n
+        FROM d
+        WHERE c."Keyword" = d."Keyword" AND c."Day" = d."Day" AND c."SkillName" = d."SkillName";
+        DELETE FROM skill_daily_counts WHERE "Jobs" <= 0;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+-- jobs: totals on insert; move a job's cells when its day/keyword changes; drop them on delete
+CREATE OR REPLACE FUNCTION skill_cube_jobs_inserted() RETURNS trigger
+LANGUAGE plpgsql SECURITY DEFINER SET search_path FROM CURRENT AS $$
+BEGIN
+    INSERT INTO keyword_daily_jobs AS c ("Day", "Keyword", "Jobs")
+    SELECT skill_cube_day("JobPosted"), "Keyword", count(*)
+    FROM new_rows
+    WHERE "Keyword" IS NOT NULL
+    GROUP BY 1, 2
+    ORDER BY 2, 1
+    ON CONFLICT ("Keyword", "Day") DO UPDATE SET "Jobs" = c."Jobs" + EXCLUDED."Jobs";
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION skill_cube_job_changed() RETURNS trigger
+LANGUAGE plpgsql SECURITY DEFINER SET search_path FROM CURRENT AS $$
+BEGIN
+    PERFORM skill_cube_adjust_job(OLD."JobId", OLD."JobPosted", OLD."Keyword", -1);
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    PERFORM skill_cube_adjust_job(NEW."JobId", NEW."JobPosted", NEW."Keyword", 1);
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS job_skills_cube_insert ON job_skills;
+CREATE TRIGGER job_skills_cube_insert AFTER INSERT ON job_skills
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION skill_cube_job_skills_changed();
+
+DROP TRIGGER IF EXISTS job_skills_cube_delete ON job_skills;
+CREATE TRIGGER job_skills_cube_delete AFTER DELETE ON job_skills
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION skill_cube_job_skills_changed();
+
+DROP TRIGGER IF EXISTS jobs_cube_insert ON jobs;
+CREATE TRIGGER jobs_cube_insert AFTER INSERT ON jobs
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION skill_cube_jobs_inserted();
+
+DROP TRIGGER IF EXISTS jobs_cube_update ON jobs;
+CREATE TRIGGER jobs_cube_update AFTER UPDATE OF "JobPosted", "Keyword" ON jobs
+    FOR EACH ROW
+    WHEN (OLD."JobPosted" IS DISTINCT FROM NEW."JobPosted" OR OLD."Keyword" IS DISTINCT FROM NEW."Keyword")
+    EXECUTE FUNCTION skill_cube_job_changed();
+
+DROP TRIGGER IF EXISTS jobs_cube_delete ON jobs;
+CREATE TRIGGER jobs_cube_delete BEFORE DELETE ON jobs
+    FOR EACH ROW EXECUTE FUNCTION skill_cube_job_changed();
+
+-- Full recompute from job_skill_view (backfill, or repair after manual edits).
+CREATE OR REPLACE FUNCTION rebuild_skill_daily_counts() RETURNS void
+LANGUAGE plpgsql SECURITY DEFINER SET search_path FROM CURRENT AS $$
+BEGIN
+    LOCK TABLE skill_daily_counts, keyword_daily_jobs IN EXCLUSIVE MODE;
+    DELETE FROM skill_daily_counts;
+    DELETE FROM keyword_daily_jobs;
+
+    INSERT INTO skill_daily_counts ("Day", "Keyword", "SkillName", "Jobs")
+    SELECT skill_cube_day("JobPosted"), "Keyword", "SkillName", count(DISTINCT "JobId")
+    FROM job_skill_view
+    WHERE "Keyword" IS NOT NULL AND "SkillName" <> ''
+    GROUP BY 1, 2, 3;
+
+    INSERT INTO keyword_daily_jobs ("Day", "Keyword", "Jobs")
+    SELECT skill_cube_day("JobPosted"), "Keyword", count(*)
+    FROM jobs
+    WHERE "Keyword" IS NOT NULL
+    GROUP BY 1, 2;
+END
+$$;
+
+SELECT rebuild_skill_daily_counts();
+
+-- Supabase API roles (skipped on a plain local Postgres where they don't exist)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'anon') THEN
+        GRANT SELECT ON skill_daily_counts, keyword_daily_jobs TO anon, authenticated;
+    END IF;
+END
+$$;
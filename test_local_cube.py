@@ -0,0 +1,86 @@
+import pandas as pd
+
+from local_database import LocalDatabase
+
+
+SKILLS = pd.DataFrame({"SkillName": ["python", "sql", "aws"]})
+
+
+def insert(db, jobs, job_skills):
+    db.insert_into_supabase(SKILLS, pd.DataFrame(jobs), pd.DataFrame(job_skills, columns=["JobId", "SkillName"]))
+
+
+def job(job_id, posted, keyword="data science"):
+    return {"JobId": job_id, "Title": "t", "JobLink": f"l/{job_id}", "JobPosted": posted, "Keyword": keyword}
+
+
+def cube(db):
+    """Both cube tables as sorted frames."""
+    with db._lock:
+        return tuple(
+            pd.read_sql_query(f"SELECT * FROM {table} ORDER BY 1, 2, 3", db.conn)
+            for table in (db.TABLE_DAILY_COUNTS, db.TABLE_DAILY_JOBS)
+        )
+
+
+def assert_matches_rebuild(db):
+    maintained = cube(db)
+    db.rebuild_skill_daily_counts()
+    for kept, rebuilt in zip(maintained, cube(db)):
+        pd.testing.assert_frame_equal(kept, rebuilt)
+
+
+def test_triggers_match_rebuild_with_undated_jobs(tmp_path):
+    db = LocalDatabase(str(tmp_path / "cube.sqlite3"))
+    insert(
+        db,
+        [job("1", pd.Timestamp("2025-08-11", tz="UTC")), job("2", pd.NaT), job("3", pd.NaT)],
+        [("1", "python"), ("2", "python"), ("2", "aws"), ("3", "python"), ("3", "sql")],
+    )
+    assert_matches_rebuild(db)
+
+    counts, n_jobs = db.skill_counts("data science")
+    assert n_jobs == 3
+    assert counts.to_dict() == {"python": 3, "aws": 1, "sql": 1}
+    trend = db.daily_skill_counts("data science")
+    assert trend["JobPosted"].notna().all() and trend["count"].sum() == 1
+
+    # re-upsert: undated -> dated, dated -> another day
+    insert(
+        db,
+        [job("1", pd.Timestamp("2025-08-12", tz="UTC")), job("2", pd.Timestamp("2025-08-11", tz="UTC"))],
+        [],
+    )
+    assert_matches_rebuild(db)
+    assert db.skill_counts("data science")[1] == 3
+
+    # dated -> unparseable text lands in the undated cell
+    with db._lock, db.conn:
+        db.conn.execute(f'UPDATE {db.table_jobs} SET "JobPosted" = ? WHERE "JobId" = ?', ("Mon, soon", "1"))
+    assert_matches_rebuild(db)
+
+    with db._lock, db.conn:
+        db.conn.execute(f'DELETE FROM {db.table_job_skills} WHERE "JobId" = ? AND "SkillId" = '
+                        f'(SELECT "SkillId" FROM {db.table_skills} WHERE "SkillName" = ?)', ("3", "sql"))
+        db.conn.execute(f'DELETE FROM {db.table_jobs} WHERE "JobId" = ?', ("2",))
+    assert_matches_rebuild(db)
+
+    counts, n_jobs = db.skill_counts("data science")
+    assert n_jobs == 2
+    assert counts.to_dict() == {"python": 2}
+    many = db.daily_skill_counts_many(["data science"])
+    assert many["JobPosted"].isna().all() and many["count"].sum() == 2
+
+
+def test_cube_from_before_undated_cells_is_rebuilt(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    db = LocalDatabase(path)
+    insert(db, [job("1", pd.NaT)], [("1", "python")])
+    with db._lock, db.conn:
+        db.conn.execute(f"DELETE FROM {db.TABLE_DAILY_COUNTS}")
+        db.conn.execute(f"DELETE FROM {db.TABLE_DAILY_JOBS}")
+        db.conn.execute("PRAGMA user_version = 1")
+    db.close()
+
+    db = LocalDatabase(path)
+    assert db.skill_counts("data science")[1] == 1